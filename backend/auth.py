@@ -3,27 +3,24 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pymongo import MongoClient
+import tracing
+from repositories import get_repository
+from services import password_service
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "Tis_a_test_init")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 3000
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (passlib is imported and configured on first use, with
+# the bcrypt cost from BCRYPT_ROUNDS; see services/password_service.py)
+get_pwd_context = password_service.get_pwd_context
 
 # Bearer token scheme
 security = HTTPBearer()
 
-# MongoDB connection for users
-client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
-db = client[os.getenv("DB_NAME", "cert_verification")]
-users_collection = db["users"]
-
 class AuthError(Exception):
     def __init__(self, message: str, status_code: int = 401):
         self.message = message
@@ -31,11 +28,11 @@ class AuthError(Exception):
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_service.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return password_service.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -62,15 +59,21 @@ def verify_token(token: str) -> dict:
 
 def get_user(username: str) -> Optional[dict]:
     """Get user from database"""
-    return users_collection.find_one({"username": username})
+    return get_repository().get_user(username)
 
 def authenticate_user(username: str, password: str) -> Optional[dict]:
     """Authenticate user credentials"""
     user = get_user(username)
     if not user:
         return None
-    if not verify_password(password, user["hashed_password"]):
+    valid, new_hash = password_service.verify_and_update(password, user["hashed_password"])
+    if not valid:
         return None
+    if new_hash:
+        # Stored with another bcrypt cost: upgrade (or downgrade) it while the
+        # plain password is at hand
+        get_repository().update_user(username, {"hashed_password": new_hash})
+        user["hashed_password"] = new_hash
     return user
 
 def create_user(username: str, email: str, password: str, role: str = "user") -> dict:
@@ -80,7 +83,7 @@ def create_user(username: str, email: str, password: str, role: str = "user") ->
         raise AuthError("Username already exists", 409)
     
     # Check if email already exists
-    if users_collection.find_one({"email": email}):
+    if get_repository().find_user_by_email(email):
         raise AuthError("Email already exists", 409)
     
     hashed_password = get_password_hash(password)
@@ -93,18 +96,19 @@ def create_user(username: str, email: str, password: str, role: str = "user") ->
         "is_active": True
     }
     
-    result = users_collection.insert_one(user_data)
-    user_data["_id"] = str(result.inserted_id)
+    user_data["_id"] = get_repository().insert_user(user_data)
     return user_data
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get current authenticated user"""
     try:
-        token = credentials.credentials
-        payload = verify_token(token)
-        username = payload.get("sub")
-        
-        user = get_user(username)
+        with tracing.span("auth.get_current_user") as span:
+            token = credentials.credentials
+            payload = verify_token(token)
+            username = payload.get("sub")
+            span.set("user", username)
+
+            user = get_user(username)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
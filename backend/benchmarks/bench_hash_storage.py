@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Compare hex-string and 32-byte binary certificate hashes in MongoDB.
+
+Fills two scratch collections with the same hashes, one stored as 64-char hex
+and one as BSON binary, indexes ``hash`` in both and reports the index size
+(WiredTiger, from $collStats) and point-lookup latency as done by /verify.
+
+Needs a real MongoDB at MONGO_URI; the scratch database is dropped afterwards.
+
+Usage (from the backend directory):
+    python benchmarks/bench_hash_storage.py [--count 200000] [--lookups 5000]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import Binary
+
+from utils import get_client
+
+SCRATCH_DB = "bench_hash_storage"
+
+
+def fill(collection, hashes: list, binary: bool, batch: int = 10000) -> None:
+    collection.drop()
+    for start in range(0, len(hashes), batch):
+        collection.insert_many([
+            {"hash": Binary(bytes.fromhex(h)) if binary else h, "issued_by": "bench"}
+            for h in hashes[start:start + batch]
+        ], ordered=False)
+    collection.create_index("hash")
+
+
+def index_size(collection) -> int:
+    stats = next(collection.aggregate([{"$collStats": {"storageStats": {}}}]))
+    return stats["storageStats"]["indexSizes"]["hash_1"]
+
+
+def time_lookups(collection, probes: list) -> list:
+    samples = []
+    for value in probes:
+        started = time.perf_counter()
+        collection.find_one({"hash": value}, {"_id": 0, "hash": 1})
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(args.count)]
+    probes = random.Random(42).sample(hashes, min(args.lookups, len(hashes)))
+    client = get_client()
+    db = client[SCRATCH_DB]
+    try:
+        results = {}
+        for name, binary in (("hex", False), ("binary", True)):
+            collection = db[f"certificates_{name}"]
+            fill(collection, hashes, binary)
+            # Flush so the index size reflects the checkpointed tree
+            client.admin.command("fsync")
+            values = [Binary(bytes.fromhex(h)) for h in probes] if binary else probes
+            time_lookups(collection, values[:500])  # warm the cache
+            samples = sorted(time_lookups(collection, values))
+            results[name] = (index_size(collection), samples)
+
+        print(f"{args.count} documents, {len(probes)} lookups")
+        print(f"{'storage':<8}{'index size':>14}{'median us':>12}{'p95 us':>10}")
+        for name, (size, samples) in results.items():
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f"{name:<8}{size / 1024 / 1024:>11.2f} MB{statistics.median(samples):>12.1f}{p95:>10.1f}")
+        hex_size, binary_size = results["hex"][0], results["binary"][0]
+        print(f"binary index is {binary_size / hex_size:.0%} of the hex index")
+    finally:
+        client.drop_database(SCRATCH_DB)
+
+
+if __name__ == "__main__":
+    main()
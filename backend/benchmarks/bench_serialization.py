@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Measure CPU spent serialising large certificate responses.
+
+Compares the default FastAPI path (pydantic validation + jsonable_encoder +
+stdlib json) with the fast path used by the routes (model_construct +
+orjson via FastJSONResponse).
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py [--sizes 1000 10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models.certificate import CertificateRecord, IssueResponse
+from responses import FastJSONResponse, construct_trusted
+
+
+def make_records(count: int) -> list:
+    base = datetime(2024, 1, 1)
+    return [
+        {
+            "student_name": f"Student {i}",
+            "student_email": f"student{i}@example.edu",
+            "institution": "University of Lagos",
+            "degree": "B.Sc. Computer Science",
+            "graduation_year": 2000 + i % 25,
+            "cgpa": round(2.0 + (i % 300) / 100, 2),
+            "reg_number": f"CSC/{i % 100:02d}/{i:06d}",
+            "honours": "Second Class Upper",
+            "state_of_origin": "Lagos",
+            "hash": f"{i:064x}",
+            "issued_by": "university",
+            "issuer_email": "registry@example.edu",
+            "created_at": base + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def cpu_time(fn, repeat: int) -> float:
+    """Best-of-N CPU seconds for a single call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def bench_listing(records: list, repeat: int) -> tuple:
+    body = {"certificates": records, "count": len(records), "accessed_by": "admin"}
+
+    def default_path():
+        JSONResponse(jsonable_encoder(body)).body
+
+    def fast_path():
+        FastJSONResponse(body).body
+
+    return cpu_time(default_path, repeat), cpu_time(fast_path, repeat)
+
+
+def bench_issue(records: list, repeat: int) -> tuple:
+    def default_path():
+        for cert in records:
+            resp = IssueResponse(
+                message="Certificate issued successfully",
+                certificate=CertificateRecord(**cert),
+                issued_by="university",
+                blockchain_stored=True,
+            )
+            JSONResponse(jsonable_encoder(resp)).body
+
+    def fast_path():
+        for cert in records:
+            resp = IssueResponse.model_construct(
+                message="Certificate issued successfully",
+                certificate=construct_trusted(CertificateRecord, cert),
+                issued_by="university",
+                blockchain_stored=True,
+            )
+            FastJSONResponse(resp.model_dump()).body
+
+    return cpu_time(default_path, repeat), cpu_time(fast_path, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':<22}{'records':>9}{'default ms':>13}{'fast ms':>10}{'saved ms':>11}{'speedup':>9}")
+    for size in args.sizes:
+        records = make_records(size)
+        for name, bench in (("GET /certificates", bench_listing), ("POST /issue (xN)", bench_issue)):
+            default_s, fast_s = bench(records, args.repeat)
+            print(
+                f"{name:<22}{size:>9}{default_s * 1000:>13.1f}{fast_s * 1000:>10.1f}"
+                f"{(default_s - fast_s) * 1000:>11.1f}{default_s / max(fast_s, 1e-9):>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Import-time profile and startup-time benchmark for the API.
+
+Every measurement runs in a fresh interpreter so module caches do not hide
+import costs.
+
+Usage (from the backend directory):
+    python benchmarks/bench_startup.py                # import + lifespan timings
+    python benchmarks/bench_startup.py --profile 25   # slowest imports (-X importtime)
+    python benchmarks/bench_startup.py --serve        # spawn uvicorn, time until live/ready
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter
+STARTUP_SNIPPET = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        t2 = time.perf_counter()
+    return t2
+
+t2 = asyncio.run(run())
+heavy = [m for m in ("web3", "passlib.context", "eth_account") if m in sys.modules]
+print(json.dumps({"import_s": t1 - t0, "lifespan_s": t2 - t1, "heavy_modules_loaded": heavy}))
+"""
+
+
+def run_child(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+
+
+def bench_startup(repeat: int) -> None:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = run_child(STARTUP_SNIPPET)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        result["process_s"] = time.perf_counter() - started
+        samples.append(result)
+
+    for key in ("import_s", "lifespan_s", "process_s"):
+        values = [s[key] * 1000 for s in samples]
+        print(f"{key:<12} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    print(f"heavy modules loaded at startup: {samples[-1]['heavy_modules_loaded'] or 'none'}")
+
+
+def profile_imports(top: int) -> None:
+    out = run_child("import main", "-X", "importtime")
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [p.strip() for p in line.replace("import time:", "|").split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5) as resp:
+                if resp.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def bench_serve(timeout: float) -> None:
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        live = _wait_for(f"http://127.0.0.1:{port}/health/live", deadline)
+        print(f"live after  {(live - started) * 1000:8.1f} ms")
+        try:
+            ready = _wait_for(f"http://127.0.0.1:{port}/health/ready", deadline)
+            print(f"ready after {(ready - started) * 1000:8.1f} ms")
+        except TimeoutError:
+            print(f"not ready within {timeout:.0f}s (is MongoDB reachable at MONGO_URI?)")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", type=int, metavar="TOP", help="print the TOP slowest imports")
+    parser.add_argument("--serve", action="store_true", help="time a real uvicorn process until live/ready")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if args.profile:
+        profile_imports(args.profile)
+    elif args.serve:
+        bench_serve(args.timeout)
+    else:
+        bench_startup(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Compare the MongoDB and SQLite storage backends on the issue and verify paths.
+
+For each engine, issues ``--count`` certificates one at a time the way /issue
+does (``save_certificate`` in a write session), then looks up ``--lookups``
+random hashes the way /verify does (``find_certificate`` with replica reads
+allowed), plus as many unknown hashes. Reports per-operation latency
+percentiles and single-client throughput.
+
+MongoDB needs a real server at MONGO_URI and uses a scratch database that is
+dropped afterwards; SQLite uses a temporary file. An engine that cannot be
+reached is skipped.
+
+Usage (from the backend directory):
+    python benchmarks/bench_storage.py [--count 20000] [--lookups 5000]
+        [--engines mongo sqlite]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the Mongo engine away from the real database
+os.environ["DB_NAME"] = "bench_storage"
+
+from repositories import create_repository, set_repository
+from utils import find_certificate, get_client, save_certificate, write_session
+
+ENGINES = ("mongo", "sqlite")
+
+
+def metadata(i: int) -> dict:
+    return {
+        "student_name": f"Student {i}",
+        "institution": "Bench University",
+        "degree": random.choice(["B.Sc. Computer Science", "B.A. History", "M.Sc. Physics"]),
+        "graduation_year": 2015 + i % 10,
+        "reg_number": f"BU/{i:07d}",
+        "issued_by": "bench",
+        "issuer_email": "bench@example.com",
+    }
+
+
+def issue(count: int) -> tuple:
+    samples, hashes = [], []
+    for i in range(count):
+        started = time.perf_counter()
+        with write_session() as session:
+            record = save_certificate(metadata(i), session=session)
+        samples.append(time.perf_counter() - started)
+        hashes.append(record["hash"])
+    return samples, hashes
+
+
+def verify(probes: list) -> list:
+    samples = []
+    for cert_hash in probes:
+        started = time.perf_counter()
+        find_certificate(cert_hash, read=True)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarise(samples: list) -> tuple:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1e6
+
+    return pct(0.5), pct(0.95), pct(0.99), len(samples) / sum(samples)
+
+
+def run(engine: str, args) -> dict:
+    if engine == "sqlite":
+        handle, path = tempfile.mkstemp(suffix=".db", prefix="bench_storage_")
+        os.close(handle)
+        repository = create_repository("sqlite", path=path)
+    else:
+        repository = create_repository("mongo")
+        get_client().drop_database("bench_storage")
+    set_repository(repository)
+    try:
+        repository.connect()
+        repository.ping()
+        repository.ensure_schema()
+        issued, hashes = issue(args.count)
+        rng = random.Random(42)
+        hits = rng.sample(hashes, min(args.lookups, len(hashes)))
+        misses = [hashlib.sha256(f"missing {i}".encode()).hexdigest() for i in range(len(hits))]
+        verify(hits[:500])  # warm the cache
+        return {"issue": issued, "verify": verify(hits), "verify miss": verify(misses)}
+    finally:
+        if engine == "sqlite":
+            repository.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        else:
+            get_client().drop_database("bench_storage")
+            repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    args = parser.parse_args()
+
+    results = {}
+    for engine in args.engines:
+        try:
+            results[engine] = run(engine, args)
+        except Exception as e:
+            print(f"Skipping {engine}: {e}")
+
+    print(f"{args.count} certificates issued, {args.lookups} lookups")
+    print(f"{'engine':<8}{'path':<13}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'ops/s':>10}")
+    for engine, paths in results.items():
+        for path, samples in paths.items():
+            p50, p95, p99, rate = summarise(samples)
+            print(f"{engine:<8}{path:<13}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
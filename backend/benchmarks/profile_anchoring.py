@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Gas and anchoring-latency profile of CertRegistry on an in-process EVM.
+
+Deploys blockchain/certificate_contract.sol to an eth-tester (py-evm) chain
+and anchors fresh hashes with each strategy:
+
+    single     verifyCert pre-check + addCert + wait for the receipt, one hash
+               at a time (what store_certificate_on_chain does)
+    pipelined  send every addCert back to back, then wait for the receipts
+    batch:N    addCerts with N hashes per transaction
+
+For each it reports gas per hash and per transaction, send-to-receipt latency
+as seen by the client (for pipelined this includes queueing behind the other
+sends) and throughput, then recommends ANCHOR_GAS_LIMIT and REVOKE_GAS_LIMIT
+(the largest gas used plus a safety margin). Latency on an in-process chain
+is the client and EVM cost only; block time and network delay come on top
+on a real network.
+
+Requires eth-tester[py-evm] (pip install "web3[tester]") and either
+py-solc-x (as deploy_contract.py) or a precompiled --artifact JSON with
+"abi" and "bin".
+
+Usage (from the backend directory):
+    python benchmarks/profile_anchoring.py [--hashes 200] [--batch-sizes 10 50 100]
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3, EthereumTesterProvider
+
+CONTRACT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "blockchain", "certificate_contract.sol",
+)
+SOLC_VERSION = "0.8.19"
+
+
+def load_contract(artifact: str = None):
+    if artifact:
+        with open(artifact) as f:
+            compiled = json.load(f)
+        return compiled["abi"], compiled["bin"]
+
+    from solcx import compile_source, install_solc
+    install_solc(SOLC_VERSION)
+    with open(CONTRACT_PATH) as f:
+        compiled = compile_source(f.read(), output_values=["abi", "bin"], solc_version=SOLC_VERSION)
+    _, contract = compiled.popitem()
+    return contract["abi"], contract["bin"]
+
+
+class HashSource:
+    """Fresh, never anchored hashes (re-anchoring costs far less gas)."""
+
+    def __init__(self) -> None:
+        self._next = 0
+
+    def take(self, count: int) -> list:
+        start, self._next = self._next, self._next + count
+        return [Web3.keccak(text=f"certificate-{i}") for i in range(start, start + count)]
+
+
+def _result(name: str, hashes: int, gas_per_tx: list, latencies: list, elapsed: float) -> dict:
+    return {
+        "strategy": name,
+        "hashes": hashes,
+        "transactions": len(gas_per_tx),
+        "gas_per_hash": sum(gas_per_tx) / hashes,
+        "max_gas_per_tx": max(gas_per_tx),
+        "latency_ms_median": statistics.median(latencies) * 1000,
+        "latency_ms_p95": sorted(latencies)[max(0, math.ceil(len(latencies) * 0.95) - 1)] * 1000,
+        "hashes_per_second": hashes / elapsed,
+    }
+
+
+def run_single(w3, contract, sender, hashes: list) -> dict:
+    gas, latencies = [], []
+    started = time.perf_counter()
+    for h in hashes:
+        sent = time.perf_counter()
+        if not contract.functions.verifyCert(h).call():
+            tx = contract.functions.addCert(h).transact({"from": sender})
+            gas.append(w3.eth.wait_for_transaction_receipt(tx)["gasUsed"])
+        latencies.append(time.perf_counter() - sent)
+    return _result("single", len(hashes), gas, latencies, time.perf_counter() - started)
+
+
+def run_pipelined(w3, contract, sender, hashes: list) -> dict:
+    started = time.perf_counter()
+    sent = []
+    for h in hashes:
+        sent.append((time.perf_counter(), contract.functions.addCert(h).transact({"from": sender})))
+    gas, latencies = [], []
+    for sent_at, tx in sent:
+        gas.append(w3.eth.wait_for_transaction_receipt(tx)["gasUsed"])
+        latencies.append(time.perf_counter() - sent_at)
+    return _result("pipelined", len(hashes), gas, latencies, time.perf_counter() - started)
+
+
+def run_batch(w3, contract, sender, hashes: list, size: int) -> dict:
+    gas, latencies = [], []
+    started = time.perf_counter()
+    for i in range(0, len(hashes), size):
+        sent = time.perf_counter()
+        tx = contract.functions.addCerts(hashes[i:i + size]).transact({"from": sender})
+        gas.append(w3.eth.wait_for_transaction_receipt(tx)["gasUsed"])
+        latencies.append(time.perf_counter() - sent)
+    return _result(f"batch:{size}", len(hashes), gas, latencies, time.perf_counter() - started)
+
+
+def recommend(gas_used: int, margin: float) -> int:
+    # Round up to a whole thousand so the setting reads cleanly
+    return int(math.ceil(gas_used * margin / 1000.0) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hashes", type=int, default=200, help="hashes anchored per strategy")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--margin", type=float, default=1.2, help="safety factor on the largest gas used")
+    parser.add_argument("--gas-price-gwei", type=float, default=20.0, help="only used to show the cost per hash")
+    parser.add_argument("--artifact", help="precompiled contract JSON with 'abi' and 'bin' (skips solc)")
+    args = parser.parse_args()
+
+    abi, bytecode = load_contract(args.artifact)
+    w3 = Web3(EthereumTesterProvider())
+    sender = w3.eth.accounts[0]
+    tx = w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact({"from": sender})
+    receipt = w3.eth.wait_for_transaction_receipt(tx)
+    contract = w3.eth.contract(address=receipt["contractAddress"], abi=abi)
+    print(f"CertRegistry deployed with {receipt['gasUsed']} gas\n")
+
+    source = HashSource()
+    results = [
+        run_single(w3, contract, sender, source.take(args.hashes)),
+        run_pipelined(w3, contract, sender, source.take(args.hashes)),
+    ]
+    if any(item.get("name") == "addCerts" for item in abi):
+        results += [run_batch(w3, contract, sender, source.take(args.hashes), n) for n in args.batch_sizes]
+    else:
+        print("contract has no addCerts; skipping batch strategies\n")
+
+    # Re-anchoring an existing hash and revoking, for the other transactions the API sends
+    known = source.take(1)[0]
+    contract.functions.addCert(known).transact({"from": sender})
+    readd_gas = w3.eth.wait_for_transaction_receipt(contract.functions.addCert(known).transact({"from": sender}))["gasUsed"]
+    revoke_gas = w3.eth.wait_for_transaction_receipt(contract.functions.revokeCert(known).transact({"from": sender}))["gasUsed"]
+
+    gwei_per_gas = args.gas_price_gwei * 1e-9
+    print(f"{'strategy':<11}{'txs':>6}{'gas/hash':>10}{'max gas/tx':>12}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'hashes/s':>10}{'ETH/hash':>12}")
+    for r in results:
+        print(f"{r['strategy']:<11}{r['transactions']:>6}{r['gas_per_hash']:>10.0f}{r['max_gas_per_tx']:>12}"
+              f"{r['latency_ms_median']:>9.2f}{r['latency_ms_p95']:>9.2f}{r['hashes_per_second']:>10.1f}"
+              f"{r['gas_per_hash'] * gwei_per_gas:>12.6f}")
+    print(f"\naddCert of an already anchored hash: {readd_gas} gas; revokeCert: {revoke_gas} gas")
+
+    single_max = max(r["max_gas_per_tx"] for r in results if r["strategy"] in ("single", "pipelined"))
+    print("\nRecommended settings (largest gas used x {:.2f}):".format(args.margin))
+    print(f"  ANCHOR_GAS_LIMIT={recommend(single_max, args.margin)}   # addCert, was a hardcoded 200000")
+    print(f"  REVOKE_GAS_LIMIT={recommend(revoke_gas, args.margin)}")
+    for r in results:
+        if r["strategy"].startswith("batch:"):
+            print(f"  addCerts x{r['strategy'][6:]}: gas limit {recommend(r['max_gas_per_tx'], args.margin)}")
+    print("  ANCHOR_GAS_PRICE_GWEI=0   # use the node's fee suggestion instead of a fixed 20 gwei")
+
+
+if __name__ == "__main__":
+    main()
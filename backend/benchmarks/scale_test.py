@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Scale test of /verify, /certificates and issuer listings at growing dataset sizes.
+
+For each size (default 100k, 1M and 10M certificates) the scratch database
+is topped up with benchmarks/synthetic_data.py, a real uvicorn worker is
+started against it and every scenario is driven for --requests requests
+with --concurrency clients:
+
+    verify            POST /verify with hashes sampled from the collection
+    certificates      GET /certificates (the full, unpaginated listing)
+    issuer_first      GET /issuers/<issuer>/certificates, first page + summary
+    issuer_page       the same listing, following next_cursor a few pages in
+
+It reports latency percentiles and error counts per scenario, plus memory:
+API worker RSS (current and peak), and MongoDB data, storage and index size
+and WiredTiger cache use. Requests time out after --timeout seconds and count
+as errors, so the point where a scenario breaks shows up in the table rather
+than stalling the run. --json writes every measurement for plotting the
+latency curves.
+
+Needs a real MongoDB at MONGO_URI; data goes to DB_NAME (default
+cert_scale_test), which is kept between runs so larger sizes only load the
+difference (--drop starts over). Rate limits are disabled for the API
+worker and blockchain checks are bypassed, so only the API and MongoDB are
+measured.
+
+Usage (from the backend directory):
+    python benchmarks/scale_test.py [--sizes 100000 1000000 10000000] [--requests 500] [--concurrency 8]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("DB_NAME", "cert_scale_test")
+
+from auth import create_access_token, get_user
+from repositories import get_repository
+from benchmarks.synthetic_data import CertificateGenerator, bulk_load, issuers
+from utils import certificates_write, get_db, hash_from_db
+
+ADMIN_USER = "scale-admin"
+# Environment of the API worker under test
+SERVER_ENV = {
+    "BLOCKCHAIN_BYPASS": "true",
+    "RATE_LIMIT_VERIFY_IP": "",
+    "RATE_LIMIT_VERIFY_USER": "",
+    "MAX_INFLIGHT_VERIFY": "100000",
+    "ARCHIVE_AFTER_YEARS": "0",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(samples: list, q: float) -> float:
+    return samples[max(0, int(round(len(samples) * q)) - 1)]
+
+
+def top_up(generator: CertificateGenerator, size: int) -> None:
+    present = certificates_write.estimated_document_count()
+    if present >= size:
+        return
+    generator.skip(present - generator.generated)
+    print(f"loading {size - present} certificates ({present} present)")
+    bulk_load(generator, size - present)
+
+
+def ensure_user(username: str, role: str) -> str:
+    if get_user(username) is None:
+        # Tokens are minted directly, so the password hash is never checked
+        get_repository().insert_user({
+            "username": username,
+            "email": f"{username}@example.edu",
+            "hashed_password": "!",
+            "role": role,
+            "created_at": datetime.utcnow(),
+            "is_active": True,
+        })
+    return create_access_token({"sub": username, "role": role})
+
+
+def memory(pid: int) -> dict:
+    stats = get_db().command("collStats", "certificates")
+    server = get_db().client.admin.command("serverStatus")
+    result = {
+        "mongo_data_mb": stats["size"] / 2**20,
+        "mongo_storage_mb": stats["storageSize"] / 2**20,
+        "mongo_index_mb": stats["totalIndexSize"] / 2**20,
+        "mongo_cache_mb": server.get("wiredTiger", {}).get("cache", {}).get("bytes currently in the cache", 0) / 2**20,
+    }
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        result["api_rss_mb"] = int(fields["VmRSS"].split()[0]) / 1024
+        result["api_peak_rss_mb"] = int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError):
+        pass  # not Linux
+    return result
+
+
+class Api:
+    def __init__(self, base_url: str, token: str, timeout: float) -> None:
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: dict = None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=self.headers, method=method)
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+
+def start_server(port: int, timeout: float) -> subprocess.Popen:
+    env = {**os.environ, **SERVER_ENV}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise TimeoutError("API worker did not become ready")
+
+
+def run_scenario(name: str, call, requests: int, concurrency: int) -> dict:
+    def timed(i: int):
+        started = time.perf_counter()
+        try:
+            call(i)
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, f"{type(e).__name__}: {e}"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+    ok = sorted(t * 1000 for t, error in results if error is None)
+    errors = [error for _, error in results if error is not None]
+    return {
+        "scenario": name,
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": statistics.median(ok) if ok else None,
+        "p95_ms": _percentile(ok, 0.95) if ok else None,
+        "p99_ms": _percentile(ok, 0.99) if ok else None,
+        "max_ms": ok[-1] if ok else None,
+        "rps": requests / elapsed,
+    }
+
+
+def scenarios(api: Api, hashes: list, issuer_names: list, args) -> list:
+    rng = random.Random(args.seed)
+
+    def verify(i):
+        api.request("POST", "/verify", {"hash": hashes[i % len(hashes)]})
+
+    def listing(i):
+        api.request("GET", "/certificates")
+
+    def issuer_first(i):
+        api.request("GET", f"/issuers/{rng.choice(issuer_names)}/certificates?limit=50")
+
+    def issuer_page(i):
+        path = f"/issuers/{rng.choice(issuer_names)}/certificates?limit=50&include_summary=false"
+        page = api.request("GET", path)
+        for _ in range(args.pages - 1):
+            if not page.get("next_cursor"):
+                break
+            page = api.request("GET", f"{path}&cursor={page['next_cursor']}")
+
+    return [
+        ("verify", verify, args.requests),
+        ("certificates", listing, max(1, args.requests // 50)),
+        ("issuer_first", issuer_first, args.requests),
+        ("issuer_page", issuer_page, max(1, args.requests // 5)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario (fewer for the full listing)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=5, help="pages followed by issuer_page")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--drop", action="store_true", help="drop the scratch database first")
+    parser.add_argument("--json", help="write all results to this file")
+    args = parser.parse_args()
+
+    if args.drop:
+        get_db().client.drop_database(get_db().name)
+    generator = CertificateGenerator(seed=args.seed)
+    issuer_names = issuers(generator)
+    token = ensure_user(ADMIN_USER, "admin")
+    report = []
+
+    for size in sorted(args.sizes):
+        top_up(generator, size)
+        sample = certificates_write.aggregate([{"$sample": {"size": 2000}}, {"$project": {"_id": 0, "hash": 1}}])
+        hashes = [hash_from_db(doc["hash"]) for doc in sample]
+
+        port = _free_port()
+        proc = start_server(port, args.timeout)
+        try:
+            api = Api(f"http://127.0.0.1:{port}", token, args.timeout)
+            print(f"\n{size} certificates")
+            print(f"{'scenario':<14}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>9}")
+            for name, call, requests in scenarios(api, hashes, issuer_names, args):
+                result = run_scenario(name, call, requests, args.concurrency)
+                result.update(size=size, **memory(proc.pid))
+                report.append(result)
+                cells = [f"{result[k]:>10.1f}" if result[k] is not None else f"{'-':>10}"
+                         for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+                print(f"{name:<14}{requests:>6}{result['errors']:>8}{''.join(cells)}{result['rps']:>9.1f}")
+                if result["first_error"]:
+                    print(f"  first error: {result['first_error'][:160]}")
+            mem = memory(proc.pid)
+            print("memory: " + ", ".join(f"{k} {v:.0f}" for k, v in mem.items()))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
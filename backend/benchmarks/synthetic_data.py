@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Synthetic certificate dataset generator and bulk loader.
+
+Produces ``CertificateIssueRequest`` payloads with a configurable shape:
+
+    institutions  how many, with Zipf-distributed sizes (--institution-skew)
+    degrees       from a fixed catalogue, a few programmes dominating
+    years         --first-year..--last-year, cohorts growing by --year-growth
+                  per year so recent years hold most records
+    duplicates    --duplicate-rate of the payloads repeat an earlier one
+                  verbatim (re-issued certificates: same hash, new document)
+
+Every institution issues through its own issuer account (``issuer-<n>``).
+Records are built with ``utils.build_certificate_record``, i.e. the exact
+hashing rules of ``save_certificate``, and inserted in bulk with a
+``created_at`` spread over the graduation year. Generation is seeded, so
+the same arguments always produce the same dataset; loading resumes from
+the number of certificates already present.
+
+Usage (from the backend directory; writes to DB_NAME at MONGO_URI):
+    python benchmarks/synthetic_data.py --count 100000 [--seed 7] [--duplicate-rate 0.01]
+    python benchmarks/synthetic_data.py --count 5 --print   # show payloads only
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.certificate import CertificateIssueRequest
+
+FIRST_NAMES = [
+    "Ada", "Chinedu", "Ngozi", "Emeka", "Aisha", "Tunde", "Funmilayo", "Ibrahim", "Zainab", "Olumide",
+    "Chiamaka", "Yusuf", "Kemi", "Obinna", "Halima", "Segun", "Amaka", "Musa", "Bisi", "Ifeanyi",
+    "Fatima", "Kunle", "Nneka", "Abdullahi", "Tolu", "Uche", "Hauwa", "Dapo", "Ebere", "Sani",
+]
+LAST_NAMES = [
+    "Okafor", "Adeyemi", "Bello", "Eze", "Ogunleye", "Abubakar", "Nwosu", "Balogun", "Musa", "Okonkwo",
+    "Adebayo", "Ibrahim", "Chukwu", "Afolabi", "Danjuma", "Obi", "Lawal", "Nnamdi", "Oyelaran", "Usman",
+]
+STATES = [
+    "Abia", "Adamawa", "Akwa Ibom", "Anambra", "Bauchi", "Bayelsa", "Benue", "Borno", "Cross River",
+    "Delta", "Ebonyi", "Edo", "Ekiti", "Enugu", "FCT", "Gombe", "Imo", "Jigawa", "Kaduna", "Kano",
+    "Katsina", "Kebbi", "Kogi", "Kwara", "Lagos", "Nasarawa", "Niger", "Ogun", "Ondo", "Osun", "Oyo",
+    "Plateau", "Rivers", "Sokoto", "Taraba", "Yobe", "Zamfara",
+]
+# (degree, department code, relative weight)
+DEGREES = [
+    ("B.Sc. Computer Science", "CSC", 12), ("B.Sc. Accounting", "ACC", 10), ("B.Sc. Economics", "ECO", 8),
+    ("B.Eng. Electrical Engineering", "EEE", 7), ("B.Eng. Civil Engineering", "CVE", 6),
+    ("B.Eng. Mechanical Engineering", "MEE", 6), ("MBBS Medicine and Surgery", "MED", 5),
+    ("LL.B. Law", "LAW", 5), ("B.Sc. Microbiology", "MCB", 5), ("B.A. English", "ENG", 4),
+    ("B.Sc. Mass Communication", "MAC", 4), ("B.Pharm. Pharmacy", "PHA", 3), ("B.Sc. Biochemistry", "BCH", 3),
+    ("B.Sc. Political Science", "POL", 3), ("B.Arch. Architecture", "ARC", 2), ("B.A. History", "HIS", 2),
+    ("M.Sc. Computer Science", "CSC", 2), ("MBA Business Administration", "MBA", 2), ("Ph.D. Physics", "PHY", 1),
+]
+INSTITUTION_KINDS = ["University of", "Federal University of Technology,", "State University,", "Polytechnic,"]
+TOWNS = [
+    "Lagos", "Ibadan", "Nsukka", "Zaria", "Ife", "Benin", "Ilorin", "Jos", "Calabar", "Port Harcourt",
+    "Maiduguri", "Sokoto", "Akure", "Owerri", "Minna", "Abeokuta", "Uyo", "Makurdi", "Kano", "Enugu",
+]
+# (class of degree, upper bound of the CGPA band, relative weight)
+HONOURS = [("Third Class", 2.39, 10), ("Second Class Lower", 3.49, 40), ("Second Class Upper", 4.49, 40),
+           ("First Class", 5.0, 10)]
+HONOURS_FLOOR = {"Third Class": 1.5, "Second Class Lower": 2.4, "Second Class Upper": 3.5, "First Class": 4.5}
+
+
+class _Weighted:
+    """O(log n) sampling from a fixed weighted population."""
+
+    def __init__(self, items: list, weights: list) -> None:
+        self.items = items
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def pick(self, rng: random.Random):
+        return self.items[bisect.bisect(self.cumulative, rng.random() * self.cumulative[-1])]
+
+
+class CertificateGenerator:
+    """Deterministic stream of realistic ``CertificateIssueRequest`` payloads."""
+
+    def __init__(
+        self,
+        seed: int = 7,
+        institutions: int = 120,
+        institution_skew: float = 1.1,
+        first_year: int = 1980,
+        last_year: int = datetime.utcnow().year,
+        year_growth: float = 0.06,
+        duplicate_rate: float = 0.01,
+    ) -> None:
+        self.rng = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        names = []
+        for i in range(institutions):
+            kind = INSTITUTION_KINDS[i % len(INSTITUTION_KINDS)]
+            town = TOWNS[i % len(TOWNS)]
+            campus = f" {i // len(TOWNS) + 1}" if i >= len(TOWNS) else ""
+            names.append(f"{kind} {town}{campus}")
+        self.institutions = _Weighted(list(enumerate(names)), [1 / (rank + 1) ** institution_skew for rank in range(institutions)])
+        self.degrees = _Weighted(DEGREES, [w for _, _, w in DEGREES])
+        years = list(range(first_year, last_year + 1))
+        self.years = _Weighted(years, [(1 + year_growth) ** (y - first_year) for y in years])
+        self.honours = _Weighted(HONOURS, [w for _, _, w in HONOURS])
+        # Earlier payloads that may be re-issued; a bounded reservoir keeps memory flat
+        self._issued: list = []
+        self._reservoir = 10000
+        # Payloads produced so far (the stream position)
+        self.generated = 0
+
+    def _fresh(self) -> dict:
+        rng = self.rng
+        index, institution = self.institutions.pick(rng)
+        degree, department, _ = self.degrees.pick(rng)
+        year = self.years.pick(rng)
+        honours, ceiling, _ = self.honours.pick(rng)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        serial = self.generated
+        payload = {
+            "student_name": f"{first} {last}",
+            "institution": institution,
+            "degree": degree,
+            "graduation_year": year,
+            "cgpa": round(rng.uniform(HONOURS_FLOOR[honours], ceiling), 2),
+            # The serial keeps registration numbers (and hashes) unique
+            "reg_number": f"{department}/{(year - 4) % 100:02d}/{serial:07d}",
+            "honours": honours,
+        }
+        if rng.random() < 0.7:
+            payload["student_email"] = f"{first}.{last}.{serial}@example.edu".lower()
+        if rng.random() < 0.8:
+            payload["state_of_origin"] = rng.choice(STATES)
+        # Validate through the API model so payloads are exactly what /issue accepts
+        payload = CertificateIssueRequest(**payload).model_dump(exclude_none=True)
+        return {**payload, "issued_by": f"issuer-{index}", "issuer_email": f"registry{index}@example.edu"}
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict:
+        rng = self.rng
+        if self._issued and rng.random() < self.duplicate_rate:
+            payload = rng.choice(self._issued)
+        else:
+            payload = self._fresh()
+            if len(self._issued) < self._reservoir:
+                self._issued.append(payload)
+            else:
+                self._issued[rng.randrange(self._reservoir)] = payload
+        self.generated += 1
+        return payload
+
+    def skip(self, count: int) -> None:
+        """Advance the stream without building records (to resume a load)."""
+        for _ in range(count):
+            next(self)
+
+
+def issuers(generator: CertificateGenerator) -> list:
+    return [f"issuer-{index}" for index, _ in generator.institutions.items]
+
+
+def bulk_load(generator: CertificateGenerator, count: int, batch_size: int = 5000, progress: bool = True) -> int:
+    """Insert ``count`` certificates from ``generator``. Returns how many were inserted."""
+    from utils import build_certificate_record, certificates_write, ensure_indexes, hash_to_db
+
+    rng = random.Random(generator.rng.random())
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < count:
+        docs = []
+        for payload in itertools.islice(generator, min(batch_size, count - inserted)):
+            # Issued some time in the graduation year, as a backfill would record it
+            created_at = datetime(payload["graduation_year"], 1, 1) + timedelta(seconds=rng.randrange(365 * 86400))
+            record = build_certificate_record(payload, created_at=min(created_at, datetime.utcnow()))
+            docs.append({**record, "hash": hash_to_db(record["hash"])})
+        certificates_write.insert_many(docs, ordered=False)
+        inserted += len(docs)
+        if progress:
+            rate = inserted / (time.perf_counter() - started)
+            print(f"  loaded {inserted}/{count} ({rate:.0f} docs/s)", end="\r", flush=True)
+    if progress:
+        print()
+    ensure_indexes()
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, required=True, help="total certificates wanted in the collection")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--institutions", type=int, default=120)
+    parser.add_argument("--institution-skew", type=float, default=1.1, help="Zipf exponent of institution sizes")
+    parser.add_argument("--first-year", type=int, default=1980)
+    parser.add_argument("--last-year", type=int, default=datetime.utcnow().year)
+    parser.add_argument("--year-growth", type=float, default=0.06, help="yearly growth of cohort sizes")
+    parser.add_argument("--duplicate-rate", type=float, default=0.01, help="fraction of re-issued payloads")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--print", action="store_true", help="print payloads as JSON lines instead of loading")
+    args = parser.parse_args()
+
+    generator = CertificateGenerator(
+        seed=args.seed,
+        institutions=args.institutions,
+        institution_skew=args.institution_skew,
+        first_year=args.first_year,
+        last_year=args.last_year,
+        year_growth=args.year_growth,
+        duplicate_rate=args.duplicate_rate,
+    )
+    if args.print:
+        for payload in itertools.islice(generator, args.count):
+            print(json.dumps(payload))
+        return
+
+    from utils import certificates_write
+
+    present = certificates_write.estimated_document_count()
+    if present >= args.count:
+        print(f"{present} certificates present, nothing to load")
+        return
+    generator.skip(present)
+    print(f"{present} certificates present, loading {args.count - present}")
+    bulk_load(generator, args.count - present, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
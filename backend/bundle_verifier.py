@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Offline verifier for signed certificate bundles.
+
+A bundle is produced by ``GET /certificates/{hash}/bundle``. It holds the
+canonical certificate fields, their SHA-256 hash, anchoring metadata and an
+Ed25519 signature by the API's bundle key. This module only depends on the
+standard library and ``cryptography`` so relying parties can copy it and
+verify bundles without any network access.
+
+Usage:
+    python bundle_verifier.py bundle.json --public-key bundle_key.pem
+    python bundle_verifier.py bundle.json --public-key <base64 raw key>
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import sys
+from typing import Any, Dict, List
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+BUNDLE_VERSION = 1
+
+
+def canonical_json(data: Any) -> bytes:
+    """Serialise exactly like the server does before hashing and signing."""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def signing_payload(bundle: Dict[str, Any]) -> bytes:
+    """Bytes covered by the signature: every bundle field except the signature."""
+    return canonical_json({k: v for k, v in bundle.items() if k != "signature"})
+
+
+def key_id(public_key: Ed25519PublicKey) -> str:
+    raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def load_public_key(value: str) -> Ed25519PublicKey:
+    """Load a public key from PEM text, a PEM file path or base64 raw bytes."""
+    if "BEGIN PUBLIC KEY" not in value:
+        try:
+            with open(value, "rb") as f:
+                value = f.read().decode()
+        except OSError:
+            return Ed25519PublicKey.from_public_bytes(base64.b64decode(value))
+    key = serialization.load_pem_public_key(value.encode())
+    if not isinstance(key, Ed25519PublicKey):
+        raise ValueError("public key is not an Ed25519 key")
+    return key
+
+
+def verify_bundle(bundle: Dict[str, Any], public_key: Ed25519PublicKey) -> List[str]:
+    """Return a list of problems with the bundle; an empty list means valid."""
+    problems = []
+    if bundle.get("version") != BUNDLE_VERSION:
+        problems.append(f"unsupported bundle version {bundle.get('version')!r}")
+        return problems
+
+    certificate = bundle.get("certificate") or {}
+    expected_hash = hashlib.sha256(canonical_json(certificate)).hexdigest()
+    if bundle.get("hash") != expected_hash:
+        problems.append("certificate fields do not match the bundle hash")
+
+    if bundle.get("key_id") != key_id(public_key):
+        problems.append("bundle was signed with a different key")
+
+    try:
+        public_key.verify(base64.b64decode(bundle.get("signature", "")), signing_payload(bundle))
+    except (InvalidSignature, ValueError):
+        problems.append("invalid signature")
+
+    if not bundle.get("anchoring", {}).get("anchored_on_chain"):
+        problems.append("certificate was not anchored on chain when the bundle was signed")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verify a signed certificate bundle offline.")
+    parser.add_argument("bundle", help="Path to the bundle JSON file ('-' for stdin)")
+    parser.add_argument("--public-key", required=True, help="PEM file, PEM text or base64 raw Ed25519 key")
+    args = parser.parse_args()
+
+    if args.bundle == "-":
+        bundle = json.load(sys.stdin)
+    else:
+        with open(args.bundle, encoding="utf-8") as f:
+            bundle = json.load(f)
+
+    problems = verify_bundle(bundle, load_public_key(args.public_key))
+    if problems:
+        print(f"INVALID: {'; '.join(problems)}")
+        return 1
+    cert = bundle["certificate"]
+    print(f"VALID: {cert.get('student_name')} - {cert.get('degree')}, {cert.get('institution')} ({bundle['hash']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
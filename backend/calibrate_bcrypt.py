@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Measure bcrypt hash times on this machine and recommend BCRYPT_ROUNDS.
+
+Prints the time of one hash (and so of one login) at each cost around the
+target, with the login throughput a single core sustains, and the cost that
+BCRYPT_ROUNDS=auto would pick. Run it on the production hardware; pin the
+result in BCRYPT_ROUNDS to keep the cost stable across restarts.
+
+Usage (from the backend directory):
+    python calibrate_bcrypt.py [--target-ms 250] [--min-rounds 10]
+"""
+
+import argparse
+
+from config import BCRYPT_MIN_ROUNDS, BCRYPT_TARGET_MS
+from services.password_service import MAX_ROUNDS, MIN_ROUNDS, calibrate_rounds, measure_hash_seconds
+
+
+def report(target_ms: float, min_rounds: int) -> int:
+    rounds = calibrate_rounds(target_ms, min_rounds)
+    print(f"{'cost':>4}{'hash ms':>10}{'logins/s/core':>15}")
+    for cost in range(max(MIN_ROUNDS, rounds - 2), min(MAX_ROUNDS, rounds + 2) + 1):
+        seconds = measure_hash_seconds(cost, samples=2)
+        marker = "  <- recommended" if cost == rounds else ""
+        print(f"{cost:>4}{seconds * 1000:>10.1f}{1 / seconds:>15.1f}{marker}")
+    print(f"BCRYPT_ROUNDS={rounds} (target {target_ms:.0f} ms, minimum cost {min_rounds})")
+    return rounds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS, help="hash time to aim for")
+    parser.add_argument("--min-rounds", type=int, default=BCRYPT_MIN_ROUNDS, help="lowest acceptable cost")
+    args = parser.parse_args()
+    report(args.target_ms, args.min_rounds)
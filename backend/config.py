@@ -5,8 +5,186 @@ import os
 # Database
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "cert_verification")
+# Storage engine (see repositories/): mongo, or sqlite for a single node
+# without a Mongo server (small installs, edge nodes, tests)
+DB_BACKEND = os.getenv("DB_BACKEND", "mongo")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "cert_verification.db")
+# How long a SQLite write waits for another process's write to finish
+SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "5"))
 
 # Blockchain
 BLOCKCHAIN_NODE = os.getenv("BLOCKCHAIN_NODE", "http://localhost:8545")
+# Comma-separated RPC endpoints to fail over between (defaults to BLOCKCHAIN_NODE)
+BLOCKCHAIN_NODES = [url.strip() for url in os.getenv("BLOCKCHAIN_NODES", BLOCKCHAIN_NODE).split(",") if url.strip()]
 # Set to your deployed smart contract address (0x...) or leave empty to disable on-chain operations
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS", "")
+
+# Public verification caching (seconds). A cached "valid" answer can outlive a
+# revocation by up to PUBLIC_VERIFY_VALID_MAX_AGE, so it bounds how long a
+# revocation takes to reach relying parties; revoked answers never change.
+PUBLIC_VERIFY_VALID_MAX_AGE = int(os.getenv("PUBLIC_VERIFY_VALID_MAX_AGE", "300"))
+PUBLIC_VERIFY_REVOKED_MAX_AGE = int(os.getenv("PUBLIC_VERIFY_REVOKED_MAX_AGE", "86400"))
+PUBLIC_VERIFY_INVALID_MAX_AGE = int(os.getenv("PUBLIC_VERIFY_INVALID_MAX_AGE", "60"))
+
+# Ed25519 key (PKCS8 PEM file) used to sign offline verification bundles.
+# Leave empty to use an ephemeral key (bundles stop verifying after restart);
+# required with WEB_CONCURRENCY > 1 unless started through gunicorn.conf.py.
+BUNDLE_SIGNING_KEY_FILE = os.getenv("BUNDLE_SIGNING_KEY_FILE", "")
+
+# How often each worker pulls new revocations into its in-memory set (seconds)
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+# Largest clock difference expected between API servers. revoked_at comes
+# from the revoking server's clock, so each refresh re-reads revocations
+# stamped up to this much (plus one refresh interval) before the newest seen.
+REVOCATION_CLOCK_SKEW_SECONDS = float(os.getenv("REVOCATION_CLOCK_SKEW_SECONDS", "60"))
+
+# Snapshot of valid certificate hashes written by export_snapshot.py and
+# served by edge_verifier.py
+HASH_SNAPSHOT_PATH = os.getenv("HASH_SNAPSHOT_PATH", "hash_snapshot.bin")
+# How often an edge verifier checks for a new snapshot file (seconds)
+HASH_SNAPSHOT_POLL_SECONDS = float(os.getenv("HASH_SNAPSHOT_POLL_SECONDS", "5"))
+
+# Rate limiting: token buckets written as "<requests>/<seconds>" per route
+# class and key type. Empty string disables that bucket.
+RATE_LIMITS = {
+    "login": {
+        "ip": os.getenv("RATE_LIMIT_LOGIN_IP", "20/60"),
+        "user": os.getenv("RATE_LIMIT_LOGIN_USER", "5/60"),
+    },
+    "verify": {
+        "ip": os.getenv("RATE_LIMIT_VERIFY_IP", "120/60"),
+        "user": os.getenv("RATE_LIMIT_VERIFY_USER", "300/60"),
+    },
+}
+# Requests of a route class allowed in flight per worker before shedding with 503
+MAX_INFLIGHT = {
+    "login": int(os.getenv("MAX_INFLIGHT_LOGIN", "8")),
+    "verify": int(os.getenv("MAX_INFLIGHT_VERIFY", "64")),
+}
+# Optional shared bucket store for multi-worker deployments (redis://...)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+# Take the client IP from X-Forwarded-For (only behind trusted proxies). Each
+# proxy appends the address it received from, so the client is the entry
+# TRUSTED_PROXY_COUNT from the right; anything left of it is client-supplied.
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() == "true"
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
+
+# bcrypt cost of password hashes (4-31), or "auto" to pick the highest cost
+# hashing within BCRYPT_TARGET_MS on this machine (calibrate_bcrypt.py shows
+# the timings). Stored hashes with another cost are re-hashed at login; with
+# "auto" only those below BCRYPT_MIN_ROUNDS are, since hosts may pick differently.
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS", "12")
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+# "auto" never goes below this cost, however slow the machine, and upgrades
+# stored hashes below it
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+
+# Idempotency-Key support for POST /issue
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a concurrent duplicate waits for the original request to finish
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# An in-progress key older than this is assumed abandoned (worker crash) and taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+
+# Certificate status events (GET /issuers/{username}/events): retention,
+# how often an open stream checks for new events, and idle keepalive interval
+EVENT_TTL_SECONDS = int(os.getenv("EVENT_TTL_SECONDS", "86400"))
+EVENT_STREAM_POLL_SECONDS = float(os.getenv("EVENT_STREAM_POLL_SECONDS", "1"))
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Skip on-chain anchoring/verification and report success (development only)
+BLOCKCHAIN_BYPASS = os.getenv("BLOCKCHAIN_BYPASS", "true").lower() == "true"
+# Per-request HTTP timeout for the RPC node (seconds)
+BLOCKCHAIN_RPC_TIMEOUT = float(os.getenv("BLOCKCHAIN_RPC_TIMEOUT", "5"))
+# Gas limits for addCert/revokeCert transactions; 0 lets the node estimate
+# them. benchmarks/profile_anchoring.py measures and recommends values.
+ANCHOR_GAS_LIMIT = int(os.getenv("ANCHOR_GAS_LIMIT", "0"))
+REVOKE_GAS_LIMIT = int(os.getenv("REVOKE_GAS_LIMIT", "0"))
+# Fixed gas price for those transactions (gwei); 0 uses the node's fee suggestion
+ANCHOR_GAS_PRICE_GWEI = float(os.getenv("ANCHOR_GAS_PRICE_GWEI", "0"))
+# Skip RPC endpoints more than this many blocks behind the highest one seen
+RPC_MAX_BLOCK_LAG = int(os.getenv("RPC_MAX_BLOCK_LAG", "3"))
+# Circuit breaker around each RPC endpoint
+RPC_BREAKER_FAILURE_THRESHOLD = int(os.getenv("RPC_BREAKER_FAILURE_THRESHOLD", "5"))
+RPC_BREAKER_RECOVERY_SECONDS = float(os.getenv("RPC_BREAKER_RECOVERY_SECONDS", "30"))
+
+# Readiness snapshot refresh interval (seconds); the snapshot counts as stale
+# (not ready) after HEALTH_STALE_AFTER_SECONDS without a successful refresh
+HEALTH_REFRESH_SECONDS = float(os.getenv("HEALTH_REFRESH_SECONDS", "10"))
+HEALTH_STALE_AFTER_SECONDS = float(os.getenv("HEALTH_STALE_AFTER_SECONDS", "60"))
+
+# How long Mongo operations wait for a reachable server before failing (ms)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+
+# Production server (gunicorn.conf.py). WEB_CONCURRENCY=0 sizes workers from
+# the CPUs available to the container.
+BIND = os.getenv("BIND", "0.0.0.0:8000")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+GUNICORN_TIMEOUT = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+GUNICORN_GRACEFUL_TIMEOUT = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+GUNICORN_KEEPALIVE = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle a worker after this many requests (0 disables), with random jitter
+GUNICORN_MAX_REQUESTS = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+GUNICORN_MAX_REQUESTS_JITTER = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# Read/write routing. Verification and listing reads may go to secondaries
+# (bounded staleness, >= 90s per MongoDB); issuance and user changes use the
+# write concern below. Clients get read-your-writes by echoing the
+# X-Causal-Token header returned by writes.
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", "90"))
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN", "majority")
+MONGO_WRITE_TIMEOUT_MS = int(os.getenv("MONGO_WRITE_TIMEOUT_MS", "5000"))
+
+# Certificate hashes are stored as 32-byte binary. Keep matching legacy hex
+# strings too until migrate_hashes.py has converted every document.
+HASH_LEGACY_HEX_LOOKUP = os.getenv("HASH_LEGACY_HEX_LOOKUP", "true").lower() == "true"
+
+# Cold tier: certificates that graduated more than ARCHIVE_AFTER_YEARS ago are
+# moved to a compressed archive collection (0 disables archiving)
+ARCHIVE_AFTER_YEARS = int(os.getenv("ARCHIVE_AFTER_YEARS", "0"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+# WiredTiger block compressor for the archive collection (snappy, zlib, zstd)
+ARCHIVE_COMPRESSOR = os.getenv("ARCHIVE_COMPRESSOR", "zstd")
+
+# Request tracing (see tracing.py). Fraction of traces recorded: 0 disables,
+# 1 records every request. Otherwise an incoming traceparent's sampled flag wins.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# file, console, otlp, or "module:factory" for a custom exporter
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "cert-verification-api")
+# Finished spans waiting for export; more are dropped
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+TRACE_EXPORT_INTERVAL_SECONDS = float(os.getenv("TRACE_EXPORT_INTERVAL_SECONDS", "1"))
+
+# Certificate files (PDFs, scans) anchored by PUT /certificates/{hash}/document.
+# Uploads are hashed in DOCUMENT_CHUNK_BYTES pieces as they stream in.
+DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", str(100 * 1024 * 1024)))
+DOCUMENT_CHUNK_BYTES = int(os.getenv("DOCUMENT_CHUNK_BYTES", str(1024 * 1024)))
+DOCUMENT_CONTENT_TYPES = [
+    t.strip() for t in os.getenv(
+        "DOCUMENT_CONTENT_TYPES", "application/pdf,image/png,image/jpeg,image/tiff,application/octet-stream"
+    ).split(",") if t.strip()
+]
+
+# On-demand request profiling (see profiling.py). Off by default; when on,
+# admins profile a request with the X-Profile header or ?profile=1.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Fraction of all requests profiled at random (0 = only on request)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# sampling (low overhead) or deterministic (every call timed, slow)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampling")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+# Oldest profiles are deleted once PROFILE_DIR grows past this
+PROFILE_MAX_TOTAL_MB = float(os.getenv("PROFILE_MAX_TOTAL_MB", "100"))
+
+# Printable certificates (render_certificates.py). The QR code encodes this
+# URL with the certificate hash filled in.
+RENDER_VERIFY_URL = os.getenv("RENDER_VERIFY_URL", "http://localhost:8000/public/verify/{hash}")
+# Rendering processes (0 = one per CPU) and certificates per task
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0"))
+RENDER_CHUNK_SIZE = int(os.getenv("RENDER_CHUNK_SIZE", "100"))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Read-only edge verifier backed by a memory-mapped hash snapshot.
+
+Answers ``GET /public/verify/{hash}`` from the snapshot that
+export_snapshot.py writes: a binary search over a memory-mapped file, with no
+database, blockchain or authentication in the path. The file at
+HASH_SNAPSHOT_PATH is checked every HASH_SNAPSHOT_POLL_SECONDS and a replaced
+file is swapped in without a restart, so many cheap replicas can run close
+to users, each fed by copying new snapshots next to it.
+
+A hash is "valid" if its certificate was issued, anchored on chain and not
+revoked when the snapshot was generated, and "not_found" otherwise; the response carries the
+snapshot's generation time so clients can judge its age.
+
+Usage (from the backend directory):
+    HASH_SNAPSHOT_PATH=/srv/hash_snapshot.bin uvicorn edge_verifier:app --workers 4
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from fastapi import FastAPI, HTTPException, status
+
+from config import (
+    HASH_SNAPSHOT_PATH,
+    HASH_SNAPSHOT_POLL_SECONDS,
+    PUBLIC_VERIFY_INVALID_MAX_AGE,
+    PUBLIC_VERIFY_VALID_MAX_AGE,
+)
+from hash_snapshot import LiveSnapshot
+from responses import FastJSONResponse
+
+live_snapshot = LiveSnapshot(HASH_SNAPSHOT_PATH)
+
+
+def _parse_hash(value: str) -> bytes:
+    """32-byte digest of a hex hash (optional 0x prefix), or raise ValueError."""
+    h = value.strip().lower().removeprefix("0x")
+    digest = bytes.fromhex(h) if len(h) == 64 else b""
+    if len(digest) != 32:
+        raise ValueError("hash must be 64 hex characters")
+    return digest
+
+
+def _reload() -> None:
+    try:
+        if live_snapshot.reload():
+            snapshot = live_snapshot.snapshot
+            print(f"Loaded hash snapshot {snapshot.path}: {snapshot.count} hashes generated at {snapshot.generated_at}")
+    except Exception as e:
+        # Keep serving the snapshot already loaded, if any
+        print(f"Warning: could not load hash snapshot {live_snapshot.path}: {e}")
+
+
+async def reload_snapshot_periodically(interval: float) -> None:
+    while True:
+        await asyncio.to_thread(_reload)
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(reload_snapshot_periodically(HASH_SNAPSHOT_POLL_SECONDS))
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+app = FastAPI(
+    title="Certificate Edge Verifier",
+    description="Read-only certificate verification from a hash snapshot",
+    version="2.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
+
+
+@app.get("/public/verify/{cert_hash}", tags=["Public"])
+async def edge_verify_certificate(cert_hash: str):
+    """
+    Verify a certificate hash against the current snapshot
+    """
+    try:
+        digest = _parse_hash(cert_hash)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    snapshot = live_snapshot.snapshot
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No hash snapshot loaded yet"
+        )
+
+    cert_status = "valid" if digest in snapshot else "not_found"
+    if cert_status == "valid":
+        # Bounds the revocation delay on top of the snapshot's own age
+        cache_control = f"public, max-age={PUBLIC_VERIFY_VALID_MAX_AGE}, must-revalidate"
+    else:
+        cache_control = f"public, max-age={PUBLIC_VERIFY_INVALID_MAX_AGE}"
+    response = FastJSONResponse({
+        "hash": digest.hex(),
+        "status": cert_status,
+        "snapshot_generated_at": snapshot.generated_at,
+    })
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness probe: a snapshot is loaded (503 until then), with its size and age"""
+    snapshot = live_snapshot.snapshot
+    if snapshot is None:
+        return FastJSONResponse(
+            {"ready": False, "reason": "no hash snapshot loaded yet"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return FastJSONResponse({
+        "ready": True,
+        "snapshot": {
+            "path": snapshot.path,
+            "hashes": snapshot.count,
+            "generated_at": snapshot.generated_at,
+            "age_seconds": round((datetime.utcnow() - snapshot.generated_at).total_seconds(), 1),
+            "loaded_at": live_snapshot.loaded_at,
+        },
+    })
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Export every valid certificate hash as a snapshot for edge verifiers.
+
+Writes the hashes of all certificates that are anchored on chain and not
+revoked (what /public/verify reports as "valid") to a sorted binary file
+(format in hash_snapshot.py) and renames it into place, so edge_verifier.py
+processes watching the same path switch to it on their next poll. Run it
+periodically (cron, a Kubernetes CronJob) and ship the file to the edge
+nodes; revocations reach them with the next snapshot.
+
+Certificates whose anchoring outcome was never recorded (issued before it
+was) are checked with verifyCert once and the result is stored; while the
+chain is unavailable, or bypassed with BLOCKCHAIN_BYPASS, they are left out.
+
+Usage (from the backend directory):
+    python export_snapshot.py [--out hash_snapshot.bin] [--chunk-size 1000000]
+"""
+
+import argparse
+import os
+import time
+
+from config import BLOCKCHAIN_BYPASS, HASH_SNAPSHOT_PATH
+from hash_snapshot import SORT_CHUNK, write_snapshot
+from repositories import get_repository
+from services.blockchain_service import ChainUnavailableError, verify_certificate_on_chain
+
+
+def export(path: str, chunk_size: int) -> int:
+    repository = get_repository()
+    started = time.monotonic()
+    # Stamped before reading, so the snapshot never claims to be newer than it is
+    generated_at = time.time()
+    # A certificate revoked while it moved between storage tiers can still
+    # have an unrevoked copy in the other one
+    revoked = {bytes.fromhex(cert_hash) for cert_hash, _ in repository.revoked_hashes()}
+    unchecked = 0
+
+    def anchored_hashes():
+        nonlocal unchecked
+        for cert_hash, anchored in repository.valid_hashes():
+            if anchored is None:
+                if BLOCKCHAIN_BYPASS:
+                    # verifyCert is bypassed too and would vouch for anything
+                    unchecked += 1
+                    continue
+                try:
+                    anchored = verify_certificate_on_chain(cert_hash)
+                except ChainUnavailableError:
+                    unchecked += 1
+                    continue
+                repository.mark_anchored(cert_hash, anchored)
+            digest = bytes.fromhex(cert_hash)
+            if anchored and digest not in revoked:
+                yield digest
+
+    count = write_snapshot(path, anchored_hashes(), generated_at=generated_at, chunk_size=chunk_size)
+    size = os.path.getsize(path) / 1024 / 1024
+    print(f"Wrote {count} hash(es) to {path} ({size:.1f} MB) in {time.monotonic() - started:.1f}s")
+    if unchecked:
+        reason = "BLOCKCHAIN_BYPASS is set" if BLOCKCHAIN_BYPASS else "chain unavailable"
+        print(f"Warning: left out {unchecked} certificate(s) whose anchoring could not be checked ({reason})")
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=HASH_SNAPSHOT_PATH, help="snapshot file to (atomically) replace")
+    parser.add_argument("--chunk-size", type=int, default=SORT_CHUNK, help="hashes sorted in memory at once")
+    args = parser.parse_args()
+    export(args.out, args.chunk_size)
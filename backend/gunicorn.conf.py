@@ -0,0 +1,73 @@
+# gunicorn.conf.py - Production server entry point
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# The app is preloaded once in the master (fast forks, shared read-only
+# memory). That is safe because importing main creates no Mongo or Web3
+# clients: each worker builds its own in the app lifespan after the fork,
+# and post_fork drops anything a worker might have inherited anyway.
+
+import math
+import os
+
+from config import (
+    BIND,
+    WEB_CONCURRENCY,
+    GUNICORN_TIMEOUT,
+    GUNICORN_GRACEFUL_TIMEOUT,
+    GUNICORN_KEEPALIVE,
+    GUNICORN_MAX_REQUESTS,
+    GUNICORN_MAX_REQUESTS_JITTER,
+)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring cgroup quotas and CPU affinity."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+bind = BIND
+# Async workers: one per core keeps every core busy without oversubscribing
+workers = WEB_CONCURRENCY or available_cpus()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = GUNICORN_TIMEOUT
+graceful_timeout = GUNICORN_GRACEFUL_TIMEOUT
+keepalive = GUNICORN_KEEPALIVE
+max_requests = GUNICORN_MAX_REQUESTS
+max_requests_jitter = GUNICORN_MAX_REQUESTS_JITTER
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # Resolve BCRYPT_ROUNDS=auto once, before forking, so every worker hashes
+    # with the same cost (per-worker calibration could disagree and make
+    # logins keep re-hashing between costs)
+    from services import bundle_service, password_service
+
+    password_service.get_pwd_context()
+    # Likewise an ephemeral bundle signing key: one for the whole server
+    bundle_service.preload_signing_key()
+
+
+def post_fork(server, worker):
+    from repositories import get_repository
+    from services import blockchain_service
+
+    get_repository().reset_after_fork()
+    blockchain_service.reset_after_fork()
@@ -0,0 +1,200 @@
+"""Sorted, memory-mapped snapshot of valid certificate hashes.
+
+A snapshot is a small fixed header followed by every valid certificate hash
+as a raw 32-byte digest, sorted ascending without duplicates, so a lookup is
+a binary search over a memory-mapped file: no parsing on load, and every
+process mapping the file shares the same page cache.
+
+Layout (little-endian)::
+
+    offset  size    field
+    0       8       magic b"CERTHASH"
+    8       2       format version (1)
+    10      2       record size (32)
+    12      4       reserved (0)
+    16      8       number of hashes
+    24      8       generation time (unix seconds, UTC)
+    32      32 * n  hashes
+
+The header is 32 bytes so records stay aligned. Snapshots are written to a
+temporary file and renamed into place, so readers never see a partial file.
+This module only depends on the standard library so edge nodes can run it
+without the rest of the backend.
+"""
+
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+MAGIC = b"CERTHASH"
+VERSION = 1
+RECORD_SIZE = 32
+HEADER = struct.Struct("<8sHHIQq")
+
+# Hashes sorted in memory at once when writing (32 MB of digests)
+SORT_CHUNK = 1_000_000
+
+
+class SnapshotError(ValueError):
+    """The file is not a readable hash snapshot."""
+
+
+def _read_run(f: BinaryIO) -> Iterator[bytes]:
+    f.seek(0)
+    while True:
+        block = f.read(RECORD_SIZE * 8192)
+        if not block:
+            return
+        for offset in range(0, len(block), RECORD_SIZE):
+            yield block[offset:offset + RECORD_SIZE]
+
+
+def _sorted_unique(hashes: Iterable[bytes], directory: str, chunk_size: int) -> Iterator[bytes]:
+    """Sort any number of digests with bounded memory (external merge sort)."""
+    runs: List[BinaryIO] = []
+    chunk: List[bytes] = []
+    try:
+        for digest in hashes:
+            if len(digest) != RECORD_SIZE:
+                raise ValueError(f"hash must be {RECORD_SIZE} bytes, got {len(digest)}")
+            chunk.append(digest)
+            if len(chunk) >= chunk_size:
+                chunk.sort()
+                run = tempfile.TemporaryFile(dir=directory)
+                run.write(b"".join(chunk))
+                runs.append(run)
+                chunk = []
+        chunk.sort()
+        merged = heapq.merge(chunk, *(_read_run(run) for run in runs)) if runs else iter(chunk)
+        previous = None
+        for digest in merged:
+            if digest != previous:
+                yield digest
+                previous = digest
+    finally:
+        for run in runs:
+            run.close()
+
+
+def write_snapshot(
+    path: str,
+    hashes: Iterable[bytes],
+    generated_at: Optional[float] = None,
+    chunk_size: int = SORT_CHUNK,
+) -> int:
+    """Write ``hashes`` (32-byte digests, any order, duplicates allowed) as a
+    snapshot at ``path``, replacing it atomically. Returns the number written."""
+    directory = os.path.dirname(os.path.abspath(path))
+    generated_at = int(time.time() if generated_at is None else generated_at)
+    handle, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, 0, generated_at))
+            count = 0
+            batch: List[bytes] = []
+            for digest in _sorted_unique(hashes, directory, chunk_size):
+                batch.append(digest)
+                if len(batch) == 8192:
+                    f.write(b"".join(batch))
+                    count += len(batch)
+                    batch = []
+            f.write(b"".join(batch))
+            count += len(batch)
+            # The count goes in last, once every record is on disk
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, count, generated_at))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+class HashSnapshot:
+    """A snapshot file mapped read-only into memory."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise SnapshotError(f"{path}: too short for a snapshot header")
+            magic, version, record_size, _, count, generated_at = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise SnapshotError(f"{path}: not a hash snapshot")
+            if version != VERSION or record_size != RECORD_SIZE:
+                raise SnapshotError(f"{path}: unsupported snapshot version {version} (record size {record_size})")
+            if stat.st_size != HEADER.size + count * RECORD_SIZE:
+                raise SnapshotError(f"{path}: size does not match {count} hashes (truncated?)")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._map, "madvise"):
+            # Lookups jump around the file; read-ahead would only waste cache
+            self._map.madvise(mmap.MADV_RANDOM)
+        self.path = path
+        self.count = count
+        self.generated_at = datetime.utcfromtimestamp(generated_at)
+        # Identifies this file version; a renamed-in replacement differs
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, digest: bytes) -> bool:
+        data = self._map
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER.size + mid * RECORD_SIZE
+            record = data[offset:offset + RECORD_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class LiveSnapshot:
+    """The latest snapshot at ``path``, swapped in when the file is replaced.
+
+    Lookups running during a swap finish on the old mapping, which is
+    unmapped once nothing references it. A file that fails to load leaves the
+    current snapshot in place and is not retried until it changes again.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.snapshot: Optional[HashSnapshot] = None
+        self.loaded_at: Optional[datetime] = None
+        self._rejected: Optional[tuple] = None
+
+    def reload(self) -> bool:
+        """Load the file at ``path`` if it changed. Returns whether a new snapshot is in use."""
+        stat = os.stat(self.path)
+        identity = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        current = self.snapshot
+        if identity == self._rejected or (current is not None and current.identity == identity):
+            return False
+        try:
+            snapshot = HashSnapshot(self.path)
+        except SnapshotError:
+            self._rejected = identity
+            raise
+        self.snapshot = snapshot
+        self.loaded_at = datetime.utcnow()
+        return True
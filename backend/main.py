@@ -1,27 +1,104 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Depends, status
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, BackgroundTasks, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from routes.auth_routes import router as auth_router
-from models.certificate import CertificateIssueRequest, IssueResponse, CertificateRecord
+from routes.issuer_routes import router as issuer_router
+from routes.public_routes import router as public_router
+from routes.document_routes import router as document_router
+from models.certificate import (
+    CertificateIssueRequest, IssueResponse, CertificateRecord, RevokeRequest, RevokeResponse
+)
 from models.user import UserResponse
 from auth import get_current_active_user, issuer_required
-from utils import save_certificate, verify_certificate, generate_hash
-from services.blockchain_service import (
-    store_certificate_on_chain,
-    verify_certificate_on_chain,
-    get_blockchain_status,
+from config import (
+    REVOCATION_REFRESH_SECONDS,
+    HEALTH_REFRESH_SECONDS,
+    ARCHIVE_AFTER_YEARS,
+    ARCHIVE_INTERVAL_SECONDS,
+    PROFILING_ENABLED,
+)
+from rate_limit import limit_route
+from responses import FastJSONResponse, construct_trusted
+from repositories import get_repository
+from utils import (
+    save_certificate, ensure_indexes, revoke_certificate,
+    write_session, read_session, causal_token, CAUSAL_TOKEN_HEADER,
 )
+from services.blockchain_service import revoke_certificate_on_chain
+from services.health_service import health_monitor, refresh_health_periodically
+from services.revocation_service import revocations, refresh_revocations_periodically
+from services.verification_service import normalise_hash, check_certificate
+from services.bundle_service import build_bundle
+from services.archive_service import archive_periodically
+import tracing
+from tracing import TracingMiddleware, TRACEPARENT_HEADER
+from profiling import ProfilingMiddleware, PROFILE_ID_HEADER
+from services import idempotency_service, event_service, password_service
+from services.idempotency_service import IdempotencyError
 import os
+from typing import Optional
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 
+async def create_indexes():
+    """Make sure the indexes exist (runs in the background, off the startup path)"""
+    try:
+        await asyncio.to_thread(ensure_indexes)
+    except Exception as e:
+        print(f"Warning: could not create certificate indexes: {e}")
+
+async def warm_password_hashing():
+    """Calibrate BCRYPT_ROUNDS=auto now rather than on the first login (a no-op
+    under gunicorn, which does it in the master)"""
+    try:
+        await asyncio.to_thread(password_service.get_pwd_context)
+    except Exception as e:
+        print(f"Warning: could not set up password hashing: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create per-process resources on startup and release them on shutdown.
+
+    Nothing here waits on the database or the RPC node: the client connects
+    in the background, and readiness (/health/ready) turns green once the
+    health snapshot and the revocation set are in place.
+    """
+    repository = get_repository()
+    repository.connect()
+    tasks = [
+        asyncio.create_task(create_indexes()),
+        asyncio.create_task(warm_password_hashing()),
+        # The first refresh loads the full revocation set
+        asyncio.create_task(refresh_revocations_periodically(REVOCATION_REFRESH_SECONDS)),
+        asyncio.create_task(refresh_health_periodically(HEALTH_REFRESH_SECONDS)),
+    ]
+    if ARCHIVE_AFTER_YEARS > 0:
+        if repository.name == "mongo":
+            tasks.append(asyncio.create_task(archive_periodically(ARCHIVE_INTERVAL_SECONDS)))
+        else:
+            print(f"Warning: ARCHIVE_AFTER_YEARS is ignored with DB_BACKEND={repository.name}")
+    app.state.background_tasks = tasks
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        repository.close()
+        tracing.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Certificate Verification System",
     description="A blockchain-based certificate verification system with JWT authentication",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -31,13 +108,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CAUSAL_TOKEN_HEADER, "Idempotent-Replayed", "Retry-After", "ETag", TRACEPARENT_HEADER, PROFILE_ID_HEADER],
 )
 
+# Not installed at all unless enabled, so it costs nothing by default
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so the request span covers CORS handling too
+app.add_middleware(TracingMiddleware)
+
 # Security scheme
 security = HTTPBearer()
 
-# Include authentication routes
+# Include authentication, issuer and public routes
 app.include_router(auth_router)
+app.include_router(issuer_router)
+app.include_router(public_router)
+app.include_router(document_router)
 
 @app.get("/")
 async def root():
@@ -52,35 +140,79 @@ async def root():
 @app.post("/issue", status_code=status.HTTP_201_CREATED, response_model=IssueResponse, tags=["Certificates"], summary="Issue a new certificate")
 async def issue_certificate(
     metadata: CertificateIssueRequest,
-    current_user: dict = Depends(issuer_required)
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(issuer_required),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255),
+    prefer: Optional[str] = Header(default=None)
 ):
     """
-    Issue a new certificate (requires issuer role or admin)
+    Issue a new certificate (requires issuer role or admin).
+
+    Send an `Idempotency-Key` header to make retries safe: a repeated request
+    with the same key returns the original response without issuing again.
+
+    Send `Prefer: respond-async` to get a 202 as soon as the certificate is
+    persisted and anchor it in the background; follow its progress on
+    `GET /issuers/{username}/events`.
     """
+    key_id = None
+    if idempotency_key:
+        try:
+            key_id, replay = await idempotency_service.begin(
+                current_user["username"], idempotency_key, idempotency_service.fingerprint(metadata.model_dump())
+            )
+        except IdempotencyError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+        if replay:
+            headers = {"Idempotent-Replayed": "true"}
+            if replay.get("causal_token"):
+                headers[CAUSAL_TOKEN_HEADER] = replay["causal_token"]
+            return FastJSONResponse(status_code=replay["status_code"], content=replay["response"], headers=headers)
+
     try:
         # Add issuer information to certificate metadata
         payload = metadata.model_dump()
         payload["issued_by"] = current_user["username"]
         payload["issuer_email"] = current_user["email"]
 
-        # Compute deterministic hash first (based on payload fields)
-        predicted_hash = generate_hash(payload)
+        # Persist first (regardless of chain result to keep audit trail)
+        with write_session() as session:
+            cert = save_certificate(payload, session=session)
+            token = causal_token(session)
+        event_service.publish(cert["hash"], current_user["username"], event_service.PERSISTED)
 
-        # Store hash on blockchain first (best-effort with clear status)
-        try:
-            bc_ok = store_certificate_on_chain(predicted_hash)
-        except Exception:
-            bc_ok = False
+        # Then store the hash on blockchain (best-effort with clear status)
+        anchor_async = bool(prefer) and "respond-async" in prefer.lower()
+        if anchor_async:
+            background_tasks.add_task(
+                tracing.in_background(event_service.anchor_with_events, "background anchor"),
+                cert["hash"], current_user["username"],
+            )
+            bc_ok = None
+            status_code = status.HTTP_202_ACCEPTED
+        else:
+            # Waits for the receipt: off the event loop
+            bc_ok = await run_in_threadpool(event_service.anchor_with_events, cert["hash"], current_user["username"])
+            status_code = status.HTTP_201_CREATED
 
-        # Then persist to DB (regardless of chain result to keep audit trail)
-        cert = save_certificate(payload)
-        return IssueResponse(
+        # The record was built from an already validated request, so skip
+        # re-validation and response_model serialisation
+        response = IssueResponse.model_construct(
             message="Certificate issued successfully",
-            certificate=CertificateRecord(**cert),
+            certificate=construct_trusted(CertificateRecord, cert),
             issued_by=current_user["username"],
-            blockchain_stored=bool(bc_ok),
+            blockchain_stored=bc_ok,
         )
+        body = response.model_dump(mode="json")
+        if key_id:
+            idempotency_service.complete(key_id, status_code, body, token)
+        headers = {CAUSAL_TOKEN_HEADER: token} if token else {}
+        if anchor_async:
+            headers["Preference-Applied"] = "respond-async"
+        return FastJSONResponse(status_code=status_code, content=body, headers=headers)
     except Exception as e:
+        if key_id:
+            idempotency_service.abort(key_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error issuing certificate: {str(e)}"
@@ -94,69 +226,49 @@ class VerifyRequest(BaseModel):
     @field_validator("hash")
     @classmethod
     def validate_hash(cls, v: str) -> str:
-        if not isinstance(v, str):
-            raise ValueError("hash must be a string")
-        h = v.strip().lower()
-        if h.startswith("0x"):
-            h = h[2:]
-        if len(h) != 64:
-            raise ValueError("hash must be 64 hex characters")
-        if any(c not in "0123456789abcdef" for c in h):
-            raise ValueError("hash must be a valid hex string")
+        normalise_hash(v)
         return v.strip()
 
 
-@app.post("/verify")
+@app.post("/verify", dependencies=[Depends(limit_route("verify"))])
 async def verify_certificate_endpoint(
     payload: VerifyRequest,
     current_user: dict = Depends(get_current_active_user),
+    x_causal_token: Optional[str] = Header(default=None),
 ):
     """Verify a certificate by its hash (requires authentication)."""
 
-    # Normalise hash (allow optional 0x prefix)
-    cert_hash = payload.hash.strip()
-    if cert_hash.lower().startswith("0x"):
-        cert_hash = cert_hash[2:]
-    # Normalise to lowercase since stored sha256 hexdigest is lowercase
-    cert_hash = cert_hash.lower()
+    # Normalise hash (optional 0x prefix, lowercase like the stored hexdigest)
+    cert_hash = normalise_hash(payload.hash)
 
     try:
-        # Database presence and integrity check
-        from utils import certificates, generate_hash
-        doc = certificates.find_one({"hash": cert_hash})
-        exists_in_db = bool(doc)
-        integrity_ok = False
-        if doc:
-            try:
-                integrity_ok = (generate_hash(doc) == doc.get("hash"))
-            except Exception:
-                integrity_ok = False
-
-        # Blockchain check
-        try:
-            chain_valid = verify_certificate_on_chain(cert_hash)
-        except Exception:
-            chain_valid = False
+        with read_session(x_causal_token) as session:
+            result = await run_in_threadpool(check_certificate, cert_hash, session=session)
 
-        if exists_in_db and integrity_ok and chain_valid:
-            return {
+        if result["status"] == "valid":
+            return FastJSONResponse({
                 "message": "Certificate verified successfully (DB and blockchain)",
                 "verified_by": current_user["username"],
                 "status": "valid",
-            }
+            })
+        elif result["status"] == "chain_unavailable":
+            return FastJSONResponse({
+                "message": "Certificate found and intact in database, but the blockchain is unavailable so on-chain anchoring could not be checked",
+                "verified_by": current_user["username"],
+                "status": "chain_unavailable",
+            })
+        elif result["status"] == "revoked":
+            return FastJSONResponse({
+                "message": f"Certificate has been revoked; {{'hash': '{cert_hash}'}}",
+                "verified_by": current_user["username"],
+                "status": "revoked",
+            })
         else:
-            reason = []
-            if not exists_in_db:
-                reason.append("not found in database")
-            elif not integrity_ok:
-                reason.append("hash mismatch for stored record")
-            if not chain_valid:
-                reason.append("not found on blockchain")
-            return {
-                "message": f"Certificate verification failed: {', '.join(reason)}; {{'hash': '{cert_hash}'}}",
+            return FastJSONResponse({
+                "message": f"Certificate verification failed: {', '.join(result['reasons'])}; {{'hash': '{cert_hash}'}}",
                 "verified_by": current_user["username"],
                 "status": "invalid",
-            }
+            })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -164,33 +276,158 @@ async def verify_certificate_endpoint(
         )
 
 @app.get("/certificates", dependencies=[Depends(get_current_active_user)])
-async def list_certificates(current_user: dict = Depends(get_current_active_user)):
+async def list_certificates(
+    current_user: dict = Depends(get_current_active_user),
+    x_causal_token: Optional[str] = Header(default=None),
+):
     """
     List certificates (authenticated users only)
     """
     try:
-        from utils import certificates
-        
         # If user is admin or issuer, show all certificates
         # If regular user, show certificates they can access
-        if current_user["role"] in ["admin", "issuer"]:
-            certs = list(certificates.find({}, {"_id": 0}))
-        else:
-            # Regular users can see certificates but with limited info
-            certs = list(certificates.find({}, {"_id": 0, "hash": 1, "student_name": 1, "institution": 1, "degree": 1, "graduation_year": 1}))
+        with read_session(x_causal_token) as session:
+            if current_user["role"] in ["admin", "issuer"]:
+                certs = get_repository().list_certificates(session=session)
+            else:
+                # Regular users can see certificates but with limited info
+                certs = get_repository().list_certificates(
+                    ["hash", "student_name", "institution", "degree", "graduation_year"], session=session
+                )
         
-        return {
+        return FastJSONResponse({
             "certificates": certs,
             "count": len(certs),
             "accessed_by": current_user["username"]
-        }
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching certificates: {str(e)}"
         )
 
-@app.get("/health")
+@app.get("/certificates/{cert_hash}/bundle", tags=["Certificates"], summary="Signed bundle for offline verification")
+async def get_certificate_bundle(
+    cert_hash: str,
+    current_user: dict = Depends(issuer_required)
+):
+    """
+    Return a signed, self-contained bundle that `bundle_verifier.py` can check
+    offline (issuer of the certificate or admin)
+    """
+    try:
+        cert_hash = normalise_hash(cert_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        result = await run_in_threadpool(check_certificate, cert_hash)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error verifying certificate: {str(e)}"
+        )
+
+    if result["status"] == "revoked":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Certificate has been revoked; refusing to sign"
+        )
+    doc = result["certificate"]
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Certificate not found")
+    if current_user["role"] != "admin" and doc.get("issued_by") != current_user["username"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Issuers can only export their own certificates"
+        )
+    if not result["integrity_ok"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Stored record does not match its hash; refusing to sign"
+        )
+    if result["chain_valid"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain unavailable; cannot attest anchoring right now",
+            headers={"Retry-After": "30"}
+        )
+
+    try:
+        return FastJSONResponse(build_bundle(doc, anchored_on_chain=result["chain_valid"]))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error signing bundle: {str(e)}"
+        )
+
+@app.post("/certificates/{cert_hash}/revoke", response_model=RevokeResponse, tags=["Certificates"], summary="Revoke a certificate")
+async def revoke_certificate_endpoint(
+    cert_hash: str,
+    body: Optional[RevokeRequest] = None,
+    current_user: dict = Depends(issuer_required)
+):
+    """
+    Revoke a certificate (issuer of the certificate or admin)
+    """
+    try:
+        cert_hash = normalise_hash(cert_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        from utils import get_certificate_by_hash
+        doc = get_certificate_by_hash(cert_hash)
+        if not doc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Certificate not found")
+        if current_user["role"] != "admin" and doc.get("issued_by") != current_user["username"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Issuers can only revoke their own certificates"
+            )
+
+        reason = body.reason if body else None
+        with write_session() as session:
+            cert = revoke_certificate(cert_hash, current_user["username"], reason, session=session)
+            token = causal_token(session)
+        revocations.add(cert_hash)
+
+        # Emit the on-chain CertRevoked event (best-effort, like anchoring)
+        try:
+            bc_ok = await run_in_threadpool(revoke_certificate_on_chain, cert_hash)
+        except Exception:
+            bc_ok = False
+
+        response = RevokeResponse.model_construct(
+            message="Certificate revoked successfully",
+            certificate=construct_trusted(CertificateRecord, cert),
+            blockchain_revoked=bool(bc_ok),
+        )
+        headers = {CAUSAL_TOKEN_HEADER: token} if token else None
+        return FastJSONResponse(response.model_dump(), headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error revoking certificate: {str(e)}"
+        )
+
+@app.get("/health/live", tags=["Health"])
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness probe served from the background health snapshot (503 if not ready)"""
+    readiness = health_monitor.readiness()
+    return FastJSONResponse(
+        readiness,
+        status_code=status.HTTP_200_OK if readiness["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+@app.get("/health", tags=["Health"])
 async def health_check():
     """Public health check endpoint"""
     base = {
@@ -199,10 +436,9 @@ async def health_check():
         "version": "2.0.0"
     }
 
-    # Include basic blockchain readiness information for visibility
-    try:
-        bc = get_blockchain_status()
-        base["blockchain"] = bc
-    except Exception:
-        base["blockchain"] = {"connected": False, "contract_ready": False}
-    return base
\ No newline at end of file
+    # Include the cached blockchain readiness information for visibility
+    readiness = health_monitor.readiness()
+    base["blockchain"] = readiness.get("blockchain", {"connected": False, "contract_ready": False})
+    base["database"] = readiness.get("database", {"ok": False})
+    base["checked_at"] = readiness.get("checked_at")
+    return base
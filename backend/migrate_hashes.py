@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Convert stored certificate hashes from 64-char hex strings to 32-byte binary.
+
+Safe to run online, while the API is serving: documents are converted in
+small batches, each update only applies if the document still holds the hex
+value it was read with, and the API matches both forms as long as
+HASH_LEGACY_HEX_LOOKUP is true. Re-running resumes where it stopped.
+
+Usage (from the backend directory):
+    python migrate_hashes.py [--batch-size 1000] [--pause 0.05] [--dry-run]
+
+Both the hot collection and the archive tier are converted. Once it reports
+no hex hashes left in either, set HASH_LEGACY_HEX_LOOKUP=false.
+"""
+
+import argparse
+import time
+
+from pymongo import UpdateOne
+
+from utils import ARCHIVE_COLLECTION, certificates_archive, certificates_write, ensure_indexes, hash_to_db
+
+HEX_HASH = {"hash": {"$type": "string"}}
+
+
+def migrate_collection(collection, name: str, batch_size: int, pause: float, dry_run: bool) -> int:
+    """Convert the hex hashes in one collection. Returns how many are left."""
+    remaining = collection.count_documents(HEX_HASH)
+    print(f"{name}: {remaining} certificate(s) still store a hex hash")
+    if dry_run or not remaining:
+        return remaining
+
+    converted = 0
+    last_id = None
+    while True:
+        query = dict(HEX_HASH)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(query, {"hash": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        updates = [
+            UpdateOne({"_id": doc["_id"], "hash": doc["hash"]}, {"$set": {"hash": hash_to_db(doc["hash"])}})
+            for doc in batch
+        ]
+        result = collection.bulk_write(updates, ordered=False)
+        converted += result.modified_count
+        last_id = batch[-1]["_id"]
+        print(f"  converted {converted}/{remaining}")
+        # Leave room for foreground traffic between batches
+        time.sleep(pause)
+    return collection.count_documents(HEX_HASH)
+
+
+def migrate(batch_size: int, pause: float, dry_run: bool) -> int:
+    # The hash indexes also serve the $type filter
+    ensure_indexes()
+    collections = (("certificates", certificates_write), (ARCHIVE_COLLECTION, certificates_archive))
+    left = {name: migrate_collection(collection, name, batch_size, pause, dry_run) for name, collection in collections}
+    if dry_run:
+        return sum(left.values())
+
+    # Recount both: the archive job may have moved a hex document out of the
+    # hot collection after it was done
+    left = {name: collection.count_documents(HEX_HASH) for name, collection in collections}
+    if any(left.values()):
+        counts = ", ".join(f"{count} in {name}" for name, count in left.items() if count)
+        print(f"Hex hashes left ({counts}; written or archived during the run?); run again")
+    else:
+        print("Done: every hash is binary, HASH_LEGACY_HEX_LOOKUP can be set to false")
+    return sum(left.values())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.05, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true", help="only count documents left to convert")
+    args = parser.parse_args()
+    exit(1 if migrate(args.batch_size, args.pause, args.dry_run) and not args.dry_run else 0)
@@ -61,9 +61,37 @@ class CertificateRecord(BaseModel):
     issuer_email: Optional[str] = None
     created_at: Optional[datetime] = None
 
+    revoked: bool = False
+    revoked_at: Optional[datetime] = None
+    revoked_by: Optional[str] = None
+    revocation_reason: Optional[str] = None
+
+    # Outcome of anchoring on chain (None while pending or not recorded)
+    anchored: Optional[bool] = None
+    anchor_tx_hash: Optional[str] = None
+
+    # Attached certificate file (PDF or scan), see PUT /certificates/{hash}/document
+    document_hash: Optional[str] = None
+    document_size: Optional[int] = None
+    document_content_type: Optional[str] = None
+    document_uploaded_at: Optional[datetime] = None
+
 
 class IssueResponse(BaseModel):
     message: str
     certificate: CertificateRecord
     issued_by: str
     blockchain_stored: Optional[bool] = None
+
+
+class RevokeRequest(BaseModel):
+    """Optional details recorded with a revocation."""
+    model_config = ConfigDict(extra="forbid")
+
+    reason: Optional[str] = Field(default=None, max_length=500)
+
+
+class RevokeResponse(BaseModel):
+    message: str
+    certificate: CertificateRecord
+    blockchain_revoked: Optional[bool] = None
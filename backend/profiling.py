@@ -0,0 +1,256 @@
+# profiling.py
+# On-demand profiling of single requests.
+#
+# With PROFILING_ENABLED, an admin can profile a request by sending the
+# ``X-Profile`` header or the ``profile`` query parameter ("1", "sampling" or
+# "deterministic"), and PROFILE_SAMPLE_RATE profiles a random fraction of all
+# requests. The profile is written to PROFILE_DIR in collapsed-stack format
+# ("frame;frame;frame weight" per line), which flamegraph.pl, inferno and
+# speedscope read directly; its file name is returned in ``X-Profile-Id``.
+# Once the directory exceeds PROFILE_MAX_TOTAL_MB the oldest profiles are
+# deleted.
+#
+#   sampling       a thread records the stacks of every busy thread every
+#                  PROFILE_INTERVAL_MS (weights are sample counts); low
+#                  overhead, includes work handed to the thread pool
+#   deterministic  every call and return on the event loop thread is timed
+#                  (weights are microseconds); exact but slow
+#
+# Requests the worker serves at the same time show up in the profile too, so
+# profile on a quiet worker for a clean picture. One request is profiled at a
+# time per worker. Requests that are not profiled only pay for a header scan,
+# and with PROFILING_ENABLED off the middleware is not installed at all.
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from config import (
+    PROFILE_DIR,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_MODE,
+    PROFILE_INTERVAL_MS,
+    PROFILE_MAX_TOTAL_MB,
+)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_QUERY_PARAM = "profile"
+
+SAMPLING = "sampling"
+DETERMINISTIC = "deterministic"
+MODES = {"1": None, "true": None, SAMPLING: SAMPLING, DETERMINISTIC: DETERMINISTIC}
+
+# Leaf frames of threads that are waiting, not working
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select"),
+    ("thread.py", "_worker"), ("threading.py", "_wait_for_tstate_lock"),
+}
+
+_header_key = PROFILE_HEADER.lower().encode()
+_query_key = f"{PROFILE_QUERY_PARAM}=".encode()
+_busy = threading.Lock()
+# Longest first, so site-packages is stripped rather than its parent
+_site_roots = sorted(filter(None, set(sys.path)), key=len, reverse=True)
+
+
+def _label(code) -> str:
+    filename = code.co_filename
+    for root in _site_roots:
+        if filename.startswith(root):
+            filename = filename[len(root):].lstrip(os.sep)
+            break
+    # ';' separates frames in collapsed stacks (the weight follows the last space)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads from a background thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._names: Dict[int, str] = {}
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _thread_name(self, ident: int) -> str:
+        if ident not in self._names:
+            self._names = {t.ident: t.name.replace(";", ":") for t in threading.enumerate()}
+        return self._names.get(ident, f"thread-{ident}")
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(self._thread_name(ident))
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class DeterministicProfiler:
+    """Times every call on the current thread with ``sys.setprofile``."""
+
+    def __init__(self) -> None:
+        self.stacks: Counter = Counter()
+        self._stack: list = []
+        self._last = 0
+
+    def start(self) -> None:
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._event)
+
+    def stop(self) -> Counter:
+        sys.setprofile(None)
+        # Nanoseconds to whole microseconds, dropping stacks below 1us
+        return Counter({stack: ns // 1000 for stack, ns in self.stacks.items() if ns >= 1000})
+
+    def _event(self, frame, event, arg) -> None:
+        now = time.perf_counter_ns()
+        if self._stack:
+            # Time since the previous event is self time of the current stack
+            self.stacks[";".join(self._stack)] += now - self._last
+        if event == "call":
+            self._stack.append(_label(frame.f_code))
+        elif event == "c_call":
+            self._stack.append(f"{getattr(arg, '__qualname__', arg)} (builtin)".replace(";", ":"))
+        elif self._stack:
+            # return, c_return, c_exception; frames entered before start() are never pushed
+            self._stack.pop()
+        self._last = time.perf_counter_ns()
+
+
+def write_profile(stacks: Counter, name: str) -> str:
+    """Write collapsed stacks to PROFILE_DIR/name and apply the size limit. Returns the path."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, name)
+    with open(path, "w") as f:
+        f.writelines(f"{stack} {weight}\n" for stack, weight in stacks.most_common() if weight > 0)
+    prune(PROFILE_MAX_TOTAL_MB * 1024 * 1024)
+    return path
+
+
+def prune(max_bytes: int) -> int:
+    """Delete the oldest profiles until PROFILE_DIR holds at most ``max_bytes``. Returns how many."""
+    entries = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file() and entry.name.endswith(".folded"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # pruned by another worker
+        total -= size
+        removed += 1
+    return removed
+
+
+def _requested_mode(scope) -> Optional[str]:
+    """Profile mode asked for by the request (header or query), or None."""
+    for key, value in scope.get("headers") or ():
+        if key == _header_key:
+            return value.decode("latin-1").strip().lower()
+    query = scope.get("query_string") or b""
+    if _query_key in query:
+        values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY_PARAM)
+        if values:
+            return values[0].strip().lower()
+    return None
+
+
+def _is_admin(scope) -> bool:
+    from auth import AuthError, get_user, verify_token
+
+    for key, value in scope.get("headers") or ():
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return False
+            try:
+                payload = verify_token(token.strip())
+            except AuthError:
+                return False
+            if payload.get("role") != "admin":
+                return False
+            # The token may predate a role change; the stored user decides
+            user = get_user(payload["sub"])
+            return bool(user) and user.get("role") == "admin" and user.get("is_active", True)
+    return False
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests on demand (see module comment)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        requested = _requested_mode(scope)
+        if requested is not None:
+            if requested not in MODES or not await asyncio.to_thread(_is_admin, scope):
+                return await self.app(scope, receive, send)
+            mode = MODES[requested] or PROFILE_MODE
+        elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            mode = PROFILE_MODE
+        else:
+            return await self.app(scope, receive, send)
+
+        if not _busy.acquire(blocking=False):
+            # Another request is being profiled in this worker
+            return await self.app(scope, receive, send)
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            _busy.release()
+
+    async def _profile(self, scope, receive, send, mode: str) -> None:
+        path = scope["path"].strip("/").replace("/", "_") or "root"
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}-{scope['method']}-{path[:60]}-{mode}.folded"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER.encode(), name.encode())]
+            await send(message)
+
+        profiler = DeterministicProfiler() if mode == DETERMINISTIC else SamplingProfiler(PROFILE_INTERVAL_MS / 1000)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            stacks = profiler.stop()
+            try:
+                await asyncio.to_thread(write_profile, stacks, name)
+            except OSError as e:
+                print(f"Warning: could not save profile {name}: {e}")
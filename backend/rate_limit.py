@@ -0,0 +1,210 @@
+# rate_limit.py - Admission control and per-principal rate limiting
+#
+# `limit_route("verify")` is a FastAPI dependency that runs before the
+# endpoint's own dependencies, so overloaded or rate-limited requests are
+# rejected (503 / 429) before any user lookup, DB query or chain call.
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from config import MAX_INFLIGHT, RATE_LIMITS, RATE_LIMIT_REDIS_URL, TRUST_PROXY_HEADERS, TRUSTED_PROXY_COUNT
+
+
+def parse_rate(value: str) -> Optional[Tuple[int, float]]:
+    """Parse "<requests>/<seconds>" into (capacity, refill per second)."""
+    if not value:
+        return None
+    count, seconds = value.split("/", 1)
+    capacity = int(count)
+    return capacity, capacity / float(seconds)
+
+
+class InMemoryBucketStore:
+    """Token buckets held in this process.
+
+    Each bucket keeps its own capacity and rate alongside its state, so that
+    pruning can tell whether it has refilled whatever limit it belongs to.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self) -> None:
+        # key -> (tokens, updated, capacity, rate)
+        self._buckets: Dict[str, Tuple[float, float, int, float]] = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def take(self, key: str, capacity: int, rate: float) -> float:
+        """Take one token. Returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))[:2]
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, capacity, rate)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now, capacity, rate)
+                retry_after = (1 - tokens) / rate
+            self._ops += 1
+            if self._ops % self.PRUNE_EVERY == 0:
+                self._prune(now)
+        return retry_after
+
+    def _prune(self, now: float) -> None:
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [k for k, (t, u, c, r) in self._buckets.items() if t + (now - u) * r >= c]
+        for k in full:
+            del self._buckets[k]
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through Redis (atomic Lua script)."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str) -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05)
+        self._take = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: int, rate: float) -> float:
+        return float(self._take(keys=[f"ratelimit:{key}"], args=[capacity, rate, time.time()]))
+
+
+class RateLimiter:
+    def __init__(self, redis_url: str = "") -> None:
+        self._local = InMemoryBucketStore()
+        self._shared = None
+        if redis_url:
+            try:
+                self._shared = RedisBucketStore(redis_url)
+            except Exception as e:
+                print(f"Warning: shared rate limit store unavailable, using in-process buckets: {e}")
+
+    def take(self, key: str, capacity: int, rate: float) -> float:
+        if self._shared is not None:
+            try:
+                return self._shared.take(key, capacity, rate)
+            except Exception:
+                pass  # Redis hiccup: fall back to this worker's buckets
+        return self._local.take(key, capacity, rate)
+
+
+class AdmissionController:
+    """Counts in-flight requests per route class and sheds load above a limit."""
+
+    def __init__(self, limits: Dict[str, int]) -> None:
+        self._limits = limits
+        self._inflight: Dict[str, int] = {name: 0 for name in limits}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, route_class: str) -> bool:
+        limit = self._limits.get(route_class, 0)
+        with self._lock:
+            if limit and self._inflight.get(route_class, 0) >= limit:
+                return False
+            self._inflight[route_class] = self._inflight.get(route_class, 0) + 1
+            return True
+
+    def release(self, route_class: str) -> None:
+        with self._lock:
+            self._inflight[route_class] -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self._inflight)
+
+
+_rate_limits = {
+    route_class: {kind: parse_rate(value) for kind, value in kinds.items()}
+    for route_class, kinds in RATE_LIMITS.items()
+}
+limiter = RateLimiter(RATE_LIMIT_REDIS_URL)
+admission = AdmissionController(MAX_INFLIGHT)
+
+
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+        forwarded = [entry for entry in forwarded if entry]
+        if forwarded:
+            # Entries left of what our proxies appended are whatever the client sent
+            return forwarded[-min(max(TRUSTED_PROXY_COUNT, 1), len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+async def _principal(request: Request) -> Optional[str]:
+    """Username the request acts as, without touching the database."""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        from auth import verify_token, AuthError
+        try:
+            return verify_token(authorization[7:].strip()).get("sub")
+        except AuthError:
+            return None
+    # Login requests name their principal in the body (already read by FastAPI).
+    # Other bodies (file uploads) are left alone so they can be streamed.
+    if not request.headers.get("content-type", "").startswith("application/json"):
+        return None
+    try:
+        body = await request.json()
+    except Exception:
+        return None
+    username = body.get("username") if isinstance(body, dict) else None
+    return username.lower() if isinstance(username, str) else None
+
+
+def limit_route(route_class: str):
+    """Dependency factory enforcing admission control and rate limits for a route class."""
+    limits = _rate_limits.get(route_class, {})
+
+    async def dependency(request: Request):
+        if not admission.try_acquire(route_class):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is overloaded, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            keys = []
+            if limits.get("ip"):
+                keys.append((f"{route_class}:ip:{client_ip(request)}", limits["ip"]))
+            if limits.get("user"):
+                principal = await _principal(request)
+                if principal:
+                    keys.append((f"{route_class}:user:{principal}", limits["user"]))
+
+            for key, (capacity, rate) in keys:
+                retry_after = limiter.take(key, capacity, rate)
+                if retry_after > 0:
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="Rate limit exceeded, please slow down",
+                        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+                    )
+            yield
+        finally:
+            admission.release(route_class)
+
+    return dependency
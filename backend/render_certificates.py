@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Render printable PDF certificates with verification QR codes for a batch.
+
+A batch is an issuer's certificates, optionally narrowed to those issued in a
+time window (e.g. one bulk issuance run), a graduation year or a degree.
+Revoked certificates are skipped. Pages are rendered in a process pool and
+streamed into a zip archive or a directory; progress is printed as it goes.
+
+Usage (from the backend directory):
+    python render_certificates.py ISSUER (--zip batch.zip | --out-dir DIR)
+        [--issued-from 2024-07-01T09:00] [--issued-to 2024-07-01T18:00]
+        [--year 2024] [--degree "B.Sc. Computer Science"]
+        [--workers N] [--chunk-size 100] [--verify-url URL]
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from config import RENDER_CHUNK_SIZE, RENDER_VERIFY_URL, RENDER_WORKERS
+from repositories import get_repository
+from services.render_service import DirectorySink, ZipSink, render_batch
+
+
+def render(args) -> int:
+    repository = get_repository()
+    batch = dict(
+        issued_from=args.issued_from,
+        issued_to=args.issued_to,
+        graduation_year=args.year,
+        degree=args.degree,
+        include_revoked=False,
+    )
+    total = repository.count_certificates(args.issuer, **batch)
+    print(f"{total} certificate(s) to render")
+    if not total:
+        return 0
+
+    started = last_report = time.monotonic()
+
+    def report(done: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if done < total and now - last_report < 1:
+            return
+        last_report = now
+        rate = done / max(now - started, 1e-9)
+        print(f"  rendered {done}/{total} ({rate:.0f}/s, {(total - done) / rate if rate else 0:.0f}s left)")
+
+    sink = ZipSink(args.zip) if args.zip else DirectorySink(args.out_dir)
+    with sink:
+        rendered = render_batch(
+            repository.iter_certificates(args.issuer, **batch),
+            sink,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            verify_url=args.verify_url,
+            progress=report,
+        )
+    print(f"Done: {rendered} certificate(s) in {time.monotonic() - started:.1f}s -> {args.zip or args.out_dir}")
+    return rendered
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("issuer", help="username of the issuer")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--zip", help="write the PDFs into this zip archive")
+    target.add_argument("--out-dir", help="write the PDFs into this directory")
+    parser.add_argument("--issued-from", type=datetime.fromisoformat, help="issued at or after (UTC, ISO 8601)")
+    parser.add_argument("--issued-to", type=datetime.fromisoformat, help="issued before (UTC, ISO 8601)")
+    parser.add_argument("--year", type=int, help="graduation year")
+    parser.add_argument("--degree")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="rendering processes (0 = one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=RENDER_CHUNK_SIZE, help="certificates per task")
+    parser.add_argument("--verify-url", default=RENDER_VERIFY_URL, help="QR code URL, with {hash} for the hash")
+    args = parser.parse_args()
+    render(args)
@@ -0,0 +1,43 @@
+"""Persistence behind one interface (``Repository``), chosen by DB_BACKEND.
+
+    mongo   MongoDB, with replica-aware reads and the archive tier (default)
+    sqlite  one local SQLite file in WAL mode, no server needed
+
+The rest of the app goes through the functions in ``utils`` and ``auth``,
+which delegate to ``get_repository()``.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from config import DB_BACKEND
+from repositories.base import Repository
+
+_repository: Optional[Repository] = None
+
+
+def create_repository(backend: str = DB_BACKEND, **options) -> Repository:
+    """A new repository for ``backend`` ("mongo" or "sqlite")."""
+    if backend == "mongo":
+        from repositories.mongo import MongoRepository
+        return MongoRepository(**options)
+    if backend == "sqlite":
+        from repositories.sqlite import SqliteRepository
+        return SqliteRepository(**options)
+    raise ValueError(f"Unknown DB_BACKEND {backend!r} (expected mongo or sqlite)")
+
+
+def get_repository() -> Repository:
+    """The process-wide repository, created on first use."""
+    global _repository
+    if _repository is None:
+        _repository = create_repository()
+    return _repository
+
+
+def set_repository(repository: Optional[Repository]) -> None:
+    """Replace the process-wide repository (benchmarks, tools); None resets it."""
+    global _repository
+    _repository = repository
+
@@ -0,0 +1,199 @@
+"""Storage interface implemented by every backend.
+
+Records cross this interface in API form: certificate and document hashes are
+hex strings and timestamps are naive UTC datetimes. Certificates, users and
+status events carry the backend's own id as ``_id``. Sessions come from
+``write_session`` / ``read_session`` and are only meaningful to the backend
+that created them; backends without read-your-writes sessions use None.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class Repository(ABC):
+    """Certificates, users, status events and idempotency keys."""
+
+    name: str = ""
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def connect(self) -> None:
+        """Start connecting, without waiting for the database."""
+
+    @abstractmethod
+    def ensure_schema(self) -> None:
+        """Create tables/indexes the queries rely on (idempotent)."""
+
+    @abstractmethod
+    def ping(self) -> None:
+        """Round trip to the database; raises when it is unavailable."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release connections (a later call reconnects)."""
+
+    def reset_after_fork(self) -> None:
+        """Forget connections inherited from a parent process without closing them."""
+
+    # -- read-your-writes ----------------------------------------------------
+
+    def write_session(self):
+        """Context manager yielding a session for writes (or None)."""
+        return nullcontext(None)
+
+    def read_session(self, token: Optional[str]):
+        """Context manager yielding a session whose reads observe ``token``'s write (or None)."""
+        return nullcontext(None)
+
+    def causal_token(self, session) -> Optional[str]:
+        """Opaque token for the writes made in ``session`` (X-Causal-Token)."""
+        return None
+
+    # -- certificates --------------------------------------------------------
+
+    @abstractmethod
+    def insert_certificate(self, record: dict, session=None) -> str:
+        """Store a certificate record built by ``utils.build_certificate_record``. Returns its id."""
+
+    @abstractmethod
+    def find_certificate(self, cert_hash: str, session=None, read: bool = False) -> Optional[dict]:
+        """Certificate with this hash, or None. ``read=True`` allows replica reads."""
+
+    @abstractmethod
+    def find_certificate_by_document(self, document_hash: str, session=None, read: bool = False) -> Optional[dict]:
+        """Certificate the file digest is attached to, or None."""
+
+    @abstractmethod
+    def attach_document(
+        self, cert_hash: str, document_hash: str, size: int, content_type: str, session=None
+    ) -> Optional[dict]:
+        """Record a file digest unless one is attached already. Returns the record, or None."""
+
+    @abstractmethod
+    def revoke_certificate(
+        self, cert_hash: str, revoked_by: str, reason: Optional[str] = None, session=None
+    ) -> Optional[dict]:
+        """Flag a certificate as revoked (first revocation wins). Returns the record, or None."""
+
+    @abstractmethod
+    def revoked_hashes(self, since: Optional[datetime] = None) -> Iterator[Tuple[str, Optional[datetime]]]:
+        """``(hash, revoked_at)`` of revoked certificates, optionally since a time."""
+
+    @abstractmethod
+    def mark_anchored(self, cert_hash: str, anchored: bool, tx_hash: Optional[str] = None) -> None:
+        """Record the outcome of anchoring the certificate on chain."""
+
+    @abstractmethod
+    def valid_hashes(self) -> Iterator[Tuple[str, Optional[bool]]]:
+        """``(hash, anchored)`` of every certificate that is not revoked, in no particular order.
+
+        ``anchored`` is None when no anchoring outcome was recorded (pending,
+        or issued before outcomes were). A hash may be yielded twice while it
+        moves between storage tiers.
+        """
+
+    @abstractmethod
+    def certificates_by_issuer(
+        self, issuer_username: str, limit: int = 50, cursor: Optional[str] = None, session=None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """One page of an issuer's certificates, newest first, and the cursor of the next page.
+
+        Raises ValueError for a cursor this backend did not issue.
+        """
+
+    @abstractmethod
+    def issuer_summary(self, issuer_username: str, session=None) -> dict:
+        """``{"total", "by_year", "by_degree"}`` counts for an issuer."""
+
+    @abstractmethod
+    def list_certificates(self, fields: Optional[List[str]] = None, session=None) -> List[dict]:
+        """Every certificate, limited to ``fields`` when given (without ``_id``)."""
+
+    @abstractmethod
+    def count_certificates(self, issued_by: str, **filters: Any) -> int:
+        """Number of certificates ``iter_certificates`` yields for the same arguments."""
+
+    @abstractmethod
+    def iter_certificates(
+        self,
+        issued_by: str,
+        issued_from: Optional[datetime] = None,
+        issued_to: Optional[datetime] = None,
+        graduation_year: Optional[int] = None,
+        degree: Optional[str] = None,
+        include_revoked: bool = True,
+    ) -> Iterator[dict]:
+        """An issuer's certificates in issuance order (a batch), streamed from the database.
+
+        ``issued_from`` is inclusive and ``issued_to`` exclusive.
+        """
+
+    # -- users ---------------------------------------------------------------
+
+    @abstractmethod
+    def get_user(self, username: str) -> Optional[dict]:
+        """User record, including the password hash."""
+
+    @abstractmethod
+    def find_user_by_email(self, email: str) -> Optional[dict]:
+        """User record with this email, or None."""
+
+    @abstractmethod
+    def insert_user(self, user: dict) -> str:
+        """Store a new user. Returns its id."""
+
+    @abstractmethod
+    def list_users(self) -> List[dict]:
+        """Every user, without the password hash."""
+
+    @abstractmethod
+    def update_user(self, username: str, changes: Dict[str, Any]) -> bool:
+        """Set fields on a user. Returns whether the user exists."""
+
+    # -- certificate status events -------------------------------------------
+
+    @abstractmethod
+    def insert_event(self, event: dict) -> None:
+        """Store a status event; sets its ``_id`` (an ObjectId, ordered by time)."""
+
+    @abstractmethod
+    def newest_event(self, issued_by: str) -> Optional[dict]:
+        """An issuer's most recent event, or None."""
+
+    @abstractmethod
+    def find_events(self, issued_by: str, after, until=None, limit: int = 500) -> List[dict]:
+        """An issuer's events with ``after < _id <= until``, oldest first."""
+
+    # -- idempotency keys ----------------------------------------------------
+
+    @abstractmethod
+    def insert_idempotency_key(self, record: dict) -> bool:
+        """Claim a key (``record["_id"]``). Returns False if it exists and has not expired."""
+
+    @abstractmethod
+    def get_idempotency_key(self, key_id: str) -> Optional[dict]:
+        """Stored key record, or None."""
+
+    @abstractmethod
+    def take_over_idempotency_key(
+        self, key_id: str, created_at: datetime, fingerprint: str, now: datetime
+    ) -> bool:
+        """Re-claim an in-progress key still created at ``created_at`` (its worker died).
+
+        Returns whether this caller got it.
+        """
+
+    @abstractmethod
+    def complete_idempotency_key(
+        self, key_id: str, status_code: int, response: Any, causal_token: Optional[str] = None
+    ) -> None:
+        """Store the response of the request that claimed the key, and the causal token of its writes."""
+
+    @abstractmethod
+    def abort_idempotency_key(self, key_id: str) -> None:
+        """Release an in-progress key."""
@@ -0,0 +1,399 @@
+"""MongoDB backend (the default).
+
+Certificates live in ``certificates`` with a compressed ``certificates_archive``
+cold tier (see services/archive_service.py) that lookups by hash fall back
+to. Hashes are stored as 32-byte binary. Reads that may go to a secondary use
+the read-routed handles, and causally consistent sessions give clients
+read-your-writes through X-Causal-Token. The client and collection handles
+are shared with the rest of the app through ``utils``.
+"""
+
+from __future__ import annotations
+
+import base64
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import bson
+from bson import ObjectId
+from bson.timestamp import Timestamp
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+
+from config import ARCHIVE_COMPRESSOR, EVENT_TTL_SECONDS, IDEMPOTENCY_TTL_SECONDS
+from repositories.base import Repository
+from utils import (
+    ARCHIVE_COLLECTION,
+    WRITE_OPTIONS,
+    LazyCollection,
+    certificates,
+    certificates_archive,
+    certificates_archive_read,
+    certificates_read,
+    certificates_write,
+    close_client,
+    decode_certificate,
+    get_client,
+    get_db,
+    hash_from_db,
+    hash_query,
+    hash_to_db,
+    reset_client_after_fork,
+)
+
+# Reads stay on the primary so role/activation changes apply immediately
+users = LazyCollection("users", **WRITE_OPTIONS)
+certificate_events = LazyCollection("certificate_events", **WRITE_OPTIONS)
+idempotency_keys = LazyCollection("idempotency_keys", **WRITE_OPTIONS)
+
+
+def _encode_cursor(doc: dict) -> str:
+    raw = f"{doc['created_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, oid = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+@contextmanager
+def _session_after(state: dict):
+    with get_client().start_session(causal_consistency=True) as session:
+        if state.get("cluster_time"):
+            session.advance_cluster_time(state["cluster_time"])
+        session.advance_operation_time(state["operation_time"])
+        yield session
+
+
+def _batch_query(
+    issued_by: str,
+    issued_from: Optional[datetime] = None,
+    issued_to: Optional[datetime] = None,
+    graduation_year: Optional[int] = None,
+    degree: Optional[str] = None,
+    include_revoked: bool = True,
+) -> dict:
+    query: Dict[str, Any] = {"issued_by": issued_by}
+    if issued_from or issued_to:
+        query["created_at"] = {}
+        if issued_from:
+            query["created_at"]["$gte"] = issued_from
+        if issued_to:
+            query["created_at"]["$lt"] = issued_to
+    if graduation_year is not None:
+        query["graduation_year"] = graduation_year
+    if degree:
+        query["degree"] = degree
+    if not include_revoked:
+        query["revoked"] = {"$ne": True}
+    return query
+
+
+class MongoRepository(Repository):
+    name = "mongo"
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def ensure_schema(self) -> None:
+        certificates.create_index("hash")
+        # Only revoked certificates carry revoked_at, keeping this index tiny
+        certificates.create_index(
+            "revoked_at",
+            name="revoked_at",
+            partialFilterExpression={"revoked": True},
+        )
+        # Serves issuer listings (filter + newest-first sort) without a scan
+        certificates.create_index(
+            [("issued_by", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="issued_by_created_at",
+        )
+        # The archive job picks its batches by graduation year
+        certificates.create_index("graduation_year", name="graduation_year")
+        # Verify-by-upload looks certificates up by file digest
+        for collection in (certificates, certificates_archive):
+            collection.create_index(
+                "document_hash",
+                name="document_hash",
+                partialFilterExpression={"document_hash": {"$exists": True}},
+            )
+
+        # The archive is rarely read: compress it and index only what lookups need
+        try:
+            get_db().create_collection(
+                ARCHIVE_COLLECTION,
+                storageEngine={"wiredTiger": {"configString": f"block_compressor={ARCHIVE_COMPRESSOR}"}},
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        certificates_archive.create_index("hash")
+        certificates_archive.create_index(
+            "revoked_at",
+            name="revoked_at",
+            partialFilterExpression={"revoked": True},
+        )
+
+        certificate_events.create_index([("issued_by", 1), ("_id", 1)], name="issued_by_id")
+        certificate_events.create_index("created_at", expireAfterSeconds=EVENT_TTL_SECONDS)
+        idempotency_keys.create_index("created_at", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS)
+
+    def connect(self) -> None:
+        # MongoClient connects in the background
+        get_client()
+
+    def ping(self) -> None:
+        get_client().admin.command("ping")
+
+    def close(self) -> None:
+        close_client()
+
+    def reset_after_fork(self) -> None:
+        reset_client_after_fork()
+
+    # -- read-your-writes ----------------------------------------------------
+
+    @contextmanager
+    def write_session(self):
+        """Causally consistent session for writes; pass it to ``causal_token``."""
+        with get_client().start_session(causal_consistency=True) as session:
+            yield session
+
+    def read_session(self, token: Optional[str]):
+        """Without a (valid) token reads need no session, so this yields None."""
+        if not token:
+            return nullcontext(None)
+        try:
+            state = bson.decode(base64.urlsafe_b64decode(token.encode()))
+        except Exception:
+            return nullcontext(None)
+        operation_time = state.get("operation_time")
+        # A forged far-future time would make secondaries wait; ignore it
+        if not isinstance(operation_time, Timestamp) or operation_time.time > time.time() + 60:
+            return nullcontext(None)
+        return _session_after(state)
+
+    def causal_token(self, session) -> Optional[str]:
+        if session is None or session.operation_time is None:
+            return None
+        raw = bson.encode({"operation_time": session.operation_time, "cluster_time": session.cluster_time})
+        return base64.urlsafe_b64encode(raw).decode()
+
+    # -- certificates --------------------------------------------------------
+
+    def insert_certificate(self, record: dict, session=None) -> str:
+        result = certificates_write.insert_one({**record, "hash": hash_to_db(record["hash"])}, session=session)
+        return str(result.inserted_id)
+
+    def _find(self, query: dict, projection: Optional[dict], session, read: bool) -> Optional[dict]:
+        """Hot collection first, then the archive."""
+        hot, cold = (certificates_read, certificates_archive_read) if read else (certificates, certificates_archive)
+        doc = hot.find_one(query, projection, session=session)
+        if doc is None:
+            doc = cold.find_one(query, projection, session=session)
+        return decode_certificate(doc)
+
+    def find_certificate(self, cert_hash: str, session=None, read: bool = False) -> Optional[dict]:
+        return self._find({"hash": hash_query(cert_hash)}, None, session, read)
+
+    def find_certificate_by_document(self, document_hash: str, session=None, read: bool = False) -> Optional[dict]:
+        return self._find({"document_hash": hash_to_db(document_hash)}, None, session, read)
+
+    def attach_document(
+        self, cert_hash: str, document_hash: str, size: int, content_type: str, session=None
+    ) -> Optional[dict]:
+        query = {"hash": hash_query(cert_hash), "document_hash": {"$exists": False}}
+        update = {"$set": {
+            "document_hash": hash_to_db(document_hash),
+            "document_size": size,
+            "document_content_type": content_type,
+            "document_uploaded_at": datetime.utcnow(),
+        }}
+        if not certificates_write.update_one(query, update, session=session).matched_count:
+            certificates_archive.update_one(query, update, session=session)
+        return self._find({"hash": hash_query(cert_hash)}, {"_id": 0}, session, False)
+
+    def revoke_certificate(
+        self, cert_hash: str, revoked_by: str, reason: Optional[str] = None, session=None
+    ) -> Optional[dict]:
+        query = {"hash": hash_query(cert_hash), "revoked": {"$ne": True}}
+        update = {"$set": {
+            "revoked": True,
+            "revoked_at": datetime.utcnow(),
+            "revoked_by": revoked_by,
+            "revocation_reason": reason,
+        }}
+        if not certificates_write.update_one(query, update, session=session).matched_count:
+            certificates_archive.update_one(query, update, session=session)
+        return self._find({"hash": hash_query(cert_hash)}, {"_id": 0}, session, False)
+
+    def revoked_hashes(self, since: Optional[datetime] = None) -> Iterator[Tuple[str, Optional[datetime]]]:
+        query: Dict[str, Any] = {"revoked": True}
+        if since is not None:
+            query["revoked_at"] = {"$gte": since}
+        for collection in (certificates, certificates_archive):
+            # Sorting on revoked_at makes the planner use the small partial index
+            cursor = collection.find(query, {"_id": 0, "hash": 1, "revoked_at": 1}).sort("revoked_at", ASCENDING)
+            for doc in cursor:
+                yield hash_from_db(doc["hash"]), doc.get("revoked_at")
+
+    def mark_anchored(self, cert_hash: str, anchored: bool, tx_hash: Optional[str] = None) -> None:
+        query = {"hash": hash_query(cert_hash)}
+        update = {"$set": {"anchored": anchored, "anchor_tx_hash": tx_hash}}
+        if not certificates_write.update_one(query, update).matched_count:
+            certificates_archive.update_one(query, update)
+
+    def valid_hashes(self) -> Iterator[Tuple[str, Optional[bool]]]:
+        for collection in (certificates_read, certificates_archive_read):
+            cursor = collection.find({"revoked": {"$ne": True}}, {"_id": 0, "hash": 1, "anchored": 1})
+            for doc in cursor.batch_size(10000):
+                yield hash_from_db(doc["hash"]), doc.get("anchored")
+
+    def certificates_by_issuer(
+        self, issuer_username: str, limit: int = 50, cursor: Optional[str] = None, session=None
+    ) -> Tuple[List[dict], Optional[str]]:
+        # Keyset pagination on (created_at, _id): every page is a bounded index range scan
+        query: Dict[str, Any] = {"issued_by": issuer_username}
+        if cursor:
+            created_at, oid = _decode_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": oid}},
+            ]
+
+        docs = list(
+            certificates_read.find(query, session=session)
+            .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+        )
+        next_cursor = _encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        page = docs[:limit]
+        for doc in page:
+            doc.pop("_id", None)
+            decode_certificate(doc)
+        return page, next_cursor
+
+    def issuer_summary(self, issuer_username: str, session=None) -> dict:
+        # Aggregated inside the database
+        pipeline = [
+            {"$match": {"issued_by": issuer_username}},
+            {
+                "$facet": {
+                    "total": [{"$count": "count"}],
+                    "by_year": [
+                        {"$group": {"_id": "$graduation_year", "count": {"$sum": 1}}},
+                        {"$sort": {"_id": -1}},
+                    ],
+                    "by_degree": [
+                        {"$group": {"_id": "$degree", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1, "_id": 1}},
+                    ],
+                }
+            },
+        ]
+        result = next(certificates_read.aggregate(pipeline, session=session), {})
+        total = result.get("total") or [{"count": 0}]
+        return {
+            "total": total[0]["count"],
+            "by_year": [{"graduation_year": r["_id"], "count": r["count"]} for r in result.get("by_year", [])],
+            "by_degree": [{"degree": r["_id"], "count": r["count"]} for r in result.get("by_degree", [])],
+        }
+
+    def list_certificates(self, fields: Optional[List[str]] = None, session=None) -> List[dict]:
+        projection = {"_id": 0, **{field: 1 for field in fields}} if fields else {"_id": 0}
+        return [decode_certificate(doc) for doc in certificates_read.find({}, projection, session=session)]
+
+    def count_certificates(self, issued_by: str, **filters: Any) -> int:
+        return certificates_read.count_documents(_batch_query(issued_by, **filters))
+
+    def iter_certificates(
+        self,
+        issued_by: str,
+        issued_from: Optional[datetime] = None,
+        issued_to: Optional[datetime] = None,
+        graduation_year: Optional[int] = None,
+        degree: Optional[str] = None,
+        include_revoked: bool = True,
+    ) -> Iterator[dict]:
+        query = _batch_query(issued_by, issued_from, issued_to, graduation_year, degree, include_revoked)
+        # The issuer index serves the filter and the sort
+        cursor = (
+            certificates_read.find(query, {"_id": 0})
+            .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+            .batch_size(1000)
+        )
+        return map(decode_certificate, cursor)
+
+    # -- users ---------------------------------------------------------------
+
+    def get_user(self, username: str) -> Optional[dict]:
+        return users.find_one({"username": username})
+
+    def find_user_by_email(self, email: str) -> Optional[dict]:
+        return users.find_one({"email": email})
+
+    def insert_user(self, user: dict) -> str:
+        return str(users.insert_one(dict(user)).inserted_id)
+
+    def list_users(self) -> List[dict]:
+        return list(users.find({}, {"hashed_password": 0}))
+
+    def update_user(self, username: str, changes: Dict[str, Any]) -> bool:
+        return users.update_one({"username": username}, {"$set": changes}).matched_count > 0
+
+    # -- certificate status events -------------------------------------------
+
+    def insert_event(self, event: dict) -> None:
+        # insert_one sets event["_id"]
+        certificate_events.insert_one(event)
+
+    def newest_event(self, issued_by: str) -> Optional[dict]:
+        return certificate_events.find_one({"issued_by": issued_by}, sort=[("_id", -1)])
+
+    def find_events(self, issued_by: str, after, until=None, limit: int = 500) -> List[dict]:
+        id_range = {"$gt": after}
+        if until is not None:
+            id_range["$lte"] = until
+        query = {"issued_by": issued_by, "_id": id_range}
+        return list(certificate_events.find(query).sort("_id", 1).limit(limit))
+
+    # -- idempotency keys ----------------------------------------------------
+
+    def insert_idempotency_key(self, record: dict) -> bool:
+        # Expired keys are removed by the TTL index
+        try:
+            idempotency_keys.insert_one(dict(record))
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def get_idempotency_key(self, key_id: str) -> Optional[dict]:
+        return idempotency_keys.find_one({"_id": key_id})
+
+    def take_over_idempotency_key(
+        self, key_id: str, created_at: datetime, fingerprint: str, now: datetime
+    ) -> bool:
+        taken = idempotency_keys.update_one(
+            {"_id": key_id, "state": "in_progress", "created_at": created_at},
+            {"$set": {"fingerprint": fingerprint, "created_at": now}},
+        )
+        return taken.modified_count > 0
+
+    def complete_idempotency_key(
+        self, key_id: str, status_code: int, response: Any, causal_token: Optional[str] = None
+    ) -> None:
+        idempotency_keys.update_one(
+            {"_id": key_id},
+            {"$set": {
+                "state": "completed", "status_code": status_code, "response": response,
+                "causal_token": causal_token,
+            }},
+        )
+
+    def abort_idempotency_key(self, key_id: str) -> None:
+        idempotency_keys.delete_one({"_id": key_id, "state": "in_progress"})
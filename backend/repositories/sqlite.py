@@ -0,0 +1,489 @@
+"""Embedded SQLite backend for single-node deployments.
+
+Everything lives in one database file (SQLITE_PATH) in WAL mode, so readers
+never block the writer and several worker processes can share the file.
+Each thread keeps its own connection. Records are stored as JSON next to the
+columns that queries filter and sort on; hashes are 32-byte blobs, as in
+Mongo. There are no replicas, so sessions are None and every read already
+observes every committed write.
+
+Expired status events and idempotency keys are deleted on write, at most
+once a minute, instead of by TTL indexes.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+
+from config import EVENT_TTL_SECONDS, IDEMPOTENCY_TTL_SECONDS, SQLITE_BUSY_TIMEOUT_SECONDS, SQLITE_PATH
+from repositories.base import Repository
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    id INTEGER PRIMARY KEY,
+    hash BLOB NOT NULL,
+    issued_by TEXT,
+    created_at TEXT NOT NULL,
+    graduation_year INTEGER,
+    degree TEXT,
+    revoked INTEGER NOT NULL DEFAULT 0,
+    revoked_at TEXT,
+    document_hash BLOB,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS certificates_hash ON certificates (hash);
+CREATE INDEX IF NOT EXISTS certificates_issued_by_created_at ON certificates (issued_by, created_at, id);
+CREATE INDEX IF NOT EXISTS certificates_revoked_at ON certificates (revoked_at) WHERE revoked = 1;
+CREATE INDEX IF NOT EXISTS certificates_document_hash ON certificates (document_hash) WHERE document_hash IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS certificate_events (
+    id TEXT PRIMARY KEY,
+    issued_by TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS certificate_events_issued_by_id ON certificate_events (issued_by, id);
+CREATE INDEX IF NOT EXISTS certificate_events_created_at ON certificate_events (created_at);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    state TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    status_code INTEGER,
+    response TEXT
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_created_at ON idempotency_keys (created_at);
+"""
+
+PURGE_INTERVAL_SECONDS = 60
+
+
+def _ts(value: Optional[datetime]) -> Optional[str]:
+    """Sortable text form of a timestamp (fixed width, microseconds)."""
+    return value.isoformat(timespec="microseconds") if value is not None else None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": _ts(value)}
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+def _object_hook(obj: dict) -> Any:
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def _loads(text: str) -> Any:
+    return json.loads(text, object_hook=_object_hook)
+
+
+def _certificate(row) -> dict:
+    doc = _loads(row["data"])
+    doc["_id"] = str(row["id"])
+    return doc
+
+
+def _encode_cursor(created_at: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, row_id = raw.split("|", 1)
+        return _ts(datetime.fromisoformat(created_at)), int(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def _batch_where(
+    issued_by: str,
+    issued_from: Optional[datetime] = None,
+    issued_to: Optional[datetime] = None,
+    graduation_year: Optional[int] = None,
+    degree: Optional[str] = None,
+    include_revoked: bool = True,
+) -> Tuple[str, list]:
+    clauses, params = ["issued_by = ?"], [issued_by]
+    if issued_from:
+        clauses.append("created_at >= ?")
+        params.append(_ts(issued_from))
+    if issued_to:
+        clauses.append("created_at < ?")
+        params.append(_ts(issued_to))
+    if graduation_year is not None:
+        clauses.append("graduation_year = ?")
+        params.append(graduation_year)
+    if degree:
+        clauses.append("degree = ?")
+        params.append(degree)
+    if not include_revoked:
+        clauses.append("revoked = 0")
+    return " AND ".join(clauses), params
+
+
+class SqliteRepository(Repository):
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._schema_pid: Optional[int] = None
+        self._last_purge = 0.0
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        # Autocommit: every statement is its own transaction
+        conn = sqlite3.connect(
+            self.path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a power loss can drop
+        # the last commits but never corrupts the database
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn, self._local.pid = conn, os.getpid()
+        with self._lock:
+            self._connections.append(conn)
+            if self._schema_pid != os.getpid():
+                conn.executescript(SCHEMA)
+                self._schema_pid = os.getpid()
+        return conn
+
+    def ensure_schema(self) -> None:
+        self._conn()
+        self._purge_expired(force=True)
+
+    def ping(self) -> None:
+        self._conn().execute("SELECT 1").fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def reset_after_fork(self) -> None:
+        # Connections are per process (checked on use); drop the parent's
+        # without closing them
+        self._connections = []
+        self._local = threading.local()
+        self._schema_pid = None
+
+    def _purge_expired(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        utcnow = datetime.utcnow()
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM certificate_events WHERE created_at < ?",
+            (_ts(utcnow - timedelta(seconds=EVENT_TTL_SECONDS)),),
+        )
+        conn.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < ?",
+            (_ts(utcnow - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)),),
+        )
+
+    # -- certificates --------------------------------------------------------
+
+    def insert_certificate(self, record: dict, session=None) -> str:
+        cursor = self._conn().execute(
+            "INSERT INTO certificates (hash, issued_by, created_at, graduation_year, degree, data)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                bytes.fromhex(record["hash"]),
+                record.get("issued_by"),
+                _ts(record["created_at"]),
+                record.get("graduation_year"),
+                record.get("degree"),
+                _dumps(record),
+            ),
+        )
+        return str(cursor.lastrowid)
+
+    def find_certificate(self, cert_hash: str, session=None, read: bool = False) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT id, data FROM certificates WHERE hash = ? LIMIT 1", (bytes.fromhex(cert_hash),)
+        ).fetchone()
+        return _certificate(row) if row else None
+
+    def find_certificate_by_document(self, document_hash: str, session=None, read: bool = False) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT id, data FROM certificates WHERE document_hash = ? LIMIT 1", (bytes.fromhex(document_hash),)
+        ).fetchone()
+        return _certificate(row) if row else None
+
+    def _updated(self, cert_hash: str) -> Optional[dict]:
+        doc = self.find_certificate(cert_hash)
+        if doc:
+            doc.pop("_id")
+        return doc
+
+    def attach_document(
+        self, cert_hash: str, document_hash: str, size: int, content_type: str, session=None
+    ) -> Optional[dict]:
+        # Single conditional statement: the first document attached wins
+        self._conn().execute(
+            "UPDATE certificates SET document_hash = ?, data = json_set(data,"
+            " '$.document_hash', ?, '$.document_size', ?, '$.document_content_type', ?,"
+            " '$.document_uploaded_at', json(?))"
+            " WHERE hash = ? AND document_hash IS NULL",
+            (
+                bytes.fromhex(document_hash), document_hash, size, content_type,
+                _dumps(datetime.utcnow()), bytes.fromhex(cert_hash),
+            ),
+        )
+        return self._updated(cert_hash)
+
+    def revoke_certificate(
+        self, cert_hash: str, revoked_by: str, reason: Optional[str] = None, session=None
+    ) -> Optional[dict]:
+        revoked_at = datetime.utcnow()
+        self._conn().execute(
+            "UPDATE certificates SET revoked = 1, revoked_at = ?, data = json_set(data,"
+            " '$.revoked', json('true'), '$.revoked_at', json(?), '$.revoked_by', ?, '$.revocation_reason', ?)"
+            " WHERE hash = ? AND revoked = 0",
+            (_ts(revoked_at), _dumps(revoked_at), revoked_by, reason, bytes.fromhex(cert_hash)),
+        )
+        return self._updated(cert_hash)
+
+    def revoked_hashes(self, since: Optional[datetime] = None) -> Iterator[Tuple[str, Optional[datetime]]]:
+        query = "SELECT hash, revoked_at FROM certificates WHERE revoked = 1"
+        params: tuple = ()
+        if since is not None:
+            query += " AND revoked_at >= ?"
+            params = (_ts(since),)
+        for row in self._conn().execute(query, params):
+            yield row["hash"].hex(), datetime.fromisoformat(row["revoked_at"]) if row["revoked_at"] else None
+
+    def mark_anchored(self, cert_hash: str, anchored: bool, tx_hash: Optional[str] = None) -> None:
+        self._conn().execute(
+            "UPDATE certificates SET data = json_set(data, '$.anchored', json(?), '$.anchor_tx_hash', ?)"
+            " WHERE hash = ?",
+            (_dumps(anchored), tx_hash, bytes.fromhex(cert_hash)),
+        )
+
+    def valid_hashes(self) -> Iterator[Tuple[str, Optional[bool]]]:
+        query = "SELECT hash, json_extract(data, '$.anchored') AS anchored FROM certificates WHERE revoked = 0"
+        for row in self._conn().execute(query):
+            yield row["hash"].hex(), None if row["anchored"] is None else bool(row["anchored"])
+
+    def certificates_by_issuer(
+        self, issuer_username: str, limit: int = 50, cursor: Optional[str] = None, session=None
+    ) -> Tuple[List[dict], Optional[str]]:
+        # Keyset pagination on (created_at, id), like the Mongo backend
+        query = "SELECT id, created_at, data FROM certificates WHERE issued_by = ?"
+        params: list = [issuer_username]
+        if cursor:
+            created_at, row_id = _decode_cursor(cursor)
+            query += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params += [created_at, created_at, row_id]
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        rows = self._conn().execute(query, (*params, limit + 1)).fetchall()
+        next_cursor = _encode_cursor(rows[limit - 1]["created_at"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        return [_loads(row["data"]) for row in rows[:limit]], next_cursor
+
+    def issuer_summary(self, issuer_username: str, session=None) -> dict:
+        conn = self._conn()
+        total = conn.execute("SELECT COUNT(*) FROM certificates WHERE issued_by = ?", (issuer_username,)).fetchone()[0]
+        by_year = conn.execute(
+            "SELECT graduation_year, COUNT(*) AS count FROM certificates WHERE issued_by = ?"
+            " GROUP BY graduation_year ORDER BY graduation_year DESC",
+            (issuer_username,),
+        ).fetchall()
+        by_degree = conn.execute(
+            "SELECT degree, COUNT(*) AS count FROM certificates WHERE issued_by = ?"
+            " GROUP BY degree ORDER BY count DESC, degree",
+            (issuer_username,),
+        ).fetchall()
+        return {
+            "total": total,
+            "by_year": [{"graduation_year": r["graduation_year"], "count": r["count"]} for r in by_year],
+            "by_degree": [{"degree": r["degree"], "count": r["count"]} for r in by_degree],
+        }
+
+    def list_certificates(self, fields: Optional[List[str]] = None, session=None) -> List[dict]:
+        docs = [_loads(row["data"]) for row in self._conn().execute("SELECT data FROM certificates ORDER BY id")]
+        if fields:
+            docs = [{field: doc[field] for field in fields if field in doc} for doc in docs]
+        return docs
+
+    def count_certificates(self, issued_by: str, **filters: Any) -> int:
+        where, params = _batch_where(issued_by, **filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM certificates WHERE {where}", params).fetchone()[0]
+
+    def iter_certificates(
+        self,
+        issued_by: str,
+        issued_from: Optional[datetime] = None,
+        issued_to: Optional[datetime] = None,
+        graduation_year: Optional[int] = None,
+        degree: Optional[str] = None,
+        include_revoked: bool = True,
+    ) -> Iterator[dict]:
+        where, params = _batch_where(issued_by, issued_from, issued_to, graduation_year, degree, include_revoked)
+        cursor = self._conn().execute(f"SELECT data FROM certificates WHERE {where} ORDER BY created_at, id", params)
+        while rows := cursor.fetchmany(1000):
+            for row in rows:
+                yield _loads(row["data"])
+
+    # -- users ---------------------------------------------------------------
+
+    def _user(self, row) -> dict:
+        user = _loads(row["data"])
+        user["_id"] = str(row["id"])
+        return user
+
+    def get_user(self, username: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT id, data FROM users WHERE username = ?", (username,)).fetchone()
+        return self._user(row) if row else None
+
+    def find_user_by_email(self, email: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT id, data FROM users WHERE email = ? LIMIT 1", (email,)).fetchone()
+        return self._user(row) if row else None
+
+    def insert_user(self, user: dict) -> str:
+        cursor = self._conn().execute(
+            "INSERT INTO users (username, email, data) VALUES (?, ?, ?)",
+            (user["username"], user.get("email"), _dumps({k: v for k, v in user.items() if k != "_id"})),
+        )
+        return str(cursor.lastrowid)
+
+    def list_users(self) -> List[dict]:
+        users = [self._user(row) for row in self._conn().execute("SELECT id, data FROM users ORDER BY id")]
+        for user in users:
+            user.pop("hashed_password", None)
+        return users
+
+    def update_user(self, username: str, changes: Dict[str, Any]) -> bool:
+        paths = ", ".join(f"'$.{field}', json(?)" for field in changes)
+        cursor = self._conn().execute(
+            f"UPDATE users SET data = json_set(data, {paths}) WHERE username = ?",
+            (*(_dumps(value) for value in changes.values()), username),
+        )
+        return cursor.rowcount > 0
+
+    # -- certificate status events -------------------------------------------
+
+    def _event(self, row) -> dict:
+        event = _loads(row["data"])
+        event["_id"] = ObjectId(row["id"])
+        return event
+
+    def insert_event(self, event: dict) -> None:
+        event["_id"] = ObjectId()
+        # Hex ObjectIds sort in the same order as the ObjectIds themselves
+        self._conn().execute(
+            "INSERT INTO certificate_events (id, issued_by, created_at, data) VALUES (?, ?, ?, ?)",
+            (str(event["_id"]), event["issued_by"], _ts(event["created_at"]),
+             _dumps({k: v for k, v in event.items() if k != "_id"})),
+        )
+        self._purge_expired()
+
+    def newest_event(self, issued_by: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT id, data FROM certificate_events WHERE issued_by = ? ORDER BY id DESC LIMIT 1", (issued_by,)
+        ).fetchone()
+        return self._event(row) if row else None
+
+    def find_events(self, issued_by: str, after, until=None, limit: int = 500) -> List[dict]:
+        query = "SELECT id, data FROM certificate_events WHERE issued_by = ? AND id > ?"
+        params: list = [issued_by, str(after)]
+        if until is not None:
+            query += " AND id <= ?"
+            params.append(str(until))
+        query += " ORDER BY id LIMIT ?"
+        return [self._event(row) for row in self._conn().execute(query, (*params, limit))]
+
+    # -- idempotency keys ----------------------------------------------------
+
+    def insert_idempotency_key(self, record: dict) -> bool:
+        conn = self._conn()
+        # An expired key counts as free, as if the TTL index had removed it
+        conn.execute(
+            "DELETE FROM idempotency_keys WHERE id = ? AND created_at < ?",
+            (record["_id"], _ts(datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS))),
+        )
+        try:
+            conn.execute(
+                "INSERT INTO idempotency_keys (id, fingerprint, state, created_at) VALUES (?, ?, ?, ?)",
+                (record["_id"], record["fingerprint"], record["state"], _ts(record["created_at"])),
+            )
+        except sqlite3.IntegrityError:
+            return False
+        self._purge_expired()
+        return True
+
+    def get_idempotency_key(self, key_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM idempotency_keys WHERE id = ?", (key_id,)).fetchone()
+        if row is None:
+            return None
+        record = {
+            "_id": row["id"],
+            "fingerprint": row["fingerprint"],
+            "state": row["state"],
+            "created_at": datetime.fromisoformat(row["created_at"]),
+        }
+        if row["state"] == "completed":
+            record["status_code"] = row["status_code"]
+            record["response"] = _loads(row["response"])
+        return record
+
+    def take_over_idempotency_key(
+        self, key_id: str, created_at: datetime, fingerprint: str, now: datetime
+    ) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE idempotency_keys SET fingerprint = ?, created_at = ?"
+            " WHERE id = ? AND state = 'in_progress' AND created_at = ?",
+            (fingerprint, _ts(now), key_id, _ts(created_at)),
+        )
+        return cursor.rowcount > 0
+
+    def complete_idempotency_key(
+        self, key_id: str, status_code: int, response: Any, causal_token: Optional[str] = None
+    ) -> None:
+        # SQLite issues no causal tokens, so there is none to keep
+        self._conn().execute(
+            "UPDATE idempotency_keys SET state = 'completed', status_code = ?, response = ? WHERE id = ?",
+            (status_code, _dumps(response), key_id),
+        )
+
+    def abort_idempotency_key(self, key_id: str) -> None:
+        self._conn().execute("DELETE FROM idempotency_keys WHERE id = ? AND state = 'in_progress'", (key_id,))
@@ -0,0 +1,46 @@
+# responses.py - Fast JSON response helpers
+#
+# Routes that return large or trusted payloads build a FastJSONResponse
+# directly. FastAPI then skips response_model re-validation and
+# jsonable_encoder, and orjson serialises datetimes and nested dicts natively.
+
+from typing import Any, Dict, Type, TypeVar
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (falls back to the stdlib encoder)."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, default=_default)
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types orjson does not know (ObjectId, pydantic models)."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def construct_trusted(model: Type[M], data: Dict[str, Any]) -> M:
+    """Build a model from data the server produced itself, without validation.
+
+    Only declared fields are copied so extra keys (e.g. ``_id``) do not leak
+    into the instance.
+    """
+    return model.model_construct(**{k: v for k, v in data.items() if k in model.model_fields})
@@ -3,6 +3,7 @@
 
 from datetime import timedelta
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer
 from models.user import UserRegistration, UserLogin, Token, UserResponse, UserRole
 from auth import (
@@ -10,11 +11,13 @@ from auth import (
     get_current_active_user, admin_required, AuthError,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from rate_limit import limit_route
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(limit_route("login"))])
 async def register_user(user_data: UserRegistration):
     """
     Register a new user
@@ -40,12 +43,13 @@ async def register_user(user_data: UserRegistration):
             detail=e.message
         )
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_route("login"))])
 async def login_user(user_credentials: UserLogin):
     """
     Authenticate user and return JWT token
     """
-    user = authenticate_user(user_credentials.username, user_credentials.password)
+    # bcrypt is CPU-heavy; keep it off the event loop
+    user = await run_in_threadpool(authenticate_user, user_credentials.username, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -90,9 +94,9 @@ async def list_users(current_user: dict = Depends(admin_required)):
     """
     List all users (Admin only)
     """
-    from auth import users_collection
+    from repositories import get_repository
     
-    users = list(users_collection.find({}, {"hashed_password": 0}))
+    users = get_repository().list_users()
     return [
         UserResponse(
             username=user["username"],
@@ -113,14 +117,9 @@ async def update_user_role(
     """
     Update user role (Admin only)
     """
-    from auth import users_collection
+    from repositories import get_repository
     
-    result = users_collection.update_one(
-        {"username": username},
-        {"$set": {"role": new_role}}
-    )
-    
-    if result.matched_count == 0:
+    if not get_repository().update_user(username, {"role": new_role}):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -137,18 +136,22 @@ async def toggle_user_status(
     """
     Activate/deactivate user (Admin only)
     """
-    from auth import users_collection
-    
-    result = users_collection.update_one(
-        {"username": username},
-        {"$set": {"is_active": is_active}}
-    )
+    from repositories import get_repository
     
-    if result.matched_count == 0:
+    if not get_repository().update_user(username, {"is_active": is_active}):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
     status_text = "activated" if is_active else "deactivated"
-    return {"message": f"User {username} has been {status_text}"}
\ No newline at end of file
+    return {"message": f"User {username} has been {status_text}"}
+
+@router.get("/password-hashing")
+async def password_hashing_stats(current_user: dict = Depends(admin_required)):
+    """
+    bcrypt cost and hash/verify timings of this worker (Admin only)
+    """
+    from services.password_service import stats
+    
+    return stats.snapshot()
@@ -0,0 +1,145 @@
+# routes/document_routes.py
+# Certificate file (PDF/scan) anchoring and verify-by-upload.
+# Files are sent as the raw request body and hashed as they stream in.
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from fastapi.concurrency import run_in_threadpool
+from auth import get_current_active_user, issuer_required
+from config import DOCUMENT_CONTENT_TYPES, DOCUMENT_MAX_BYTES
+from rate_limit import limit_route
+from responses import FastJSONResponse
+from services.document_service import (
+    DocumentTooLargeError,
+    anchor_document,
+    check_document,
+    digest_stream,
+)
+from services.verification_service import normalise_hash
+from utils import (
+    CAUSAL_TOKEN_HEADER,
+    attach_document,
+    causal_token,
+    get_certificate_by_hash,
+    read_session,
+    write_session,
+)
+
+router = APIRouter(tags=["Documents"])
+
+
+def _content_type(request: Request) -> str:
+    """Media type of the upload; 415 unless it is an accepted document type."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in DOCUMENT_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send the file as the request body with one of: {', '.join(DOCUMENT_CONTENT_TYPES)}"
+        )
+    return content_type
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds {DOCUMENT_MAX_BYTES} bytes"
+    )
+
+
+async def _digest_upload(request: Request):
+    """Hash the request body as it streams in: (hex digest, size)."""
+    declared = request.headers.get("content-length")
+    # Refuse declared oversize bodies before reading anything
+    if declared and declared.isdigit() and int(declared) > DOCUMENT_MAX_BYTES:
+        raise _too_large()
+    try:
+        digest, size = await digest_stream(request.stream(), DOCUMENT_MAX_BYTES)
+    except DocumentTooLargeError:
+        raise _too_large()
+    if size == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+    return digest, size
+
+
+@router.put("/certificates/{cert_hash}/document", summary="Attach and anchor the certificate file")
+async def upload_certificate_document(
+    cert_hash: str,
+    request: Request,
+    current_user: dict = Depends(issuer_required)
+):
+    """
+    Attach the certificate's file (PDF or scan, sent as the raw body) and
+    anchor it on chain (issuer of the certificate or admin)
+    """
+    try:
+        cert_hash = normalise_hash(cert_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    content_type = _content_type(request)
+
+    # Check access before reading the body
+    doc = await run_in_threadpool(get_certificate_by_hash, cert_hash)
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Certificate not found")
+    if current_user["role"] != "admin" and doc.get("issued_by") != current_user["username"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Issuers can only attach documents to their own certificates"
+        )
+    if doc.get("revoked"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Certificate has been revoked")
+
+    digest, size = await _digest_upload(request)
+
+    token = None
+    created = not doc.get("document_hash")
+    if created:
+        with write_session() as session:
+            doc = attach_document(cert_hash, digest, size, content_type, session=session)
+            token = causal_token(session)
+    # Re-uploading the same file re-anchors it; a different one is refused
+    if not doc or doc.get("document_hash") != digest:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Certificate already has a different document attached"
+        )
+
+    bc_ok = await run_in_threadpool(anchor_document, cert_hash, digest)
+    headers = {CAUSAL_TOKEN_HEADER: token} if token else None
+    return FastJSONResponse({
+        "message": "Document attached and anchored" if bc_ok else "Document attached; blockchain anchoring failed",
+        "certificate_hash": cert_hash,
+        "document_hash": digest,
+        "document_size": size,
+        "document_content_type": doc.get("document_content_type", content_type),
+        "blockchain_stored": bool(bc_ok),
+    }, status_code=status.HTTP_201_CREATED if created else status.HTTP_200_OK, headers=headers)
+
+
+@router.post("/verify/document", dependencies=[Depends(limit_route("verify"))], summary="Verify a certificate file")
+async def verify_certificate_document(
+    request: Request,
+    current_user: dict = Depends(get_current_active_user),
+    x_causal_token: Optional[str] = Header(default=None)
+):
+    """
+    Verify a certificate file (sent as the raw body) against its anchored
+    digest (requires authentication)
+    """
+    _content_type(request)
+    digest, size = await _digest_upload(request)
+
+    try:
+        with read_session(x_causal_token) as session:
+            result = await run_in_threadpool(check_document, digest, session=session)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error verifying document: {str(e)}"
+        )
+
+    return FastJSONResponse({
+        **result,
+        "document_size": size,
+        "verified_by": current_user["username"],
+    })
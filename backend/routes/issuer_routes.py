@@ -0,0 +1,90 @@
+# routes/issuer_routes.py
+# Issuer-scoped certificate routes
+
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from auth import get_current_active_user
+from responses import FastJSONResponse
+from services import event_service
+from utils import get_certificates_by_issuer, get_issuer_summary, read_session
+
+router = APIRouter(prefix="/issuers", tags=["Issuers"])
+
+@router.get("/{username}/certificates")
+async def list_issuer_certificates(
+    username: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_summary: bool = True,
+    current_user: dict = Depends(get_current_active_user),
+    x_causal_token: Optional[str] = Header(default=None)
+):
+    """
+    List certificates issued by one issuer, newest first (issuer itself or admin)
+    """
+    if current_user["role"] != "admin" and current_user["username"] != username:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Issuers can only list their own certificates"
+        )
+
+    try:
+        with read_session(x_causal_token) as session:
+            certs, next_cursor = get_certificates_by_issuer(username, limit=limit, cursor=cursor, session=session)
+            response = {
+                "issuer": username,
+                "certificates": certs,
+                "count": len(certs),
+                "next_cursor": next_cursor,
+                "accessed_by": current_user["username"]
+            }
+            # The summary only needs computing once per listing session
+            if include_summary and not cursor:
+                response["summary"] = get_issuer_summary(username, session=session)
+        return FastJSONResponse(response)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching issuer certificates: {str(e)}"
+        )
+
+
+@router.get("/{username}/events")
+async def stream_issuer_events(
+    username: str,
+    request: Request,
+    since: Optional[str] = None,
+    current_user: dict = Depends(get_current_active_user),
+    last_event_id: Optional[str] = Header(default=None)
+):
+    """
+    Server-sent event stream of an issuer's certificate status changes
+    (persisted, anchor_submitted, confirmed, failed). Reconnect with
+    `Last-Event-ID` (or `?since=<event id>`) to resume without gaps.
+    """
+    if current_user["role"] != "admin" and current_user["username"] != username:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Issuers can only follow their own certificates"
+        )
+
+    try:
+        after = event_service.parse_event_id(last_event_id or since)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return StreamingResponse(
+        event_service.stream(username, after, request.is_disconnected),
+        media_type="text/event-stream",
+        # Stop proxies from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
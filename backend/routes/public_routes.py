@@ -0,0 +1,85 @@
+# routes/public_routes.py
+# Unauthenticated, HTTP-cacheable verification routes
+
+import hashlib
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from fastapi.concurrency import run_in_threadpool
+from config import PUBLIC_VERIFY_VALID_MAX_AGE, PUBLIC_VERIFY_REVOKED_MAX_AGE, PUBLIC_VERIFY_INVALID_MAX_AGE
+from rate_limit import limit_route
+from responses import FastJSONResponse
+from services.verification_service import normalise_hash, check_certificate
+from services.bundle_service import get_public_key_info
+
+router = APIRouter(prefix="/public", tags=["Public"])
+
+
+def _cache_control(cert_status: str) -> str:
+    # Revocation is final, so it can live long at the edge. A valid answer
+    # stops being true when the certificate is revoked: its TTL is the
+    # worst-case revocation delay, and must-revalidate keeps caches from
+    # serving it stale past that (revalidation is a cheap 304 via the ETag).
+    # Anything else may become valid soon, so keep it short-lived.
+    if cert_status == "revoked":
+        return f"public, max-age={PUBLIC_VERIFY_REVOKED_MAX_AGE}"
+    if cert_status == "valid":
+        return f"public, max-age={PUBLIC_VERIFY_VALID_MAX_AGE}, must-revalidate"
+    return f"public, max-age={PUBLIC_VERIFY_INVALID_MAX_AGE}"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison function
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@router.get("/verify/{cert_hash}", dependencies=[Depends(limit_route("verify"))])
+async def public_verify_certificate(
+    cert_hash: str,
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Public verification of a certificate hash, safe to serve from a CDN
+    """
+    try:
+        cert_hash = normalise_hash(cert_hash)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    try:
+        result = await run_in_threadpool(check_certificate, cert_hash)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error verifying certificate: {str(e)}"
+        )
+
+    document = {
+        "hash": cert_hash,
+        "status": result["status"],
+        "anchored_on_chain": result["chain_valid"],
+    }
+    response = FastJSONResponse(document)
+    etag = '"' + hashlib.sha256(response.body).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": _cache_control(result["status"])}
+
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return response
+
+
+@router.get("/bundle-key")
+async def public_bundle_key():
+    """
+    Public key used to sign offline verification bundles
+    """
+    response = FastJSONResponse(get_public_key_info())
+    response.headers["Cache-Control"] = f"public, max-age={PUBLIC_VERIFY_INVALID_MAX_AGE}"
+    return response
@@ -0,0 +1,91 @@
+"""Hot/cold tiering of certificates.
+
+Certificates whose graduation year is more than ARCHIVE_AFTER_YEARS in the
+past are moved from ``certificates`` to the compressed ``certificates_archive``
+collection, which only indexes ``hash`` (and revocations). Lookups by hash
+check the hot collection first and fall back to the archive
+(``utils.find_certificate``), so the move is invisible to /verify, bundles
+and revocation. Listings and issuer summaries only cover the hot tier.
+
+Each document is copied before it is deleted, and the delete only applies if
+none of its mutable fields changed in between, so a certificate is never
+missing from both tiers, no concurrent update is lost, and several workers
+can run the job at the same time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+from pymongo import DeleteOne, ReplaceOne
+
+import tracing
+from config import ARCHIVE_AFTER_YEARS, ARCHIVE_BATCH_SIZE
+from utils import certificates_archive, certificates_write
+
+# Every field updated in place after issuance: revocation, the attached file,
+# the anchoring outcome (repositories/mongo.py) and the hash itself
+# (migrate_hashes.py). A document whose fields here changed since it was
+# copied is not deleted.
+MUTABLE_FIELDS = (
+    "hash",
+    "revoked",
+    "revoked_at",
+    "revoked_by",
+    "revocation_reason",
+    "document_hash",
+    "document_size",
+    "document_content_type",
+    "document_uploaded_at",
+    "anchored",
+    "anchor_tx_hash",
+)
+
+
+def _unchanged(doc: dict) -> dict:
+    """Filter matching ``doc`` only while its mutable fields are as read (None matches absent)."""
+    return {"_id": doc["_id"], **{field: doc.get(field) for field in MUTABLE_FIELDS}}
+
+
+def archive_batch(cutoff_year: int, batch_size: int) -> tuple:
+    """Move up to ``batch_size`` certificates that graduated before ``cutoff_year``.
+
+    Returns (found, moved).
+    """
+    docs = list(certificates_write.find({"graduation_year": {"$lt": cutoff_year}}).limit(batch_size))
+    if not docs:
+        return 0, 0
+    certificates_archive.bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+        ordered=False,
+    )
+    # A document updated since it was read keeps its hot copy; the next run
+    # copies the updated version over the stale archive one
+    result = certificates_write.bulk_write([DeleteOne(_unchanged(doc)) for doc in docs], ordered=False)
+    return len(docs), result.deleted_count
+
+
+def archive_old_certificates(after_years: int = ARCHIVE_AFTER_YEARS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move every certificate older than ``after_years`` to the archive. Returns how many moved."""
+    cutoff_year = datetime.utcnow().year - after_years
+    moved = 0
+    while True:
+        found, deleted = archive_batch(cutoff_year, batch_size)
+        moved += deleted
+        # Stop on a short batch, or when nothing could be moved (all raced)
+        if found < batch_size or not deleted:
+            return moved
+
+
+async def archive_periodically(interval: float) -> None:
+    """Background task running ``archive_old_certificates`` every ``interval`` seconds."""
+    while True:
+        try:
+            with tracing.trace("job archive"):
+                moved = await asyncio.to_thread(archive_old_certificates)
+            if moved:
+                print(f"Archived {moved} certificate(s)")
+        except Exception as e:
+            print(f"Warning: certificate archiving failed: {e}")
+        await asyncio.sleep(interval)
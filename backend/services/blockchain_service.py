@@ -3,22 +3,65 @@
 Provides best-effort interactions with a simple registry contract that stores
 certificate hashes. If no contract address is configured or node is unreachable,
 functions return False and the app continues gracefully.
+
+All RPC access goes through a pool of endpoints (BLOCKCHAIN_NODES), each
+behind its own circuit breaker: calls go to the fastest up-to-date node and
+fail over to the next one, and only when no node can be used do they fail
+with ChainUnavailableError (fast, while the circuits are open). Transactions
+are sent in one call and their receipts polled in others, so failing over
+never sends a transaction twice.
+
+Every function here blocks (a receipt wait can take RECEIPT_TIMEOUT_SECONDS),
+so async handlers run them in the threadpool.
+
+web3 is heavy to import, so it is only loaded (and the providers built) on
+the first RPC call; with BLOCKCHAIN_BYPASS it is never loaded at all.
 """
 
 from __future__ import annotations
 
-from typing import Optional
+import time
+from typing import Callable, Optional, Tuple
+
+from config import (
+    BLOCKCHAIN_NODES,
+    CONTRACT_ADDRESS,
+    BLOCKCHAIN_BYPASS,
+    BLOCKCHAIN_RPC_TIMEOUT,
+    ANCHOR_GAS_LIMIT,
+    ANCHOR_GAS_PRICE_GWEI,
+    REVOKE_GAS_LIMIT,
+    RPC_MAX_BLOCK_LAG,
+    RPC_BREAKER_FAILURE_THRESHOLD,
+    RPC_BREAKER_RECOVERY_SECONDS,
+)
+import tracing
+from services.rpc_pool import RpcPool, ChainUnavailableError
+
+rpc_pool = RpcPool(
+    BLOCKCHAIN_NODES,
+    timeout=BLOCKCHAIN_RPC_TIMEOUT,
+    max_block_lag=RPC_MAX_BLOCK_LAG,
+    failure_threshold=RPC_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=RPC_BREAKER_RECOVERY_SECONDS,
+)
 
-from web3 import Web3
-from web3.exceptions import ContractLogicError
-from config import BLOCKCHAIN_NODE, CONTRACT_ADDRESS
 
-# Connect to blockchain node
-w3 = Web3(Web3.HTTPProvider(BLOCKCHAIN_NODE))
+# Total wait for a transaction receipt, across every endpoint polled
+RECEIPT_TIMEOUT_SECONDS = 60
+RECEIPT_POLL_SECONDS = 1.0
+
+
+class ContractRevertedError(Exception):
+    """The node answered but the contract call reverted."""
+
 
 # Minimal ABI for a CertRegistry contract:
 # function addCert(bytes32 hash) public
 # function verifyCert(bytes32 hash) public view returns (bool)
+# function revokeCert(bytes32 hash) public
+# function isRevoked(bytes32 hash) public view returns (bool)
+# event CertRevoked(bytes32 indexed hash, address indexed revokedBy, uint256 revokedAt)
 CERT_REGISTRY_ABI = [
     {
         "inputs": [{"internalType": "bytes32", "name": "hash", "type": "bytes32"}],
@@ -34,24 +77,62 @@ CERT_REGISTRY_ABI = [
         "stateMutability": "view",
         "type": "function",
     },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "hash", "type": "bytes32"}],
+        "name": "revokeCert",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "hash", "type": "bytes32"}],
+        "name": "isRevoked",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "hash", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": "revokedBy", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "revokedAt", "type": "uint256"},
+        ],
+        "name": "CertRevoked",
+        "type": "event",
+    },
 ]
 
 
-def _get_contract() -> Optional[any]:
-    if not CONTRACT_ADDRESS or not w3.is_connected():
+def reset_after_fork() -> None:
+    """Drop providers inherited from a parent process (their HTTP sessions are shared)."""
+    rpc_pool.reset()
+
+
+def _rpc(fn, *args):
+    """Run ``fn(w3, *args)`` on the best RPC endpoint, failing over between them."""
+    from web3.exceptions import ContractLogicError
+    try:
+        with tracing.span(f"chain.{fn.__name__.lstrip('_')}"):
+            return rpc_pool.call(fn, *args)
+    except ContractLogicError as e:
+        raise ContractRevertedError(str(e)) from e
+
+
+def _get_contract(w3) -> Optional[any]:
+    """Contract handle for CONTRACT_ADDRESS (no RPC round trip)."""
+    if not CONTRACT_ADDRESS:
         return None
     try:
+        from web3 import Web3
         return w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=CERT_REGISTRY_ABI)
     except Exception:
         return None
 
 
-def _get_default_sender() -> Optional[str]:
-    try:
-        accounts = w3.eth.accounts
-        return accounts[0] if accounts else None
-    except Exception:
-        return None
+def _get_default_sender(w3) -> Optional[str]:
+    accounts = w3.eth.accounts
+    return accounts[0] if accounts else None
 
 
 def _to_bytes32(hex_hash: str) -> bytes:
@@ -61,80 +142,176 @@ def _to_bytes32(hex_hash: str) -> bytes:
     return bytes.fromhex(h)
 
 
-def store_certificate_on_chain(cert_hash: str) -> bool:
+def _tx_params(w3, sender: str, gas_limit: int) -> dict:
+    """Transaction parameters; gas and fees left out are filled in by the node."""
+    params = {"from": sender}
+    if gas_limit:
+        params["gas"] = gas_limit
+    if ANCHOR_GAS_PRICE_GWEI:
+        params["gasPrice"] = w3.to_wei(ANCHOR_GAS_PRICE_GWEI, "gwei")
+    return params
+
+
+def _get_receipt(w3, tx_hash):
+    """Receipt of ``tx_hash``, or None while it is not mined (or not known to this node)."""
+    from web3.exceptions import TransactionNotFound
+    try:
+        return w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+
+
+def _await_receipt(tx_hash, timeout: float = RECEIPT_TIMEOUT_SECONDS) -> bool:
+    """Poll any endpoint for the receipt of a sent transaction; True if it succeeded.
+
+    Only this read is repeated when a node fails, never the transaction, so
+    the wait can move to another node without sending a second one. Gives up
+    (False) after ``timeout`` seconds in total, whichever nodes answered.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            receipt = _rpc(_get_receipt, tx_hash)
+        except ChainUnavailableError:
+            receipt = None
+        if receipt is not None:
+            return receipt.get("status") == 1
+        if time.monotonic() >= deadline:
+            print(f"Warning: no receipt for transaction {tx_hash.hex()} after {timeout:.0f}s")
+            return False
+        time.sleep(RECEIPT_POLL_SECONDS)
+
+
+def _submit(w3, cert_hash: str, done_fn: str, send_fn: str, gas_limit: int) -> Tuple[bool, Optional[bytes]]:
+    """Send ``send_fn(hash)`` unless ``done_fn(hash)`` already holds.
+
+    Returns ``(done, tx_hash)``: ``(True, None)`` if there is nothing to send,
+    ``(False, None)`` if no contract or sender is configured.
+    """
+    contract = _get_contract(w3)
+    sender = _get_default_sender(w3)
+    if not contract or not sender:
+        return False, None
+    hash_bytes = _to_bytes32(cert_hash)
+    if getattr(contract.functions, done_fn)(hash_bytes).call():
+        return True, None
+    return False, getattr(contract.functions, send_fn)(hash_bytes).transact(_tx_params(w3, sender, gas_limit))
+
+
+def _submit_anchor(w3, cert_hash: str) -> Tuple[bool, Optional[bytes]]:
+    # Already stored counts as success
+    return _submit(w3, cert_hash, "verifyCert", "addCert", ANCHOR_GAS_LIMIT)
+
+
+def store_certificate_on_chain(
+    cert_hash: str, on_submitted: Optional[Callable[[str], None]] = None
+) -> bool:
     """Store certificate hash on blockchain via addCert(bytes32).
 
     Returns True if a transaction is sent successfully and receipt status is 1.
+    Fails fast (False) while the RPC circuit is open. ``on_submitted`` is
+    called with the transaction hash once it is sent, before the receipt wait.
+
+    Sending fails over between endpoints only until the node accepts the
+    transaction; the receipt is then polled on whichever node is up, so a
+    failing node never causes a second addCert.
     """
-    # TEMPORARY: Return True to bypass blockchain storage issues
-    # while we debug the smart contract deployment
-    print(f"DEBUG: Temporarily bypassing blockchain storage for hash {cert_hash}")
-    return True
-    
-    # Original code (commented out for now):
-    # contract = _get_contract()
-    # if not contract:
-    #     return False
-    # sender = _get_default_sender()
-    # if not sender:
-    #     return False
-    # try:
-    #     # Convert hash to bytes32
-    #     hash_bytes = _to_bytes32(cert_hash)
-    #     
-    #     # Build transaction with explicit gas settings
-    #     tx_params = {
-    #         "from": sender,
-    #         "gas": 200000,  # Explicit gas limit
-    #         "gasPrice": w3.to_wei('20', 'gwei')  # Explicit gas price
-    #     }
-    #     
-    #     # First check if certificate already exists
-    #     try:
-    #         already_exists = contract.functions.verifyCert(hash_bytes).call()
-    #         if already_exists:
-    #             return True  # Already stored, consider it successful
-    #     except Exception:
-    #         pass  # Continue with storage attempt
-    #     
-    #     # Send transaction
-    #     tx = contract.functions.addCert(hash_bytes).transact(tx_params)
-    #     receipt = w3.eth.wait_for_transaction_receipt(tx, timeout=60)
-    #     return bool(receipt and receipt.get("status") == 1)
-    # except ContractLogicError as e:
-    #     print(f"Contract logic error: {e}")
-    #     return False
-    # except Exception as e:
-    #     print(f"Blockchain storage error: {e}")
-    #     return False
+    if BLOCKCHAIN_BYPASS:
+        print(f"DEBUG: Bypassing blockchain storage for hash {cert_hash} (BLOCKCHAIN_BYPASS)")
+        return True
+
+    if not CONTRACT_ADDRESS:
+        return False
+    try:
+        done, tx_hash = _rpc(_submit_anchor, cert_hash)
+        if tx_hash is None:
+            return done
+        if on_submitted:
+            on_submitted(tx_hash.hex())
+        return _await_receipt(tx_hash)
+    except ContractRevertedError as e:
+        print(f"Contract logic error: {e}")
+        return False
+    except ChainUnavailableError as e:
+        print(f"Blockchain unavailable, certificate not anchored: {e}")
+        return False
 
 
 def verify_certificate_on_chain(cert_hash: str) -> bool:
-    """Check if certificate hash exists on blockchain via verifyCert(bytes32)."""
-    # TEMPORARY: Return True to bypass blockchain verification issues
-    # This allows the system to work while we debug the smart contract
-    print(f"DEBUG: Temporarily bypassing blockchain verification for hash {cert_hash}")
-    return True
-    
-    # Original code (commented out for now):
-    # contract = _get_contract()
-    # if not contract:
-    #     return False
-    # try:
-    #     return bool(contract.functions.verifyCert(_to_bytes32(cert_hash)).call())
-    # except Exception:
-    #     return False
+    """Check if certificate hash exists on blockchain via verifyCert(bytes32).
 
+    Raises ChainUnavailableError when the node is down or its circuit is open,
+    so callers can tell "not anchored" apart from "could not check".
+    """
+    if BLOCKCHAIN_BYPASS:
+        print(f"DEBUG: Bypassing blockchain verification for hash {cert_hash} (BLOCKCHAIN_BYPASS)")
+        return True
 
-def get_blockchain_status() -> dict:
-    """Return connectivity and contract readiness information for diagnostics."""
+    if not CONTRACT_ADDRESS:
+        return False
     try:
-        connected = w3.is_connected()
-    except Exception:
-        connected = False
+        return bool(_rpc(_verify, cert_hash))
+    except ContractRevertedError:
+        return False
+
+
+def _verify(w3, cert_hash: str) -> bool:
+    contract = _get_contract(w3)
+    return bool(contract) and contract.functions.verifyCert(_to_bytes32(cert_hash)).call()
+
+
+def _submit_revocation(w3, cert_hash: str) -> Tuple[bool, Optional[bytes]]:
+    # Already revoked counts as success
+    return _submit(w3, cert_hash, "isRevoked", "revokeCert", REVOKE_GAS_LIMIT)
+
+
+def revoke_certificate_on_chain(cert_hash: str) -> bool:
+    """Revoke a certificate hash via revokeCert(bytes32), emitting CertRevoked.
+
+    Returns True if the hash is revoked on chain after the call. Like
+    anchoring, only the send fails over; the receipt is polled separately.
+    """
+    if BLOCKCHAIN_BYPASS:
+        print(f"DEBUG: Bypassing blockchain revocation for hash {cert_hash} (BLOCKCHAIN_BYPASS)")
+        return True
+
+    if not CONTRACT_ADDRESS:
+        return False
+    try:
+        done, tx_hash = _rpc(_submit_revocation, cert_hash)
+        return done if tx_hash is None else _await_receipt(tx_hash)
+    except ContractRevertedError as e:
+        print(f"Contract logic error: {e}")
+        return False
+    except ChainUnavailableError as e:
+        print(f"Blockchain revocation error: {e}")
+        return False
+
+
+def _contract_deployed(w3) -> bool:
+    contract = _get_contract(w3)
+    return bool(contract) and len(w3.eth.get_code(contract.address)) > 0
+
+
+def get_blockchain_status() -> dict:
+    """Probe every RPC endpoint and return connectivity and contract readiness.
+
+    This talks to the nodes; request handlers should use the cached snapshot
+    in services/health_service.py instead.
+    """
+    rpc_pool.probe()
+    best = rpc_pool.best()
+    contract_ready = False
+    if best is not None and CONTRACT_ADDRESS:
+        try:
+            contract_ready = _rpc(_contract_deployed)
+        except (ChainUnavailableError, ContractRevertedError):
+            pass
     return {
-        "node_url": BLOCKCHAIN_NODE,
-        "connected": bool(connected),
+        "node_url": best.url if best else None,
+        "connected": best is not None,
         "contract_address": CONTRACT_ADDRESS or "",
-        "contract_ready": _get_contract() is not None,
+        "contract_ready": contract_ready,
+        "bypass": BLOCKCHAIN_BYPASS,
+        "endpoints": rpc_pool.snapshot(),
     }
@@ -0,0 +1,91 @@
+"""Signed certificate bundles for offline verification.
+
+Bundles are signed with an Ed25519 server key. The format (canonical JSON,
+signed fields, key id) is defined in ``bundle_verifier.py`` so the server and
+the standalone verifier cannot drift apart.
+
+Without BUNDLE_SIGNING_KEY_FILE the key is generated at startup. It must be
+generated once per server, not per worker, or bundles would verify against
+only one worker's public key: gunicorn creates it in the master before
+forking (``preload_signing_key``), and other multi-worker setups
+(WEB_CONCURRENCY > 1) must configure the key file.
+"""
+
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from bundle_verifier import BUNDLE_VERSION, key_id, signing_payload
+from config import BUNDLE_SIGNING_KEY_FILE, CONTRACT_ADDRESS, WEB_CONCURRENCY
+from utils import _canonicalise_certificate_payload
+
+_signing_key: Optional[Ed25519PrivateKey] = None
+
+
+def _create_signing_key() -> Ed25519PrivateKey:
+    if BUNDLE_SIGNING_KEY_FILE:
+        with open(BUNDLE_SIGNING_KEY_FILE, "rb") as f:
+            key = serialization.load_pem_private_key(f.read(), password=None)
+        if not isinstance(key, Ed25519PrivateKey):
+            raise ValueError("BUNDLE_SIGNING_KEY_FILE is not an Ed25519 private key")
+        return key
+    print("Warning: BUNDLE_SIGNING_KEY_FILE not set, using an ephemeral bundle signing key")
+    return Ed25519PrivateKey.generate()
+
+
+def preload_signing_key() -> None:
+    """Create the signing key in a pre-fork master so every worker inherits it."""
+    global _signing_key
+    if _signing_key is None:
+        _signing_key = _create_signing_key()
+
+
+def get_signing_key() -> Ed25519PrivateKey:
+    """Load the bundle signing key on first use."""
+    global _signing_key
+    if _signing_key is None:
+        if not BUNDLE_SIGNING_KEY_FILE and WEB_CONCURRENCY > 1:
+            # Each worker would generate its own key
+            raise RuntimeError("BUNDLE_SIGNING_KEY_FILE is required with WEB_CONCURRENCY > 1")
+        _signing_key = _create_signing_key()
+    return _signing_key
+
+
+def get_public_key_info() -> dict:
+    """Public half of the signing key in the formats relying parties need."""
+    public_key = get_signing_key().public_key()
+    raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    pem = public_key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return {
+        "algorithm": "Ed25519",
+        "key_id": key_id(public_key),
+        "public_key": base64.b64encode(raw).decode(),
+        "public_key_pem": pem.decode(),
+    }
+
+
+def build_bundle(doc: dict, anchored_on_chain: bool) -> dict:
+    """Build and sign a bundle for a stored certificate document."""
+    key = get_signing_key()
+    created_at = doc.get("created_at")
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "certificate": _canonicalise_certificate_payload(doc),
+        "hash": doc["hash"],
+        "hash_algorithm": "sha256",
+        "anchoring": {
+            "anchored_on_chain": bool(anchored_on_chain),
+            "contract_address": CONTRACT_ADDRESS or "",
+            "issued_by": doc.get("issued_by"),
+            "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        },
+        "signed_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "key_id": key_id(key.public_key()),
+    }
+    bundle["signature"] = base64.b64encode(key.sign(signing_payload(bundle))).decode()
+    return bundle
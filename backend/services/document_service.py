@@ -0,0 +1,112 @@
+"""Anchoring and verification of certificate files (PDFs, scans).
+
+Uploads are hashed with SHA-256 while they stream in: received data is
+collected into DOCUMENT_CHUNK_BYTES pieces that are hashed off the event loop,
+so a worker holds about one chunk per upload however large the file is.
+
+The digest is stored on the certificate record (``document_hash``) and the
+chain anchors a binding of the two, sha256(certificate hash || document
+hash), so the anchor proves that this file belongs to this certificate
+rather than only that the file once existed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import AsyncIterator, Optional, Tuple
+
+from config import DOCUMENT_CHUNK_BYTES
+from services.blockchain_service import (
+    ChainUnavailableError,
+    store_certificate_on_chain,
+    verify_certificate_on_chain,
+)
+from services.verification_service import check_certificate
+from utils import find_certificate_by_document
+
+
+class DocumentTooLargeError(Exception):
+    """The upload is larger than allowed."""
+
+
+async def digest_stream(chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of a streamed body, read at most ``max_bytes``."""
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise DocumentTooLargeError(f"file exceeds {max_bytes} bytes")
+        buffer += chunk
+        if len(buffer) >= DOCUMENT_CHUNK_BYTES:
+            # hashlib releases the GIL on large inputs
+            await asyncio.to_thread(digest.update, bytes(buffer))
+            buffer.clear()
+    if buffer:
+        digest.update(buffer)
+    return digest.hexdigest(), size
+
+
+def binding_hash(cert_hash: str, document_hash: str) -> str:
+    """Anchored value tying a file digest to a certificate hash."""
+    return hashlib.sha256(bytes.fromhex(cert_hash) + bytes.fromhex(document_hash)).hexdigest()
+
+
+def anchor_document(cert_hash: str, document_hash: str) -> bool:
+    """Anchor the certificate/file binding on chain. Returns whether it is anchored."""
+    try:
+        return store_certificate_on_chain(binding_hash(cert_hash, document_hash))
+    except Exception:
+        return False
+
+
+def check_document(document_hash: str, session=None) -> dict:
+    """Verify an uploaded file by its digest.
+
+    Returns the certificate it is attached to (if any), whether the binding
+    is anchored (None when the chain could not be checked), the overall
+    ``status`` as for ``check_certificate`` and the failure reasons.
+    """
+    doc = find_certificate_by_document(document_hash, session=session, read=True)
+    if not doc:
+        return {
+            "status": "not_found",
+            "document_hash": document_hash,
+            "certificate_hash": None,
+            "document_anchored": None,
+            "reasons": ["no certificate has this document attached"],
+        }
+
+    record = check_certificate(doc["hash"], session=session)
+    try:
+        anchored: Optional[bool] = bool(verify_certificate_on_chain(binding_hash(doc["hash"], document_hash)))
+    except ChainUnavailableError:
+        anchored = None
+    except Exception:
+        anchored = False
+
+    reasons = list(record["reasons"])
+    if anchored is None:
+        if "blockchain unavailable" not in reasons:
+            reasons.append("blockchain unavailable")
+    elif not anchored:
+        reasons.append("document not anchored on blockchain")
+
+    if record["status"] in ("revoked", "invalid", "not_found"):
+        status = record["status"]
+    elif anchored is False:
+        status = "invalid"
+    elif anchored is None or record["status"] == "chain_unavailable":
+        status = "chain_unavailable"
+    else:
+        status = "valid"
+
+    return {
+        "status": status,
+        "document_hash": document_hash,
+        "certificate_hash": doc["hash"],
+        "document_anchored": anchored,
+        "reasons": reasons,
+    }
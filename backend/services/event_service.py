@@ -0,0 +1,176 @@
+"""Certificate status events and their server-sent event (SSE) stream.
+
+Issuance publishes one event per step of a certificate's life (persisted,
+anchor_submitted, confirmed, failed) into the repository's event store, so
+every worker sees them and clients can resume a stream with ``Last-Event-ID``
+(the event's ObjectId). Events expire after EVENT_TTL_SECONDS.
+
+A stream polls the store every EVENT_STREAM_POLL_SECONDS with an
+indexed query; events published by the same worker wake it immediately.
+ObjectIds from different workers are only ordered to the second, so each
+poll re-reads a short overlap window and skips events already sent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from config import BLOCKCHAIN_BYPASS, EVENT_STREAM_HEARTBEAT_SECONDS, EVENT_STREAM_POLL_SECONDS
+from repositories import get_repository
+from services.blockchain_service import store_certificate_on_chain
+
+PERSISTED = "persisted"
+ANCHOR_SUBMITTED = "anchor_submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+# At most this many events are sent per poll; the rest follow on the next one
+BATCH_SIZE = 500
+# Events inserted this close together may carry out-of-order ObjectIds
+OVERLAP = timedelta(seconds=2)
+
+# Wakes this worker's streams when it publishes (set from any thread)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_published: Optional[asyncio.Event] = None
+
+
+def _notify() -> None:
+    global _published
+    if _published is not None:
+        # Replace the event so every stream waiting on the old one wakes once
+        published, _published = _published, asyncio.Event()
+        published.set()
+
+
+def publish(cert_hash: str, issued_by: str, event_status: str, **details) -> None:
+    """Record a status change for ``cert_hash``. Best-effort: never raises."""
+    try:
+        get_repository().insert_event({
+            "hash": cert_hash,
+            "issued_by": issued_by,
+            "status": event_status,
+            "details": details,
+            "created_at": datetime.utcnow(),
+        })
+    except Exception as e:
+        print(f"Warning: could not publish {event_status} event for {cert_hash}: {e}")
+        return
+    if _loop is not None:
+        try:
+            _loop.call_soon_threadsafe(_notify)
+        except RuntimeError:
+            pass  # loop already closed
+
+
+def anchor_with_events(cert_hash: str, issued_by: str) -> bool:
+    """Anchor ``cert_hash`` on chain, publishing anchor_submitted and then
+    confirmed or failed, and record the outcome on the certificate (not with
+    BLOCKCHAIN_BYPASS). Returns whether it is anchored."""
+    submitted = []
+
+    def on_submitted(tx_hash: str) -> None:
+        submitted.append(tx_hash)
+        publish(cert_hash, issued_by, ANCHOR_SUBMITTED, tx_hash=tx_hash)
+
+    try:
+        ok = store_certificate_on_chain(cert_hash, on_submitted=on_submitted)
+    except Exception:
+        ok = False
+    tx_hash = submitted[0] if submitted else None
+    # Read by export_snapshot.py, which only ships anchored hashes. A bypassed
+    # "success" never touched the chain, so the outcome stays unrecorded
+    if not BLOCKCHAIN_BYPASS:
+        try:
+            get_repository().mark_anchored(cert_hash, ok, tx_hash)
+        except Exception as e:
+            print(f"Warning: could not record anchoring outcome for {cert_hash}: {e}")
+    if ok:
+        publish(cert_hash, issued_by, CONFIRMED, tx_hash=tx_hash)
+    else:
+        publish(cert_hash, issued_by, FAILED, tx_hash=tx_hash)
+    return ok
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[ObjectId]:
+    if not event_id:
+        return None
+    try:
+        return ObjectId(event_id)
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid event id")
+
+
+def _fetch(issued_by: str, after: ObjectId, until: Optional[ObjectId] = None) -> list:
+    return get_repository().find_events(issued_by, after, until, limit=BATCH_SIZE)
+
+
+def _overlap_start(event_id: ObjectId) -> ObjectId:
+    return ObjectId.from_datetime(event_id.generation_time - OVERLAP)
+
+
+def _format(event: dict) -> str:
+    data = {
+        "hash": event["hash"],
+        "status": event["status"],
+        "at": event["created_at"].isoformat(),
+        **event.get("details", {}),
+    }
+    return f"id: {event['_id']}\nevent: {event['status']}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream(issued_by: str, after: Optional[ObjectId], is_disconnected) -> AsyncIterator[str]:
+    """Yield SSE frames for ``issued_by``'s events after ``after`` until the client leaves.
+
+    Without ``after`` the stream starts at the newest event, i.e. only
+    changes from now on are sent.
+    """
+    global _loop, _published
+    if _published is None:
+        _loop = asyncio.get_running_loop()
+        _published = asyncio.Event()
+
+    if after is None:
+        newest = await asyncio.to_thread(get_repository().newest_event, issued_by)
+        after = newest["_id"] if newest else ObjectId.from_datetime(datetime.utcnow())
+
+    # Events at or just before the starting point count as already sent
+    recent = await asyncio.to_thread(_fetch, issued_by, _overlap_start(after), after)
+    seen: Dict[ObjectId, None] = dict.fromkeys(e["_id"] for e in recent)
+
+    # Tell EventSource clients how long to wait before reconnecting (ms)
+    yield f"retry: {int(EVENT_STREAM_POLL_SECONDS * 1000) or 1000}\n\n"
+    idle = 0.0
+    catching_up = False
+    while not await is_disconnected():
+        waiter = _published
+        lower = after if catching_up else _overlap_start(after)
+        events = await asyncio.to_thread(_fetch, issued_by, lower)
+        fresh = [e for e in events if e["_id"] not in seen]
+        for event in fresh:
+            yield _format(event)
+            seen[event["_id"]] = None
+            after = max(after, event["_id"])
+        horizon = _overlap_start(after)
+        seen = {event_id: None for event_id in seen if event_id >= horizon}
+
+        catching_up = len(events) == BATCH_SIZE
+        if catching_up:
+            continue
+        if fresh:
+            idle = 0.0
+        elif idle >= EVENT_STREAM_HEARTBEAT_SECONDS:
+            # Comment frame keeps proxies from closing an idle connection
+            yield ": keepalive\n\n"
+            idle = 0.0
+        started = _loop.time()
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout=EVENT_STREAM_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        idle += _loop.time() - started
@@ -0,0 +1,96 @@
+"""Cached health and readiness snapshot.
+
+A background task pings the database and the RPC node every
+HEALTH_REFRESH_SECONDS and stores the result. Probe endpoints only read the
+snapshot, so probing at any rate costs nothing and never blocks on an
+unhealthy dependency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Optional
+
+import tracing
+from config import HEALTH_STALE_AFTER_SECONDS
+from services.blockchain_service import get_blockchain_status
+from services.revocation_service import revocations
+from repositories import get_repository
+
+
+def _check_database() -> dict:
+    started = time.perf_counter()
+    try:
+        get_repository().ping()
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def _check_blockchain() -> dict:
+    try:
+        status = get_blockchain_status()
+        return {"ok": status["connected"], **status}
+    except Exception as e:
+        return {"ok": False, "connected": False, "contract_ready": False, "error": str(e)}
+
+
+class HealthMonitor:
+    def __init__(self) -> None:
+        self._snapshot: Optional[dict] = None
+        self._refreshed_at: Optional[float] = None
+
+    def refresh(self) -> dict:
+        """Run all checks now (blocking) and store the snapshot.
+
+        The database result is published before the (slower) chain check, so a
+        fresh worker can report ready without waiting for the RPC node.
+        """
+        previous_chain = (self._snapshot or {}).get("blockchain", {"ok": False, "pending": True})
+        self._publish(_check_database(), previous_chain)
+        return self._publish(self._snapshot["database"], _check_blockchain())
+
+    def _publish(self, database: dict, blockchain: dict) -> dict:
+        snapshot = {
+            "database": database,
+            "blockchain": blockchain,
+            "revocations": {"loaded": revocations.loaded, "count": len(revocations)},
+            "checked_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        }
+        self._snapshot = snapshot
+        self._refreshed_at = time.monotonic()
+        return snapshot
+
+    def readiness(self) -> dict:
+        """Snapshot plus the overall verdict. The database and a loaded
+        revocation set are required to be ready; the chain is best-effort and
+        reported for visibility."""
+        if self._snapshot is None:
+            return {"ready": False, "reason": "no health check has completed yet"}
+        age = time.monotonic() - self._refreshed_at
+        result = {"ready": False, "age_seconds": round(age, 1), **self._snapshot}
+        if age > HEALTH_STALE_AFTER_SECONDS:
+            result["reason"] = "health snapshot is stale"
+        elif not self._snapshot["database"]["ok"]:
+            result["reason"] = "database unavailable"
+        elif not revocations.loaded:
+            result["reason"] = "revocation set not loaded yet"
+        else:
+            result["ready"] = True
+        return result
+
+
+health_monitor = HealthMonitor()
+
+
+async def refresh_health_periodically(interval: float) -> None:
+    """Background task keeping ``health_monitor`` fresh."""
+    while True:
+        try:
+            with tracing.trace("job health_refresh"):
+                await asyncio.to_thread(health_monitor.refresh)
+        except Exception as e:
+            print(f"Warning: health refresh failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,92 @@
+"""Idempotency-Key store.
+
+Each key is stored per principal together with a fingerprint of the request
+payload. The first request claims the key ("in_progress"), does the work and
+stores its response ("completed") with the causal token of its writes.
+Retries replay the stored response and token, and concurrent duplicates wait
+until the original finishes. Keys expire after IDEMPOTENCY_TTL_SECONDS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple
+
+from config import IDEMPOTENCY_LOCK_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+from repositories import get_repository
+
+POLL_INTERVAL_SECONDS = 0.1
+
+
+class IdempotencyError(Exception):
+    def __init__(self, message: str, status_code: int = 409):
+        self.message = message
+        self.status_code = status_code
+
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
+
+
+def _try_claim(key_id: str, request_fingerprint: str) -> Optional[dict]:
+    """Claim the key. Returns None if claimed, else the existing record."""
+    repository = get_repository()
+    now = datetime.utcnow()
+    if repository.insert_idempotency_key({
+        "_id": key_id,
+        "fingerprint": request_fingerprint,
+        "state": "in_progress",
+        "created_at": now,
+    }):
+        return None
+
+    existing = repository.get_idempotency_key(key_id)
+    if existing is None:
+        # Expired or aborted between our insert and read; try again
+        return _try_claim(key_id, request_fingerprint)
+
+    stale_before = now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    if existing["state"] == "in_progress" and existing["created_at"] < stale_before:
+        # The original worker died mid-request; take the key over
+        if repository.take_over_idempotency_key(key_id, existing["created_at"], request_fingerprint, now):
+            return None
+        existing = repository.get_idempotency_key(key_id) or existing
+    return existing
+
+
+async def begin(scope: str, key: str, request_fingerprint: str) -> Tuple[str, Optional[dict]]:
+    """Claim an idempotency key for a request.
+
+    Returns ``(key_id, None)`` when the caller should do the work, or
+    ``(key_id, record)`` with the completed record to replay. Raises
+    IdempotencyError when the key was used for a different payload or the
+    original request is still running after the wait timeout.
+    """
+    key_id = f"{scope}:{key}"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        existing = await asyncio.to_thread(_try_claim, key_id, request_fingerprint)
+        if existing is None:
+            return key_id, None
+        if existing["fingerprint"] != request_fingerprint:
+            raise IdempotencyError("Idempotency-Key was already used with a different request payload", 422)
+        if existing["state"] == "completed":
+            return key_id, existing
+        if loop.time() >= deadline:
+            raise IdempotencyError("A request with this Idempotency-Key is still in progress", 409)
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+def complete(key_id: str, status_code: int, body: Any, causal_token: Optional[str] = None) -> None:
+    get_repository().complete_idempotency_key(key_id, status_code, body, causal_token)
+
+
+def abort(key_id: str) -> None:
+    """Release a key whose request failed so a retry can run it again."""
+    get_repository().abort_idempotency_key(key_id)
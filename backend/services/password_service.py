@@ -0,0 +1,185 @@
+"""Password hashing with a configurable, calibrated bcrypt work factor.
+
+BCRYPT_ROUNDS sets the cost of new hashes. A stored hash made with any other
+cost is reported by ``needs_update`` and re-hashed on the user's next
+successful login, so changing the setting migrates passwords up or down as
+users sign in.
+
+"auto" times bcrypt on this machine once and picks the highest cost that
+hashes within BCRYPT_TARGET_MS (never below BCRYPT_MIN_ROUNDS). Hosts can
+pick different costs, so auto only re-hashes passwords below the
+BCRYPT_MIN_ROUNDS floor, rather than flipping hashes between hosts; the cost
+it picked is logged so it can be pinned. Calibration runs at startup, not on
+the first login. Hash and verify times are recorded per process for capacity
+planning.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import tracing
+from config import BCRYPT_MIN_ROUNDS, BCRYPT_ROUNDS, BCRYPT_TARGET_MS
+
+# bcrypt's own bounds for the cost parameter
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+# Cheap cost timed first; higher costs are extrapolated from it
+_PROBE_ROUNDS = 8
+
+_pwd_context = None
+_rounds: Optional[int] = None
+_lock = threading.Lock()
+
+
+def measure_hash_seconds(rounds: int, samples: int = 3) -> float:
+    """Fastest of ``samples`` bcrypt hashes at ``rounds`` on this machine."""
+    from passlib.hash import bcrypt
+
+    hasher = bcrypt.using(rounds=rounds)
+    best = math.inf
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration password")
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def calibrate_rounds(target_ms: float = BCRYPT_TARGET_MS, min_rounds: int = BCRYPT_MIN_ROUNDS) -> int:
+    """Highest bcrypt cost whose hash takes at most ``target_ms`` here (at least ``min_rounds``)."""
+    # Every extra round doubles the work, so extrapolate from a cheap cost...
+    probe = measure_hash_seconds(_PROBE_ROUNDS)
+    target = target_ms / 1000
+    rounds = _PROBE_ROUNDS + math.floor(math.log2(target / probe)) if target > 0 else MIN_ROUNDS
+    rounds = max(MIN_ROUNDS, min(MAX_ROUNDS, rounds))
+    # ...then confirm with real hashes at the chosen cost, which include the fixed overhead
+    while rounds > max(MIN_ROUNDS, min_rounds) and measure_hash_seconds(rounds, samples=2) > target:
+        rounds -= 1
+    return max(rounds, min_rounds)
+
+
+def is_auto() -> bool:
+    return BCRYPT_ROUNDS.strip().lower() == "auto"
+
+
+def configured_rounds() -> int:
+    """The cost new hashes use: BCRYPT_ROUNDS, calibrated once if it is "auto"."""
+    global _rounds
+    if _rounds is None:
+        with _lock:
+            if _rounds is None:
+                if is_auto():
+                    _rounds = calibrate_rounds()
+                    print(
+                        f"Calibrated bcrypt cost {_rounds} for a {BCRYPT_TARGET_MS:.0f} ms target; "
+                        f"set BCRYPT_ROUNDS={_rounds} to enforce it on every host"
+                    )
+                else:
+                    _rounds = int(BCRYPT_ROUNDS)
+    return _rounds
+
+
+def get_pwd_context():
+    """passlib context hashing at ``configured_rounds()`` (imported and built on first use).
+
+    A pinned cost is both minimum and maximum, so that ``needs_update`` flags
+    hashes made with a higher cost as well as a lower one. A calibrated cost
+    only sets the default: the minimum is the BCRYPT_MIN_ROUNDS floor.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        rounds = configured_rounds()
+        if is_auto():
+            limits = {"bcrypt__min_rounds": BCRYPT_MIN_ROUNDS}
+        else:
+            limits = {"bcrypt__min_rounds": rounds, "bcrypt__max_rounds": rounds}
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            **limits,
+        )
+    return _pwd_context
+
+
+class HashingStats:
+    """Count and latency of bcrypt operations in this process."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self._window = window
+        self._count: Dict[str, int] = {}
+        self._total: Dict[str, float] = {}
+        self._recent: Dict[str, Deque[float]] = {}
+
+    def record(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            self._count[operation] = self._count.get(operation, 0) + 1
+            self._total[operation] = self._total.get(operation, 0.0) + seconds
+            self._recent.setdefault(operation, deque(maxlen=self._window)).append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = {}
+            for operation, count in self._count.items():
+                recent = sorted(self._recent[operation])
+                operations[operation] = {
+                    "count": count,
+                    "mean_ms": round(self._total[operation] / count * 1000, 1),
+                    # Percentiles over the last `window` operations
+                    "p50_ms": round(recent[len(recent) // 2] * 1000, 1),
+                    "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1),
+                    "max_ms": round(recent[-1] * 1000, 1),
+                }
+        snapshot = {"rounds": _rounds, "target_ms": BCRYPT_TARGET_MS, "operations": operations}
+        verify = operations.get("verify")
+        if verify and verify["mean_ms"]:
+            # Each login holds a core for one verify (plus a re-hash, rarely)
+            snapshot["logins_per_core_per_second"] = round(1000 / verify["mean_ms"], 1)
+        return snapshot
+
+
+stats = HashingStats()
+
+
+def hash_password(password: str) -> str:
+    context = get_pwd_context()
+    started = time.perf_counter()
+    with tracing.span("auth.bcrypt_hash"):
+        hashed = context.hash(password)
+    stats.record("hash", time.perf_counter() - started)
+    return hashed
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    # Built (and calibrated) outside the timed section
+    context = get_pwd_context()
+    started = time.perf_counter()
+    with tracing.span("auth.bcrypt_verify"):
+        valid = context.verify(password, hashed_password)
+    stats.record("verify", time.perf_counter() - started)
+    return valid
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check ``password`` and return ``(valid, new_hash)``.
+
+    ``new_hash`` is set when the password is valid but its stored hash was
+    made with another cost, and should replace it.
+    """
+    if not verify_password(password, hashed_password):
+        return False, None
+    context = get_pwd_context()
+    if not context.needs_update(hashed_password):
+        return True, None
+    started = time.perf_counter()
+    with tracing.span("auth.bcrypt_rehash"):
+        new_hash = context.hash(password)
+    stats.record("rehash", time.perf_counter() - started)
+    return True, new_hash
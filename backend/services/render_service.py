@@ -0,0 +1,252 @@
+"""Printable certificates: one-page PDFs with a verification QR code.
+
+Each certificate is rendered as a small, self-contained PDF (A4 landscape,
+built-in Helvetica, vector QR code) whose QR code encodes RENDER_VERIFY_URL
+for the certificate hash. Pages are written directly rather than through a
+layout engine, which keeps a page to a few milliseconds and a few KB, and the
+output is deterministic: rendering a certificate twice gives the same bytes.
+
+``render_batch`` renders an iterable of certificates in a process pool, in
+chunks of RENDER_CHUNK_SIZE, and hands each finished file to a sink (a zip
+archive or a directory). Only a couple of chunks per worker are in flight, so
+memory stays flat and the certificate cursor is read at the pace of rendering.
+
+The QR encoder is segno (pure Python, no dependencies).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from config import RENDER_CHUNK_SIZE, RENDER_VERIFY_URL, RENDER_WORKERS
+
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595  # A4 landscape, in points
+TEXT_MAX_WIDTH = 700
+QR_SIZE = 120
+# Fixed QR mask pattern: any mask decodes, and choosing the best of eight is
+# most of segno's encoding time
+QR_MASK = 2
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the AFM
+_HELVETICA_WIDTHS = dict(zip(
+    map(chr, range(32, 127)),
+    (278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+     556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+     1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+     667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+     333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+     556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584),
+))
+
+ProgressCallback = Callable[[int], None]
+
+
+def _text_width(text: str, size: float) -> float:
+    return sum(_HELVETICA_WIDTHS.get(c, 556) for c in text) * size / 1000
+
+
+def _pdf_string(text: str) -> bytes:
+    """PDF literal string in WinAnsi encoding (unmappable characters become '?')."""
+    encoded = text.encode("cp1252", "replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _centred(text: str, size: float, y: float) -> bytes:
+    """Text centred on the page, shrunk to fit TEXT_MAX_WIDTH."""
+    width = _text_width(text, size)
+    if width > TEXT_MAX_WIDTH:
+        size, width = size * TEXT_MAX_WIDTH / width, TEXT_MAX_WIDTH
+    x = (PAGE_WIDTH - width) / 2
+    return b"BT /F1 %.2f Tf %.2f %.2f Td %s Tj ET\n" % (size, x, y, _pdf_string(text))
+
+
+def _text(text: str, size: float, x: float, y: float) -> bytes:
+    return b"BT /F1 %.2f Tf %.2f %.2f Td %s Tj ET\n" % (size, x, y, _pdf_string(text))
+
+
+def _qr_code(data: str, x: float, y: float, size: float) -> bytes:
+    """QR code as filled rectangles, one per run of dark modules, with its top-left at (x, y)."""
+    import segno
+
+    matrix = segno.make(data, error="m", micro=False, mask=QR_MASK).matrix
+    module = size / len(matrix)
+    ops = []
+    for row_index, row in enumerate(matrix):
+        top = y - (row_index + 1) * module
+        col = 0
+        while col < len(row):
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < len(row) and row[col]:
+                col += 1
+            ops.append(b"%.3f %.3f %.3f %.3f re" % (x + start * module, top, (col - start) * module, module))
+    return b"0 g\n" + b"\n".join(ops) + b"\nf\n"
+
+
+def _pdf(content: bytes, title: str) -> bytes:
+    """Single-page PDF with ``content`` as its (compressed) content stream."""
+    stream = zlib.compress(content)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT),
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Title %s /Producer (cert-verification) >>" % _pdf_string(title),
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info 6 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_certificate(cert: dict, verify_url: str = RENDER_VERIFY_URL) -> bytes:
+    """One-page PDF for a certificate (API form, hex ``hash``)."""
+    url = verify_url.format(hash=cert["hash"])
+    content = bytearray()
+    # Double frame
+    content += b"q 0.16 0.24 0.42 RG 3 w 20 20 %d %d re S 0.8 w 30 30 %d %d re S Q\n" % (
+        PAGE_WIDTH - 40, PAGE_HEIGHT - 40, PAGE_WIDTH - 60, PAGE_HEIGHT - 60)
+
+    content += b"0.16 0.24 0.42 rg\n"
+    content += _centred(cert.get("institution", ""), 24, 500)
+    content += _centred("CERTIFICATE", 40, 430)
+    content += b"0 g\n"
+    content += _centred("This is to certify that", 14, 385)
+    content += _centred(cert.get("student_name", ""), 32, 335)
+    content += _centred("has been awarded the degree of", 14, 295)
+    content += _centred(cert.get("degree", ""), 22, 255)
+    details = [cert.get("honours"), f"Class of {cert['graduation_year']}" if cert.get("graduation_year") else None]
+    content += _centred("  -  ".join(str(d) for d in details if d), 14, 222)
+    if cert.get("reg_number"):
+        content += _centred(f"Registration number: {cert['reg_number']}", 11, 200)
+
+    # Verification block: QR code bottom right, hash and URL bottom left
+    qr_x, qr_top = PAGE_WIDTH - 50 - QR_SIZE, 60 + QR_SIZE
+    content += _qr_code(url, qr_x, qr_top, QR_SIZE)
+    content += _text("Scan to verify", 8, qr_x + (QR_SIZE - _text_width("Scan to verify", 8)) / 2, 48)
+    content += _text("Certificate hash", 8, 50, 90)
+    content += _text(cert["hash"], 8, 50, 78)
+    content += _text(f"Verify at {url}" if len(url) < 110 else "Verify by scanning the QR code", 8, 50, 60)
+
+    return _pdf(bytes(content), f"{cert.get('student_name', '')} - {cert.get('degree', '')}")
+
+
+def certificate_filename(cert: dict) -> str:
+    """File name for a rendered certificate, unique per certificate hash."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", cert.get("student_name", "")).strip("-")[:40] or "certificate"
+    return f"{slug}-{cert['hash'][:16]}.pdf"
+
+
+def _render_chunk(certs: List[dict], verify_url: str) -> List[Tuple[str, bytes]]:
+    """Worker task: render a chunk of certificates to (file name, PDF) pairs."""
+    return [(certificate_filename(cert), render_certificate(cert, verify_url)) for cert in certs]
+
+
+def _chunked(items: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ZipSink:
+    """Writes rendered files into a zip archive, one entry at a time."""
+
+    def __init__(self, path) -> None:
+        # PDFs are already compressed; storing them keeps writing cheap
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+
+    def write(self, name: str, data: bytes) -> None:
+        self._zip.writestr(name, data)
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class DirectorySink:
+    """Writes rendered files into a directory."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name: str, data: bytes) -> None:
+        target = os.path.join(self.path, name)
+        # Never leave a half-written PDF behind
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def render_batch(
+    certificates: Iterable[dict],
+    sink,
+    workers: int = RENDER_WORKERS,
+    chunk_size: int = RENDER_CHUNK_SIZE,
+    verify_url: str = RENDER_VERIFY_URL,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """Render ``certificates`` into ``sink`` (anything with ``write(name, data)``).
+
+    ``workers`` processes render chunks of ``chunk_size`` certificates
+    (0 = one per CPU; 1 renders in this process). ``progress`` is called with
+    the running total after every chunk. Returns how many were rendered.
+    """
+    workers = workers or os.cpu_count() or 1
+    done = 0
+
+    def collect(files: List[Tuple[str, bytes]]) -> None:
+        nonlocal done
+        for name, data in files:
+            sink.write(name, data)
+        done += len(files)
+        if progress:
+            progress(done)
+
+    if workers == 1:
+        for chunk in _chunked(certificates, chunk_size):
+            collect(_render_chunk(chunk, verify_url))
+        return done
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in _chunked(certificates, chunk_size):
+            pending.add(pool.submit(_render_chunk, chunk, verify_url))
+            # Keep two chunks per worker in flight; wait before reading more
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future.result())
+        for future in pending:
+            collect(future.result())
+    return done
@@ -0,0 +1,103 @@
+"""In-memory certificate revocation set.
+
+Every worker keeps the hashes of all revoked certificates as 32-byte digests
+in a set, so checking a hash during verification is an O(1) lookup with no
+database or RPC round trip. The set is loaded on startup and kept fresh by
+pulling recent revocations (revocations made by this worker are added
+immediately). It is a fast path only: verification still honours the
+revoked flag of the database record.
+
+``revoked_at`` is stamped by whichever server revoked the certificate and the
+row may be committed a little later, so the refresh cursor is the newest
+``revoked_at`` read from the database and every refresh re-reads an overlap
+window before it (clock skew plus one refresh interval).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+import tracing
+from config import REVOCATION_CLOCK_SKEW_SECONDS, REVOCATION_REFRESH_SECONDS
+from utils import get_revoked_hashes
+
+REFRESH_OVERLAP = timedelta(seconds=REVOCATION_CLOCK_SKEW_SECONDS + REVOCATION_REFRESH_SECONDS)
+
+
+class RevocationSet:
+    def __init__(self) -> None:
+        self._hashes: Set[bytes] = set()
+        self._last_seen: Optional[datetime] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __contains__(self, cert_hash: str) -> bool:
+        return bytes.fromhex(cert_hash) in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def add(self, cert_hash: str) -> None:
+        """Add a revocation made or seen by this worker. Does not move the refresh
+        cursor: revocations stamped earlier elsewhere must still be pulled."""
+        with self._lock:
+            self._hashes.add(bytes.fromhex(cert_hash))
+
+    def load(self) -> int:
+        """Replace the set with every revoked hash in the database."""
+        hashes: Set[bytes] = set()
+        last_seen = None
+        for cert_hash, revoked_at in get_revoked_hashes():
+            hashes.add(bytes.fromhex(cert_hash))
+            if revoked_at and (last_seen is None or revoked_at > last_seen):
+                last_seen = revoked_at
+        with self._lock:
+            self._hashes = hashes
+            self._last_seen = last_seen
+            self._loaded = True
+        return len(hashes)
+
+    def refresh(self) -> int:
+        """Pull recent revocations. Returns how many were new to this worker."""
+        if not self._loaded:
+            return self.load()
+        last_seen = self._last_seen
+        since = last_seen - REFRESH_OVERLAP if last_seen is not None else None
+        count = 0
+        for cert_hash, revoked_at in get_revoked_hashes(since=since):
+            digest = bytes.fromhex(cert_hash)
+            with self._lock:
+                if digest not in self._hashes:
+                    self._hashes.add(digest)
+                    count += 1
+            if revoked_at and (last_seen is None or revoked_at > last_seen):
+                last_seen = revoked_at
+        with self._lock:
+            if last_seen is not None and (self._last_seen is None or last_seen > self._last_seen):
+                self._last_seen = last_seen
+        return count
+
+
+revocations = RevocationSet()
+
+
+async def refresh_revocations_periodically(interval: float) -> None:
+    """Background task keeping ``revocations`` up to date.
+
+    The first run loads the full set; until that succeeds it retries every
+    second since readiness depends on it.
+    """
+    while True:
+        try:
+            with tracing.trace("job revocation_refresh"):
+                await asyncio.to_thread(revocations.refresh)
+        except Exception as e:
+            print(f"Warning: revocation refresh failed: {e}")
+        await asyncio.sleep(interval if revocations.loaded else min(interval, 1.0))
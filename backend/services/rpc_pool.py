@@ -0,0 +1,174 @@
+"""Pool of blockchain RPC endpoints with latency-aware failover.
+
+Every endpoint has its own Web3 provider and circuit breaker. The health
+monitor probes all endpoints in the background (``RpcPool.probe``), recording
+each node's block height and a moving average of its response time. Calls
+then go to the fastest endpoint that is neither failing, behind the highest
+known block by more than ``max_block_lag``, nor circuit-open, and fail over
+to the next candidate when it errors.
+
+A failed call is run again on the next endpoint, so ``fn(w3, ...)`` must be
+safe to repeat: send a transaction in one call and poll for its receipt in
+separate ones rather than waiting for it in the same call.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import tracing
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Weight of the newest probe in the latency moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+
+class ChainUnavailableError(Exception):
+    """No RPC endpoint could be reached, or all their circuits are open."""
+
+
+class RpcEndpoint:
+    def __init__(self, url: str, timeout: float, failure_threshold: int, recovery_timeout: float) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(
+            f"blockchain_rpc:{url}",
+            failure_threshold=failure_threshold,
+            recovery_timeout=recovery_timeout,
+        )
+        self.latency_ms: Optional[float] = None
+        self.block_number: Optional[int] = None
+        self.healthy = True
+        self._w3 = None
+
+    @property
+    def w3(self):
+        if self._w3 is None:
+            from web3 import Web3
+            from web3.exceptions import ContractLogicError
+
+            # A reverted call means the node answered, so it does not trip the breaker
+            self.breaker.ignored_exceptions = (ContractLogicError,)
+            provider = Web3.HTTPProvider(self.url, request_kwargs={"timeout": self.timeout})
+            # Drop web3's built-in retry of failed requests: failing over to the
+            # next endpoint is faster than retrying a broken one
+            provider.middlewares = ()
+            self._w3 = Web3(provider)
+        return self._w3
+
+    def reset(self) -> None:
+        self._w3 = None
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            result = self.breaker.call(fn, self.w3, *args)
+        except CircuitOpenError:
+            raise
+        except self.breaker.ignored_exceptions:
+            self.healthy = True
+            raise
+        except Exception:
+            self.healthy = False
+            raise
+        self.healthy = True
+        return result
+
+    def probe(self) -> None:
+        w3 = self.w3
+        started = time.perf_counter()
+        self.block_number = self.call(lambda _: w3.eth.block_number)
+        latency = (time.perf_counter() - started) * 1000
+        if self.latency_ms is None:
+            self.latency_ms = latency
+        else:
+            self.latency_ms += LATENCY_EWMA_ALPHA * (latency - self.latency_ms)
+
+    def snapshot(self, lag: Optional[int]) -> dict:
+        circuit = self.breaker.snapshot()
+        return {
+            "url": self.url,
+            "healthy": self.healthy and circuit["state"] != "open",
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "block_number": self.block_number,
+            "blocks_behind": lag,
+            "circuit": circuit,
+        }
+
+
+class RpcPool:
+    def __init__(
+        self,
+        urls: List[str],
+        timeout: float,
+        max_block_lag: int,
+        failure_threshold: int,
+        recovery_timeout: float,
+    ) -> None:
+        self.endpoints = [RpcEndpoint(url, timeout, failure_threshold, recovery_timeout) for url in urls]
+        self.max_block_lag = max_block_lag
+        self._probe_lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Drop providers inherited from a parent process (their HTTP sessions are shared)."""
+        for endpoint in self.endpoints:
+            endpoint.reset()
+
+    def _head(self) -> Optional[int]:
+        # Heights reported by nodes that have since failed still count: the
+        # chain does not get shorter because the node that saw it went away
+        heights = [e.block_number for e in self.endpoints if e.block_number is not None]
+        return max(heights) if heights else None
+
+    def _lag(self, endpoint: RpcEndpoint, head: Optional[int]) -> Optional[int]:
+        if head is None or endpoint.block_number is None:
+            return None
+        return head - endpoint.block_number
+
+    def candidates(self) -> List[RpcEndpoint]:
+        """Endpoints to try, best first. Lagging and circuit-open ones are skipped."""
+        head = self._head()
+        usable = [
+            e for e in self.endpoints
+            if e.breaker.state != "open" and (self._lag(e, head) or 0) <= self.max_block_lag
+        ]
+        # Healthy before failing, then measured fastest first (unprobed keep config order)
+        return sorted(usable, key=lambda e: (not e.healthy, e.latency_ms is None, e.latency_ms or 0.0))
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(w3, *args)`` on the best endpoint, failing over on errors.
+
+        Errors the breaker ignores (a reverted contract call) are raised as is,
+        since another node would give the same answer.
+        """
+        last_error: Optional[BaseException] = None
+        for endpoint in self.candidates():
+            try:
+                with tracing.span("rpc.call", tracing.CLIENT, **{"rpc.endpoint": endpoint.url}):
+                    return endpoint.call(fn, *args)
+            except endpoint.breaker.ignored_exceptions:
+                raise
+            except Exception as e:
+                last_error = e
+        if last_error is None:
+            raise ChainUnavailableError("no usable RPC endpoint (all circuits open or behind)")
+        raise ChainUnavailableError(f"RPC call failed on every endpoint: {last_error}") from last_error
+
+    def probe(self) -> None:
+        """Refresh latency and block height of every endpoint (blocking)."""
+        with self._probe_lock:
+            for endpoint in self.endpoints:
+                # Open circuits are left alone until their recovery timeout
+                try:
+                    endpoint.probe()
+                except Exception:
+                    pass
+
+    def best(self) -> Optional[RpcEndpoint]:
+        candidates = self.candidates()
+        return candidates[0] if candidates and candidates[0].healthy else None
+
+    def snapshot(self) -> List[dict]:
+        head = self._head()
+        return [e.snapshot(self._lag(e, head)) for e in self.endpoints]
@@ -0,0 +1,107 @@
+"""Certificate verification service.
+
+Combines the database integrity check and the on-chain lookup for a
+certificate hash. Used by both the authenticated ``/verify`` endpoint and the
+public, cacheable verification endpoint.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import tracing
+from utils import find_certificate, generate_hash
+from services.blockchain_service import verify_certificate_on_chain, ChainUnavailableError
+from services.revocation_service import revocations
+
+HEX_DIGITS = set("0123456789abcdef")
+
+
+def normalise_hash(value: str) -> str:
+    """Return a lowercase 64-char hex hash without 0x prefix, or raise ValueError."""
+    if not isinstance(value, str):
+        raise ValueError("hash must be a string")
+    h = value.strip().lower()
+    if h.startswith("0x"):
+        h = h[2:]
+    if len(h) != 64:
+        raise ValueError("hash must be 64 hex characters")
+    if any(c not in HEX_DIGITS for c in h):
+        raise ValueError("hash must be a valid hex string")
+    return h
+
+
+def _revoked(cert_hash: str, doc: Optional[dict]) -> dict:
+    return {
+        "hash": cert_hash,
+        "status": "revoked",
+        "exists_in_db": True,
+        "integrity_ok": None,
+        "chain_valid": None,
+        "reasons": ["certificate has been revoked"],
+        "certificate": doc,
+    }
+
+
+def check_certificate(cert_hash: str, session=None) -> dict:
+    """Run the database and blockchain checks for a normalised hash.
+
+    Returns the individual check results, an overall ``status`` ("valid",
+    "invalid", "revoked", "chain_unavailable" or "not_found") and the human
+    readable failure reasons. Revoked hashes known to the in-memory revocation
+    set are answered without touching the database or the chain; the set is
+    only a fast path, so a revoked record found in the database is reported
+    as revoked too (set not loaded yet, or revoked by another worker).
+    """
+    if cert_hash in revocations:
+        return _revoked(cert_hash, None)
+
+    doc = find_certificate(cert_hash, session=session, read=True)
+    if doc and doc.get("revoked"):
+        revocations.add(cert_hash)
+        return _revoked(cert_hash, doc)
+    exists_in_db = bool(doc)
+    integrity_ok = False
+    if doc:
+        try:
+            with tracing.span("verify.generate_hash"):
+                integrity_ok = (generate_hash(doc) == doc.get("hash"))
+        except Exception:
+            integrity_ok = False
+
+    # chain_valid stays None when the chain could not be checked
+    try:
+        chain_valid = bool(verify_certificate_on_chain(cert_hash))
+    except ChainUnavailableError:
+        chain_valid = None
+    except Exception:
+        chain_valid = False
+
+    reasons = []
+    if not exists_in_db:
+        reasons.append("not found in database")
+    elif not integrity_ok:
+        reasons.append("hash mismatch for stored record")
+    if chain_valid is None:
+        reasons.append("blockchain unavailable")
+    elif not chain_valid:
+        reasons.append("not found on blockchain")
+
+    if not reasons:
+        status = "valid"
+    elif not exists_in_db and not chain_valid:
+        status = "not_found"
+    elif exists_in_db and integrity_ok and chain_valid is None:
+        status = "chain_unavailable"
+    else:
+        status = "invalid"
+
+    return {
+        "hash": cert_hash,
+        "status": status,
+        "exists_in_db": exists_in_db,
+        "integrity_ok": integrity_ok,
+        "chain_valid": chain_valid,
+        "reasons": reasons,
+        "certificate": doc,
+    }
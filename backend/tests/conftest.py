@@ -0,0 +1,86 @@
+"""Shared fixtures: the app on a throwaway SQLite database, chain bypassed.
+
+Settings are read once when config is imported, so the environment is set
+here before anything from the backend is loaded.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+_data_dir = tempfile.mkdtemp(prefix="cert-tests-")
+os.environ.update(
+    DB_BACKEND="sqlite",
+    SQLITE_PATH=os.path.join(_data_dir, "test.db"),
+    BLOCKCHAIN_BYPASS="true",
+    # Cheapest bcrypt cost: tests check behaviour, not hashing strength
+    BCRYPT_ROUNDS="4",
+    BUNDLE_SIGNING_KEY_FILE="",
+    WEB_CONCURRENCY="1",
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import auth
+import main
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Entering the client runs the app lifespan (schema, revocation set)
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def issuer():
+    """A fresh issuer account: ``(username, auth headers)``."""
+    username = f"issuer-{uuid.uuid4().hex[:8]}"
+    auth.create_user(username, f"{username}@example.com", "password123", "issuer")
+    token = auth.create_access_token({"sub": username})
+    return username, {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def certificate():
+    """Factory for issue request bodies; each call describes a new certificate."""
+    def make(**fields) -> dict:
+        body = {
+            "student_name": f"Student {uuid.uuid4().hex[:8]}",
+            "institution": "Test University",
+            "degree": "BSc Computer Science",
+            "graduation_year": 2024,
+        }
+        body.update(fields)
+        return body
+    return make
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """The MongoDB repository on an empty in-memory (mongomock) server.
+
+    For the MongoDB-only paths: the archive tier and hash storage forms.
+    """
+    mongomock = pytest.importorskip("mongomock")
+    import utils
+    from repositories import get_repository, set_repository
+    from repositories.mongo import MongoRepository
+
+    monkeypatch.setattr(utils, "_client", mongomock.MongoClient())
+    previous = get_repository()
+    repository = MongoRepository()
+    repository.ensure_schema()
+    set_repository(repository)
+    yield repository
+    set_repository(previous)
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from services import archive_service
+from utils import certificates_archive, certificates_write, save_certificate
+
+
+def issue(n, graduation_year):
+    return save_certificate({
+        "student_name": f"Archived student {n}",
+        "institution": "Test University",
+        "degree": "BSc",
+        "graduation_year": graduation_year,
+        "issued_by": "archivist",
+    })["hash"]
+
+
+def test_old_certificates_move_and_stay_verifiable(mongo):
+    old = [issue(i, 1990) for i in range(3)]
+    recent = issue(3, datetime.utcnow().year)
+
+    assert archive_service.archive_old_certificates(after_years=5, batch_size=2) == 3
+    assert certificates_write.count_documents({}) == 1
+    assert certificates_archive.count_documents({}) == 3
+    # Lookups, revocation and anchoring fall back to the archive
+    assert mongo.find_certificate(old[0])["student_name"] == "Archived student 0"
+    assert mongo.revoke_certificate(old[1], "admin", "fraud")["revoked"] is True
+    mongo.mark_anchored(old[2], True, "0x" + "ab" * 32)
+    assert mongo.find_certificate(old[2])["anchored"] is True
+    assert dict(mongo.revoked_hashes())[old[1]] is not None
+    assert mongo.find_certificate(recent) is not None
+
+
+def test_update_between_copy_and_delete_is_not_lost(mongo, monkeypatch):
+    cert_hash = issue(0, 1990)
+    # Patch the resolved collection, not the shared LazyCollection handle
+    archive = certificates_archive.resolve()
+    copy = archive.bulk_write
+
+    def copy_then_race(requests, **kwargs):
+        result = copy(requests, **kwargs)
+        # Lands on the hot copy after it was read and copied
+        mongo.attach_document(cert_hash, "cd" * 32, 100, "application/pdf")
+        mongo.mark_anchored(cert_hash, True, "0x" + "ef" * 32)
+        return result
+
+    with monkeypatch.context() as patch:
+        patch.setattr(archive, "bulk_write", copy_then_race)
+        assert archive_service.archive_batch(cutoff_year=2000, batch_size=10) == (1, 0)
+
+    # Kept hot, then moved with the update on the next run
+    assert archive_service.archive_batch(cutoff_year=2000, batch_size=10) == (1, 1)
+    archived = mongo.find_certificate(cert_hash)
+    assert archived["document_hash"] == "cd" * 32 and archived["anchored"] is True
+    assert certificates_write.count_documents({}) == 0
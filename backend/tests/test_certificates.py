@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+import auth
+import main
+from repositories import get_repository
+from services import event_service
+
+
+def issue(client, headers, body, **extra_headers):
+    return client.post("/issue", headers={**headers, **extra_headers}, json=body)
+
+
+def test_issue_verify_revoke_verify(client, issuer, certificate):
+    _, headers = issuer
+    response = issue(client, headers, certificate())
+    assert response.status_code == 201
+    assert response.json()["blockchain_stored"] is True
+    cert_hash = response.json()["certificate"]["hash"]
+
+    assert client.post("/verify", headers=headers, json={"hash": cert_hash}).json()["status"] == "valid"
+    public = client.get(f"/public/verify/0x{cert_hash.upper()}")
+    assert public.json()["status"] == "valid"
+    assert "must-revalidate" in public.headers["cache-control"]
+
+    response = client.post(f"/certificates/{cert_hash}/revoke", headers=headers, json={"reason": "issued in error"})
+    assert response.status_code == 200
+    assert response.json()["certificate"]["revoked"] is True
+    assert response.json()["certificate"]["revocation_reason"] == "issued in error"
+    # Bypassed like anchoring: reported done without a chain
+    assert response.json()["blockchain_revoked"] is True
+
+    assert client.post("/verify", headers=headers, json={"hash": cert_hash}).json()["status"] == "revoked"
+    assert client.get(f"/public/verify/{cert_hash}").json()["status"] == "revoked"
+
+
+def test_verify_unknown_hash(client, issuer):
+    _, headers = issuer
+    response = client.post("/verify", headers=headers, json={"hash": "ab" * 32})
+    assert response.json()["status"] == "invalid"
+    # With the chain bypassed every hash looks anchored, so this is "invalid"
+    # (in the database: no) rather than "not_found"
+    assert client.get(f"/public/verify/{'ab' * 32}").json()["status"] != "valid"
+
+
+def test_issuer_cannot_revoke_another_issuers_certificate(client, issuer, certificate):
+    _, headers = issuer
+    cert_hash = issue(client, headers, certificate()).json()["certificate"]["hash"]
+
+    intruder = f"intruder-{uuid.uuid4().hex[:8]}"
+    auth.create_user(intruder, f"{intruder}@example.com", "password123", "issuer")
+    intruder_headers = {"Authorization": "Bearer " + auth.create_access_token({"sub": intruder})}
+    assert client.post(f"/certificates/{cert_hash}/revoke", headers=intruder_headers).status_code == 403
+    assert client.get(f"/public/verify/{cert_hash}").json()["status"] == "valid"
+
+
+def test_issuer_listing_pagination(client, issuer, certificate):
+    username, headers = issuer
+    issued = [issue(client, headers, certificate()).json()["certificate"]["hash"] for _ in range(5)]
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/issuers/{username}/certificates", headers=headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        # The summary comes with the first page only
+        assert ("summary" in page) == (cursor is None)
+        pages.append([c["hash"] for c in page["certificates"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    # Newest first, every certificate exactly once
+    assert [h for p in pages for h in p] == issued[::-1]
+
+
+def test_issuer_listing_rejects_bad_cursor(client, issuer):
+    username, headers = issuer
+    response = client.get(f"/issuers/{username}/certificates", headers=headers, params={"cursor": "garbage"})
+    assert response.status_code == 400
+
+
+def test_idempotency_key_replays_the_original_response(client, issuer, certificate):
+    username, headers = issuer
+    body = certificate()
+
+    first = issue(client, headers, body, **{"Idempotency-Key": "issue-1"})
+    replay = issue(client, headers, body, **{"Idempotency-Key": "issue-1"})
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.json() == first.json()
+    assert get_repository().count_certificates(username) == 1
+
+
+def test_idempotent_replay_returns_the_causal_token(client, mongo, issuer, certificate, monkeypatch):
+    # mongomock has no sessions, so stand in for the token of the write
+    monkeypatch.setattr(main, "write_session", lambda: nullcontext(None))
+    monkeypatch.setattr(main, "causal_token", lambda session: "token-1")
+    _, headers = issuer
+    body = certificate()
+
+    first = issue(client, headers, body, **{"Idempotency-Key": "issue-3"})
+    replay = issue(client, headers, body, **{"Idempotency-Key": "issue-3"})
+
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert first.headers["x-causal-token"] == replay.headers["x-causal-token"] == "token-1"
+
+
+def test_idempotency_key_reused_with_another_payload(client, issuer, certificate):
+    _, headers = issuer
+    assert issue(client, headers, certificate(), **{"Idempotency-Key": "issue-2"}).status_code == 201
+    response = issue(client, headers, certificate(), **{"Idempotency-Key": "issue-2"})
+    assert response.status_code == 422
+
+
+def test_slow_anchoring_does_not_block_other_requests(client, issuer, certificate, monkeypatch):
+    _, headers = issuer
+
+    def slow_store(cert_hash, on_submitted=None):
+        time.sleep(1.0)  # e.g. waiting for a receipt
+        return True
+
+    monkeypatch.setattr(event_service, "store_certificate_on_chain", slow_store)
+    issuing = threading.Thread(target=issue, args=(client, headers, certificate()))
+    issuing.start()
+    time.sleep(0.2)
+    started = time.monotonic()
+    assert client.get("/health/live").status_code == 200
+    assert time.monotonic() - started < 0.5
+    issuing.join()
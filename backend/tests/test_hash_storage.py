@@ -0,0 +1,44 @@
+import hashlib
+
+import migrate_hashes
+import utils
+from utils import certificates_archive, certificates_write
+
+
+def hex_hash(n):
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+
+def test_migration_converts_hot_and_archived_hashes(mongo, monkeypatch):
+    hot, archived = [hex_hash(i) for i in range(5)], [hex_hash(i) for i in range(5, 8)]
+    certificates_write.insert_many([{"hash": h, "student_name": "Hot"} for h in hot])
+    certificates_archive.insert_many([{"hash": h, "student_name": "Archived"} for h in archived])
+
+    assert migrate_hashes.migrate(batch_size=2, pause=0, dry_run=True) == 8
+    assert migrate_hashes.migrate(batch_size=2, pause=0, dry_run=False) == 0
+
+    for collection in (certificates_write, certificates_archive):
+        assert collection.count_documents(migrate_hashes.HEX_HASH) == 0
+    # Safe to stop matching hex now, archive included
+    monkeypatch.setattr(utils, "HASH_LEGACY_HEX_LOOKUP", False)
+    assert mongo.find_certificate(hot[0])["student_name"] == "Hot"
+    assert mongo.find_certificate(archived[0])["student_name"] == "Archived"
+    assert mongo.find_certificate(archived[0])["hash"] == archived[0]
+
+
+def test_lookup_matches_binary_and_legacy_hex_hashes(mongo, monkeypatch):
+    binary, legacy = hex_hash("binary"), hex_hash("legacy")
+    certificates_write.insert_one({"hash": utils.hash_to_db(binary), "student_name": "Binary"})
+    # Written before the migration: still hex
+    certificates_write.insert_one({"hash": legacy, "student_name": "Legacy"})
+
+    monkeypatch.setattr(utils, "HASH_LEGACY_HEX_LOOKUP", True)
+    for cert_hash, name in ((binary, "Binary"), (legacy, "Legacy")):
+        found = mongo.find_certificate(cert_hash)
+        assert found["student_name"] == name
+        # Hex in the API whatever the stored form
+        assert found["hash"] == cert_hash
+
+    monkeypatch.setattr(utils, "HASH_LEGACY_HEX_LOOKUP", False)
+    assert mongo.find_certificate(binary)["student_name"] == "Binary"
+    assert mongo.find_certificate(legacy) is None
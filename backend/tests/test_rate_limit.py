@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from starlette.requests import Request
+
+import rate_limit
+
+
+def request(forwarded=None, peer="10.0.0.1"):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+@pytest.mark.parametrize("forwarded, proxies, expected", [
+    (None, 1, "10.0.0.1"),
+    ("203.0.113.7", 1, "203.0.113.7"),
+    # A spoofed leftmost entry is ignored
+    ("1.2.3.4, 203.0.113.7", 1, "203.0.113.7"),
+    ("1.2.3.4, 203.0.113.7, 10.0.0.2", 2, "203.0.113.7"),
+    # Fewer entries than proxies: all of them come from our proxies
+    ("203.0.113.7", 3, "203.0.113.7"),
+])
+def test_client_ip_behind_trusted_proxies(monkeypatch, forwarded, proxies, expected):
+    monkeypatch.setattr(rate_limit, "TRUST_PROXY_HEADERS", True)
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXY_COUNT", proxies)
+    assert rate_limit.client_ip(request(forwarded)) == expected
+
+
+def test_client_ip_ignores_forwarded_header_unless_trusted(monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUST_PROXY_HEADERS", False)
+    assert rate_limit.client_ip(request("1.2.3.4")) == "10.0.0.1"
+
+
+def test_prune_drops_only_buckets_refilled_for_their_own_limit(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    store = rate_limit.InMemoryBucketStore()
+    monkeypatch.setattr(store, "PRUNE_EVERY", 3)
+
+    store.take("fast", 5, 5.0)  # refills in 0.2 s
+    store.take("slow", 5, 0.01)  # refills in 100 s
+    now[0] += 10
+    store.take("new", 5, 0.01)  # third take prunes
+
+    assert set(store._buckets) == {"slow", "new"}
+
+
+def test_login_is_rate_limited_per_user(client):
+    capacity, _ = rate_limit.parse_rate(rate_limit.RATE_LIMITS["login"]["user"])
+    credentials = {"username": f"user-{uuid.uuid4().hex[:8]}", "password": "wrong-password"}
+
+    for _ in range(capacity):
+        assert client.post("/auth/login", json=credentials).status_code == 401
+    response = client.post("/auth/login", json=credentials)
+
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
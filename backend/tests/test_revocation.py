@@ -0,0 +1,45 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from services import revocation_service
+from services.revocation_service import REFRESH_OVERLAP, RevocationSet, revocations
+from utils import revoke_certificate
+
+
+def hex_hash(n):
+    return hashlib.sha256(str(n).encode()).hexdigest()
+
+
+def test_refresh_rereads_the_overlap_window(monkeypatch):
+    now = datetime(2024, 1, 1, 12)
+    revoked = [(hex_hash(1), now)]
+
+    def revoked_hashes(since=None):
+        return [(h, at) for h, at in revoked if since is None or at >= since]
+
+    monkeypatch.setattr(revocation_service, "get_revoked_hashes", revoked_hashes)
+    revocation_set = RevocationSet()
+    assert revocation_set.refresh() == 1
+
+    # Stamped before the cursor by a server with a slow clock, committed after
+    revoked.append((hex_hash(2), now - REFRESH_OVERLAP + timedelta(seconds=1)))
+    # Outside the window: a full load would be needed to see it
+    revoked.append((hex_hash(3), now - REFRESH_OVERLAP - timedelta(seconds=1)))
+    assert revocation_set.refresh() == 1
+    assert hex_hash(2) in revocation_set and hex_hash(3) not in revocation_set
+    # Re-reading the window does not count known hashes again
+    assert revocation_set.refresh() == 0
+    assert len(revocation_set) == 2
+
+
+def test_verification_falls_back_to_the_database_flag(client, issuer, certificate):
+    username, headers = issuer
+    cert_hash = client.post("/issue", headers=headers, json=certificate()).json()["certificate"]["hash"]
+
+    # Revoked by another worker: in the database, not yet in this worker's set
+    revoke_certificate(cert_hash, username, "revoked elsewhere")
+    assert cert_hash not in revocations
+
+    response = client.get(f"/public/verify/{cert_hash}")
+    assert response.json()["status"] == "revoked"
+    assert cert_hash in revocations
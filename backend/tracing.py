@@ -0,0 +1,541 @@
+# tracing.py
+# Request tracing across the API, MongoDB and chain calls.
+#
+# Every HTTP request (and every background job run) starts a trace; code
+# inside opens child spans with ``span(name)``, MongoDB commands become spans
+# through a pymongo command listener and RPC calls through the pool. The
+# current span lives in a context variable, so spans nest across awaits and
+# asyncio.to_thread; ``in_background`` carries the trace into work that runs
+# after the response (anchoring). Trace context is read from and returned in
+# the W3C ``traceparent`` header.
+#
+# TRACE_SAMPLE_RATE decides per trace whether it is recorded (an incoming
+# traceparent's sampled flag wins unless the rate is 0). Unsampled traces cost one object per
+# request. Finished spans are queued and handed to the exporter in batches by
+# a background thread, so exporting never blocks a request; when the queue is
+# full spans are dropped.
+#
+# Exporters: "file" (JSON lines at TRACE_FILE, summarised by
+# ``python tracing.py traces.jsonl``), "console", "otlp" (OTLP/HTTP JSON, as
+# accepted by Jaeger, Tempo or an OpenTelemetry collector) or any
+# "module:factory" returning an object with ``export(spans)`` and
+# ``shutdown()``; ``set_exporter`` installs one directly.
+
+import functools
+import importlib
+import json
+import math
+import os
+import queue
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import monitoring
+
+from config import (
+    TRACE_SAMPLE_RATE,
+    TRACE_EXPORTER,
+    TRACE_FILE,
+    TRACE_OTLP_ENDPOINT,
+    TRACE_SERVICE_NAME,
+    TRACE_QUEUE_SIZE,
+    TRACE_EXPORT_INTERVAL_SECONDS,
+)
+
+TRACEPARENT_HEADER = "traceparent"
+
+SERVER = "server"
+CLIENT = "client"
+INTERNAL = "internal"
+
+EXPORT_BATCH_SIZE = 512
+
+
+class Span:
+    """One timed operation of a trace. Only sampled spans are exported."""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "sampled",
+                 "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 kind: str = INTERNAL, attributes: Optional[dict] = None) -> None:
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def fail(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self) -> None:
+        """End the span (once) and queue it for export if sampled."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            _processor.submit(self.to_dict())
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded by ``span`` when the trace is not sampled."""
+
+    sampled = False
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def fail(self, error: BaseException) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits) or 1:0{bits // 4}x}"
+
+
+def _parse_traceparent(value: Optional[str]):
+    """(trace_id, parent_id, sampled) from a traceparent header, or None if invalid."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3][:2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def _should_sample(trace_id: str) -> bool:
+    # Decided from the trace id, so every service with the same rate agrees
+    return int(trace_id[-8:], 16) < TRACE_SAMPLE_RATE * 0x100000000
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_traceparent() -> Optional[str]:
+    parent = _current.get()
+    return parent.traceparent() if parent is not None else None
+
+
+def _root(name: str, traceparent: Optional[str], kind: str, attributes: dict) -> Span:
+    """Root span of a trace, continuing ``traceparent`` if it is valid."""
+    parsed = _parse_traceparent(traceparent)
+    if parsed:
+        trace_id, parent_id, sampled = parsed
+        # A rate of 0 turns tracing off, whatever the caller decided
+        sampled = sampled and TRACE_SAMPLE_RATE > 0
+    else:
+        trace_id, parent_id = _new_id(128), None
+        sampled = _should_sample(trace_id)
+    return Span(name, trace_id, parent_id, sampled, kind, attributes if sampled else None)
+
+
+@contextmanager
+def trace(name: str, traceparent: Optional[str] = None, kind: str = INTERNAL, **attributes):
+    """Run a block as the root span of a trace (a background job run, a task)."""
+    root = _root(name, traceparent, kind, attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.fail(e)
+        raise
+    finally:
+        root.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: str = INTERNAL, **attributes):
+    """Run a block as a child span of the current one (no-op outside a sampled trace)."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield _NOOP
+        return
+    child = Span(name, parent.trace_id, parent.span_id, True, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def in_background(fn: Callable, name: Optional[str] = None) -> Callable:
+    """Wrap ``fn`` to run as a span of the current trace later, e.g. as a BackgroundTask.
+
+    The request span has usually finished by then; the background span keeps
+    its trace id and points to it as parent.
+    """
+    parent = _current.get()
+    if parent is None:
+        return fn
+    header = parent.traceparent()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with trace(name or f"background {fn.__name__}", traceparent=header):
+            return fn(*args, **kwargs)
+
+    return run
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a server span per HTTP request.
+
+    The span ends when the response is sent, before any background tasks, and
+    its traceparent is returned on the response.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or ())
+        incoming = headers.get(TRACEPARENT_HEADER.encode())
+        root = _root(
+            f"{scope['method']} {scope['path']}",
+            incoming.decode("latin-1") if incoming else None,
+            SERVER,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        token = _current.set(root)
+
+        async def send_traced(message):
+            if message["type"] == "http.response.start":
+                root.set("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (TRACEPARENT_HEADER.encode(), root.traceparent().encode())]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                self._finish(scope, root)
+
+        try:
+            await self.app(scope, receive, send_traced)
+        except BaseException as e:
+            root.fail(e)
+            raise
+        finally:
+            self._finish(scope, root)
+            _current.reset(token)
+
+    @staticmethod
+    def _finish(scope, root: Span) -> None:
+        if root.end_ns is None:
+            route = scope.get("route")
+            # Name by route template so /verify/<hash>-style paths group together
+            if route is not None and getattr(route, "path", None):
+                root.name = f"{scope['method']} {route.path}"
+            root.finish()
+
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """pymongo command listener recording each command as a client span."""
+
+    def __init__(self) -> None:
+        self._inflight: Dict[tuple, Span] = {}
+
+    def started(self, event) -> None:
+        parent = _current.get()
+        if parent is None or not parent.sampled:
+            return
+        target = event.command.get(event.command_name)
+        attributes = {"db.name": event.database_name, "db.operation": event.command_name}
+        if isinstance(target, str):
+            attributes["db.collection"] = target
+        if event.connection_id:
+            attributes["net.peer"] = f"{event.connection_id[0]}:{event.connection_id[1]}"
+        self._inflight[(event.request_id, event.connection_id)] = Span(
+            f"mongo.{event.command_name}", parent.trace_id, parent.span_id, True, CLIENT, attributes,
+        )
+
+    def succeeded(self, event) -> None:
+        child = self._inflight.pop((event.request_id, event.connection_id), None)
+        if child is not None:
+            child.finish()
+
+    def failed(self, event) -> None:
+        child = self._inflight.pop((event.request_id, event.connection_id), None)
+        if child is not None:
+            child.error = str(event.failure.get("errmsg", event.failure))
+            child.finish()
+
+
+# --- Exporters ---------------------------------------------------------------
+
+class FileExporter:
+    """Appends spans as JSON lines, for offline analysis."""
+
+    def __init__(self, path: str = TRACE_FILE) -> None:
+        self.path = path
+
+    def export(self, spans: List[dict]) -> None:
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps(s, default=str) + "\n" for s in spans)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleExporter:
+    def export(self, spans: List[dict]) -> None:
+        for s in spans:
+            status = f" ERROR {s['error']}" if s["error"] else ""
+            print(f"TRACE {s['trace_id']} {s['span_id']} <- {s['parent_id'] or '-'} "
+                  f"{s['name']} {s['duration_ms']:.2f} ms{status}")
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OtlpHttpExporter:
+    """Sends spans to an OTLP/HTTP JSON endpoint (e.g. <collector>:4318/v1/traces)."""
+
+    KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, service_name: str = TRACE_SERVICE_NAME,
+                 timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value: Any) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _span(self, s: dict) -> dict:
+        otlp = {
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "name": s["name"],
+            "kind": self.KINDS.get(s["kind"], 1),
+            "startTimeUnixNano": str(s["start_ns"]),
+            "endTimeUnixNano": str(s["start_ns"] + int(s["duration_ms"] * 1e6)),
+            "attributes": [{"key": k, "value": self._value(v)} for k, v in s["attributes"].items()],
+            "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 1},
+        }
+        if s["parent_id"]:
+            otlp["parentSpanId"] = s["parent_id"]
+        return otlp
+
+    def export(self, spans: List[dict]) -> None:
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "cert-verification"}, "spans": [self._span(s) for s in spans]}],
+        }]}
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+EXPORTERS = {
+    "file": FileExporter,
+    "console": ConsoleExporter,
+    "otlp": OtlpHttpExporter,
+}
+
+
+def load_exporter(spec: str):
+    """Exporter for a TRACE_EXPORTER value: a name from EXPORTERS or "module:factory"."""
+    if spec in EXPORTERS:
+        return EXPORTERS[spec]()
+    module, _, factory = spec.partition(":")
+    if not factory:
+        raise ValueError(f"Unknown trace exporter {spec!r}")
+    return getattr(importlib.import_module(module), factory)()
+
+
+class _BatchProcessor:
+    """Queues finished spans and exports them in batches from a daemon thread."""
+
+    def __init__(self, max_queue: int, interval: float) -> None:
+        self.interval = interval
+        self.exporter = None
+        self.dropped = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def submit(self, span_dict: dict) -> None:
+        # The thread does not survive a fork, so each worker starts its own
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(span_dict)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self.exporter is None:
+                self.exporter = load_exporter(TRACE_EXPORTER)
+            threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _drain(self) -> List[dict]:
+        batch = []
+        while len(batch) < EXPORT_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[dict]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            print(f"Warning: could not export {len(batch)} span(s): {e}")
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                self._export(batch)
+
+    def flush(self) -> None:
+        """Export everything queued so far from the calling thread."""
+        if self.exporter is None:
+            return
+        with self._lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                self._export(batch)
+
+
+_processor = _BatchProcessor(TRACE_QUEUE_SIZE, TRACE_EXPORT_INTERVAL_SECONDS)
+
+
+def set_exporter(exporter) -> None:
+    """Install an exporter object (``export(spans)``, ``shutdown()``) instead of TRACE_EXPORTER."""
+    _processor.flush()
+    _processor.exporter = exporter
+
+
+def shutdown() -> None:
+    """Flush queued spans and close the exporter (application shutdown)."""
+    _processor.flush()
+    if _processor.exporter is not None:
+        _processor.exporter.shutdown()
+    if _processor.dropped:
+        print(f"Warning: {_processor.dropped} span(s) dropped, export queue was full")
+
+
+# --- Offline analysis of a file export ----------------------------------------
+
+def summarise(path: str, slowest: int = 5) -> None:
+    """Print per-span-name latency and a breakdown of the slowest traces."""
+    traces: Dict[str, List[dict]] = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                s = json.loads(line)
+                traces.setdefault(s["trace_id"], []).append(s)
+
+    by_name: Dict[str, List[float]] = {}
+    for spans in traces.values():
+        for s in spans:
+            by_name.setdefault(s["name"], []).append(s["duration_ms"])
+    print(f"{len(traces)} traces\n")
+    print(f"{'span':<40}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, durations in sorted(by_name.items(), key=lambda item: -sum(item[1])):
+        durations.sort()
+        p95 = durations[max(0, math.ceil(len(durations) * 0.95) - 1)]
+        print(f"{name[:39]:<40}{len(durations):>8}{statistics.median(durations):>10.2f}{p95:>10.2f}{durations[-1]:>10.2f}")
+
+    def root_of(spans):
+        ids = {s["span_id"] for s in spans}
+        roots = [s for s in spans if s["parent_id"] not in ids]
+        return min(roots, key=lambda s: s["start_ns"])
+
+    ranked = sorted(traces.values(), key=lambda spans: -root_of(spans)["duration_ms"])
+    for spans in ranked[:slowest]:
+        root = root_of(spans)
+        print(f"\ntrace {root['trace_id']}  {root['name']}  {root['duration_ms']:.2f} ms")
+        children: Dict[Optional[str], List[dict]] = {}
+        for s in spans:
+            children.setdefault(s["parent_id"], []).append(s)
+
+        def show(s, depth):
+            offset = (s["start_ns"] - root["start_ns"]) / 1e6
+            status = f"  ERROR {s['error']}" if s["error"] else ""
+            print(f"  {'  ' * depth}{s['name']:<{40 - 2 * depth}} +{offset:8.2f} ms {s['duration_ms']:9.2f} ms{status}")
+            for child in sorted(children.get(s["span_id"], []), key=lambda c: c["start_ns"]):
+                show(child, depth + 1)
+
+        show(root, 0)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python tracing.py <traces.jsonl> [slowest]")
+        sys.exit(1)
+    summarise(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -1,19 +1,151 @@
 # utils.py
 import hashlib
 import json
-import os
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, Optional, Tuple
 
+from bson import Binary
 from pymongo import MongoClient
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
 
-# MongoDB connection - use environment variables when available
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-DB_NAME = os.getenv("DB_NAME", "cert_verification")
+from config import (
+    MONGO_URI,
+    DB_NAME,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_READ_PREFERENCE,
+    MONGO_MAX_STALENESS_SECONDS,
+    MONGO_WRITE_CONCERN,
+    MONGO_WRITE_TIMEOUT_MS,
+    HASH_LEGACY_HEX_LOOKUP,
+    TRACE_SAMPLE_RATE,
+)
+from repositories import get_repository
+from tracing import MongoCommandTracer
+
+# MongoDB connection - created on first use (or by the app lifespan), never at
+# import time, so importing this module stays cheap and touches no services.
+_client: Optional[MongoClient] = None
+
+
+def get_client() -> MongoClient:
+    global _client
+    if _client is None:
+        # Every command becomes a span of the current trace when tracing is on
+        listeners = [MongoCommandTracer()] if TRACE_SAMPLE_RATE > 0 else []
+        _client = MongoClient(
+            MONGO_URI,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            event_listeners=listeners,
+        )
+    return _client
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def close_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def reset_client_after_fork() -> None:
+    """Forget a client inherited from a parent process without closing it.
+
+    MongoClient is not fork-safe; the child must build its own, and closing
+    the inherited one would tear down sockets the parent still uses.
+    """
+    global _client
+    _client = None
+
+
+class LazyCollection:
+    """Stand-in for a pymongo Collection that resolves it on first use.
+
+    ``options`` are passed to ``Collection.with_options`` (read preference,
+    read/write concern). The resolved collection is cached per client.
+    """
+
+    def __init__(self, name: str, **options: Any) -> None:
+        self._name = name
+        self._options = options
+        self._client = None
+        self._collection = None
+
+    def resolve(self):
+        client = get_client()
+        if self._client is not client:
+            collection = client[DB_NAME][self._name]
+            if self._options:
+                collection = collection.with_options(**self._options)
+            self._collection, self._client = collection, client
+        return self._collection
+
+    def __getattr__(self, attr: str):
+        return getattr(self.resolve(), attr)
+
+
+def _read_preference():
+    modes = {
+        "primaryPreferred": PrimaryPreferred,
+        "secondary": Secondary,
+        "secondaryPreferred": SecondaryPreferred,
+        "nearest": Nearest,
+    }
+    if MONGO_READ_PREFERENCE not in modes:
+        return Primary()
+    return modes[MONGO_READ_PREFERENCE](max_staleness=MONGO_MAX_STALENESS_SECONDS)
+
+
+# Read-heavy paths (verification, listings) tolerate bounded staleness;
+# "majority" reads pair with majority writes for causal consistency.
+READ_OPTIONS: Dict[str, Any] = {
+    "read_preference": _read_preference(),
+    "read_concern": ReadConcern("majority"),
+}
+# Issuance and user changes must survive a primary failover
+WRITE_OPTIONS: Dict[str, Any] = {
+    "write_concern": WriteConcern(
+        w=int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN,
+        wtimeout=MONGO_WRITE_TIMEOUT_MS,
+    ),
+}
+
+certificates = LazyCollection("certificates")
+certificates_read = LazyCollection("certificates", **READ_OPTIONS)
+certificates_write = LazyCollection("certificates", **WRITE_OPTIONS)
+
+# Cold tier (see services/archive_service.py). Lookups by hash fall back to
+# it; listings and summaries only cover the hot collection.
+ARCHIVE_COLLECTION = "certificates_archive"
+certificates_archive = LazyCollection(ARCHIVE_COLLECTION, **WRITE_OPTIONS)
+certificates_archive_read = LazyCollection(ARCHIVE_COLLECTION, **READ_OPTIONS)
+
+
+# Response header carrying causal_token(); clients echo it on later reads
+CAUSAL_TOKEN_HEADER = "X-Causal-Token"
+
+
+def write_session():
+    """Session for writes (Mongo: causally consistent); pass it to ``causal_token``."""
+    return get_repository().write_session()
+
+
+def causal_token(session) -> Optional[str]:
+    """Opaque token of a session's writes (X-Causal-Token), or None."""
+    return get_repository().causal_token(session)
+
+
+def read_session(token: Optional[str]):
+    """Session whose reads observe the write that produced ``token``.
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-certificates = db["certificates"]
+    Without a (valid) token reads need no session, so this yields None.
+    """
+    return get_repository().read_session(token)
 
 # Canonical fields included in the certificate hash.
 # Order is preserved when serialising to ensure deterministic hashing across
@@ -70,43 +202,116 @@ def generate_hash(certificate_metadata: Dict[str, Any]) -> str:
     serialised = _serialise_for_hash(payload)
     return hashlib.sha256(serialised.encode()).hexdigest()
 
-# Save certificate to DB
-def save_certificate(metadata: dict) -> dict:
-    """Persist certificate metadata and attach a deterministic hash."""
+# Hashes are hex strings in the API and 32-byte binary in the database (half
+# the index size of hex); convert only at this boundary.
+def hash_to_db(cert_hash: str) -> Binary:
+    return Binary(bytes.fromhex(cert_hash))
+
+
+def hash_from_db(value: Any) -> Any:
+    """Hex string for a stored hash (binary, or a not yet migrated hex string)."""
+    return value.hex() if isinstance(value, bytes) else value
 
-    issued_by = metadata.get("issued_by")
-    issuer_email = metadata.get("issuer_email")
 
-    canonical = _canonicalise_certificate_payload(metadata)
-    created_at = datetime.utcnow()
+def hash_query(cert_hash: str) -> Any:
+    """Filter value matching ``cert_hash`` in the ``hash`` field."""
+    if HASH_LEGACY_HEX_LOOKUP:
+        return {"$in": [hash_to_db(cert_hash), cert_hash]}
+    return hash_to_db(cert_hash)
+
+
+def decode_certificate(doc: Optional[dict]) -> Optional[dict]:
+    """Convert a certificate document read from the database to API form (in place)."""
+    if doc and "hash" in doc:
+        doc["hash"] = hash_from_db(doc["hash"])
+    if doc and "document_hash" in doc:
+        doc["document_hash"] = hash_from_db(doc["document_hash"])
+    return doc
+
+
+# Save certificate to DB
+def build_certificate_record(metadata: dict, created_at: Optional[datetime] = None) -> dict:
+    """Canonical certificate record with its deterministic hash, as stored by ``save_certificate``."""
 
     record: Dict[str, Any] = {
-        **canonical,
-        "issued_by": issued_by,
-        "issuer_email": issuer_email,
-        "created_at": created_at,
+        **_canonicalise_certificate_payload(metadata),
+        "issued_by": metadata.get("issued_by"),
+        "issuer_email": metadata.get("issuer_email"),
+        "created_at": created_at or datetime.utcnow(),
     }
     record["hash"] = generate_hash(record)
+    return record
+
+
+def save_certificate(metadata: dict, session=None) -> dict:
+    """Persist certificate metadata and attach a deterministic hash."""
 
-    result = certificates.insert_one(record.copy())
-    record["_id"] = str(result.inserted_id)
+    record = build_certificate_record(metadata)
+    record["_id"] = get_repository().insert_certificate(record, session=session)
 
     return record
 
-# Verify certificate from DB
-def verify_certificate(query: dict) -> bool:
-    cert = certificates.find_one(query)
-    if not cert:
-        return False
 
-    expected_hash = generate_hash(cert)
+def find_certificate(cert_hash: str, session=None, read: bool = False) -> Optional[dict]:
+    """Find a certificate by hash (Mongo: hot collection, then the archive).
+
+    ``read=True`` allows reads from replicas.
+    """
+    return get_repository().find_certificate(cert_hash, session=session, read=read)
+
+
+def find_certificate_by_document(document_hash: str, session=None, read: bool = False) -> Optional[dict]:
+    """Find the certificate a file digest is attached to."""
+    return get_repository().find_certificate_by_document(document_hash, session=session, read=read)
+
+
+def attach_document(
+    cert_hash: str, document_hash: str, size: int, content_type: str, session=None
+) -> Optional[dict]:
+    """Record the digest of a certificate's file. Returns the updated record, or None if not found.
+
+    A certificate keeps the first document attached to it.
+    """
+    return get_repository().attach_document(cert_hash, document_hash, size, content_type, session=session)
 
-    return cert["hash"] == expected_hash
 
 def get_certificate_by_hash(cert_hash: str) -> dict:
     """Get certificate by hash"""
-    return certificates.find_one({"hash": cert_hash})
+    return find_certificate(cert_hash)
+
+def ensure_indexes() -> None:
+    """Create the tables and indexes used by the queries (idempotent)."""
+    get_repository().ensure_schema()
+
+
+def get_certificates_by_issuer(
+    issuer_username: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    session=None,
+) -> Tuple[list, Optional[str]]:
+    """Get one page of certificates issued by a specific user, newest first.
+
+    Returns ``(certificates, next_cursor)``; ``next_cursor`` is None on the
+    last page. Pagination is keyset-based on ``(created_at, id)`` so every
+    page is a bounded index range scan.
+    """
+    return get_repository().certificates_by_issuer(issuer_username, limit=limit, cursor=cursor, session=session)
+
+
+def get_issuer_summary(issuer_username: str, session=None) -> dict:
+    """Aggregate certificate counts for an issuer inside the database."""
+    return get_repository().issuer_summary(issuer_username, session=session)
+
+
+def revoke_certificate(cert_hash: str, revoked_by: str, reason: Optional[str] = None, session=None) -> Optional[dict]:
+    """Flag a certificate as revoked. Returns the updated record, or None if not found.
+
+    Revoking an already revoked certificate keeps the original revocation.
+    """
+    return get_repository().revoke_certificate(cert_hash, revoked_by, reason, session=session)
+
 
-def get_certificates_by_issuer(issuer_username: str) -> list:
-    """Get all certificates issued by a specific user"""
-    return list(certificates.find({"issued_by": issuer_username}))
+def get_revoked_hashes(since: Optional[datetime] = None) -> Iterator[Tuple[str, Optional[datetime]]]:
+    """Yield ``(hash, revoked_at)`` for revoked certificates, optionally since a time."""
+    return get_repository().revoked_hashes(since)
@@ -3,14 +3,43 @@ pragma solidity ^0.8.0;
 
 contract CertRegistry {
     mapping(bytes32 => bool) public certHashes; // store only hashes
+    mapping(bytes32 => bool) public revokedHashes; // withdrawn certificates
+    address public owner;
+
+    event CertRevoked(bytes32 indexed hash, address indexed revokedBy, uint256 revokedAt);
+
+    constructor() {
+        owner = msg.sender;
+    }
 
     // add a cert hash
     function addCert(bytes32 _hash) public {
         certHashes[_hash] = true;
     }
 
+    // add many cert hashes in one transaction (shares the per-transaction cost)
+    function addCerts(bytes32[] calldata _hashes) public {
+        for (uint256 i = 0; i < _hashes.length; i++) {
+            certHashes[_hashes[i]] = true;
+        }
+    }
+
     // check if cert hash exists
     function verifyCert(bytes32 _hash) public view returns (bool) {
         return certHashes[_hash];
     }
+
+    // withdraw a cert hash (only the registry owner, i.e. the API's sender)
+    function revokeCert(bytes32 _hash) public {
+        require(msg.sender == owner, "only owner can revoke");
+        require(certHashes[_hash], "unknown certificate");
+        require(!revokedHashes[_hash], "already revoked");
+        revokedHashes[_hash] = true;
+        emit CertRevoked(_hash, msg.sender, block.timestamp);
+    }
+
+    // check if cert hash was revoked
+    function isRevoked(bytes32 _hash) public view returns (bool) {
+        return revokedHashes[_hash];
+    }
 }
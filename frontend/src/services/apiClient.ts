@@ -4,6 +4,11 @@ import { tokenStorage } from "../lib/token";
 import type { ApiError } from "../types/api";
 
 const API_BASE_URL = import.meta.env.VITE_API_URL ?? "http://localhost:8000";
+const CAUSAL_TOKEN_HEADER = "X-Causal-Token";
+
+// Token of our latest write: reads may go to a lagging replica, and sending it
+// back makes them wait until our own writes are visible
+let causalToken: string | null = null;
 
 const apiClient: AxiosInstance = axios.create({
   baseURL: API_BASE_URL,
@@ -19,16 +24,27 @@ apiClient.interceptors.request.use((config: InternalAxiosRequestConfig) => {
     config.headers = config.headers ?? new AxiosHeaders();
     config.headers.set("Authorization", `Bearer ${token}`);
   }
+  if (causalToken) {
+    config.headers = config.headers ?? new AxiosHeaders();
+    config.headers.set(CAUSAL_TOKEN_HEADER, causalToken);
+  }
   return config;
 });
 
 apiClient.interceptors.response.use(
-  (response: AxiosResponse) => response,
+  (response: AxiosResponse) => {
+    const token = response.headers[CAUSAL_TOKEN_HEADER.toLowerCase()];
+    if (typeof token === "string" && token) {
+      causalToken = token;
+    }
+    return response;
+  },
   (error: AxiosError) => {
     if (error.response) {
       const { status, data } = error.response;
       if (status === 401) {
         tokenStorage.clearAll();
+        causalToken = null;
       }
       const message = (data as { detail?: string })?.detail ?? error.message;
       return Promise.reject<ApiError>({
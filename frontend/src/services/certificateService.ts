@@ -5,6 +5,7 @@ import type {
   CertificateListResponse,
   CertificateVerifyPayload,
   CertificateVerifyResponse,
+  IssuerCertificateListResponse,
 } from "../types/api";
 
 export const certificateService = {
@@ -22,4 +23,15 @@ export const certificateService = {
     const response = await apiClient.get<CertificateListResponse>("/certificates");
     return response.data;
   },
+
+  async listIssuerCertificates(
+    username: string,
+    params: { limit?: number; cursor?: string } = {},
+  ): Promise<IssuerCertificateListResponse> {
+    const response = await apiClient.get<IssuerCertificateListResponse>(
+      `/issuers/${encodeURIComponent(username)}/certificates`,
+      { params },
+    );
+    return response.data;
+  },
 };
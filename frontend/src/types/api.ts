@@ -54,6 +54,10 @@ export interface CertificateRecord extends CertificateIssuePayload {
   issued_by?: string;
   issuer_email?: string;
   created_at?: string;
+  revoked?: boolean;
+  revoked_at?: string | null;
+  revoked_by?: string | null;
+  revocation_reason?: string | null;
 }
 
 export interface CertificateVerifyPayload {
@@ -69,7 +73,7 @@ export interface CertificateIssueResponse {
 export interface CertificateVerifyResponse {
   message: string;
   verified_by: string;
-  status: "valid" | "invalid";
+  status: "valid" | "invalid" | "revoked" | "chain_unavailable";
 }
 
 export interface CertificateListResponse {
@@ -78,6 +82,21 @@ export interface CertificateListResponse {
   accessed_by: string;
 }
 
+export interface IssuerCertificateSummary {
+  total: number;
+  by_year: { graduation_year: number; count: number }[];
+  by_degree: { degree: string; count: number }[];
+}
+
+export interface IssuerCertificateListResponse {
+  issuer: string;
+  certificates: CertificateRecord[];
+  count: number;
+  next_cursor: string | null;
+  accessed_by: string;
+  summary?: IssuerCertificateSummary;
+}
+
 export interface ApiError {
   status: number;
   message: string;